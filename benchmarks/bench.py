@@ -0,0 +1,267 @@
+import argparse
+import json
+import logging
+import platform
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from tradingbot.components import Backtester, Configuration
+from tradingbot.strategies import SimpleBollingerBands, SimpleMACD, VolumeProfile
+
+from .synthetic import make_market_history, write_csv
+
+BENCHMARKS_DIR = Path(__file__).parent
+DEFAULT_BASELINE = BENCHMARKS_DIR / "baseline.json"
+CONFIG_PATH = BENCHMARKS_DIR.parent / "config" / "trading_bot.toml"
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+QUICK_SIZES = [1_000, 10_000]
+
+# Results of each benchmark for each number of bars, in seconds
+Results = Dict[str, Dict[str, float]]
+# Build the function to time for the given number of bars
+Setup = Callable[[int, Configuration, Path], Callable[[], Any]]
+
+
+def _simple_macd_find_trade_signal(
+    bars: int, config: Configuration, tmp_dir: Path
+) -> Callable[[], Any]:
+    strategy = SimpleMACD(config, None)  # type: ignore
+    history = make_market_history(bars)
+    return lambda: strategy.find_trade_signal(history.market, history)
+
+
+def _simple_boll_bands_find_trade_signal(
+    bars: int, config: Configuration, tmp_dir: Path
+) -> Callable[[], Any]:
+    strategy = SimpleBollingerBands(config, None)  # type: ignore
+    history = make_market_history(bars)
+    return lambda: strategy.find_trade_signal(history.market, history)
+
+
+def _volume_profile_build_volume_profile(
+    bars: int, config: Configuration, tmp_dir: Path
+) -> Callable[[], Any]:
+    strategy = VolumeProfile(config, None)  # type: ignore
+    history = make_market_history(bars)
+    return lambda: strategy._build_volume_profile(history.dataframe)
+
+
+def _backtester_start(
+    bars: int, config: Configuration, tmp_dir: Path
+) -> Callable[[], Any]:
+    strategy = VolumeProfile(config, None)  # type: ignore
+    csv_path = write_csv(bars, str(tmp_dir / f"data_{bars}.csv"))
+    return lambda: Backtester(strategy).start(csv_path)
+
+
+def _backtester_start_native(
+    bars: int, config: Configuration, tmp_dir: Path
+) -> Callable[[], Any]:
+    strategy = VolumeProfile(config, None)  # type: ignore
+    csv_path = write_csv(bars, str(tmp_dir / f"data_{bars}.csv"))
+    return lambda: Backtester(strategy, engine="native").start(csv_path)
+
+
+BENCHMARKS: Dict[str, Setup] = {
+    "SimpleMACD.find_trade_signal": _simple_macd_find_trade_signal,
+    "SimpleBollingerBands.find_trade_signal": _simple_boll_bands_find_trade_signal,
+    "VolumeProfile._build_volume_profile": _volume_profile_build_volume_profile,
+    "Backtester.start": _backtester_start,
+    "Backtester.start[native]": _backtester_start_native,
+}
+
+
+def measure(
+    func: Callable[[], Any], repeat: int, budget: float, min_time: float = 0.5
+) -> float:
+    """
+    Return the best time of at least repeat calls of func. Fast functions are
+    called for at least min_time seconds to get a stable result, while slow
+    ones are called again only until the calls took budget seconds
+    """
+    times: List[float] = []
+    while (len(times) < repeat or sum(times) < min_time) and len(times) < 10000:
+        if times and sum(times) >= budget:
+            break
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def run(
+    names: List[str], sizes: List[int], repeat: int = 5, budget: float = 5.0
+) -> Results:
+    """Run the benchmarks for each number of bars"""
+    config = Configuration.from_filepath(CONFIG_PATH)
+    results: Results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name in names:
+            results[name] = {}
+            for bars in sizes:
+                func = BENCHMARKS[name](bars, config, Path(tmp_dir))
+                seconds = measure(func, repeat, budget)
+                results[name][str(bars)] = seconds
+                print(f"{name:40s} {bars:>9d} bars {seconds:12.6f} s", flush=True)
+    return results
+
+
+def compare(baseline: Results, current: Results, threshold: float) -> pd.DataFrame:
+    """
+    Compare the results with the baseline ones. A benchmark is a regression if
+    it is slower than the baseline by more than threshold (e.g. 0.2 = 20%)
+    """
+    rows = []
+    for name, sizes in current.items():
+        for bars, seconds in sizes.items():
+            reference = baseline.get(name, {}).get(bars)
+            change = seconds / reference - 1 if reference else np.nan
+            rows.append(
+                {
+                    "Benchmark": name,
+                    "Bars": int(bars),
+                    "Baseline [s]": reference,
+                    "Current [s]": seconds,
+                    "Change [%]": change * 100,
+                    "Regression": bool(change > threshold),
+                }
+            )
+    return pd.DataFrame(rows)
+
+
+def load_results(path: Path) -> Results:
+    with path.open() as f:
+        return json.load(f)["results"]
+
+
+def save_results(path: Path, results: Results) -> None:
+    """Save the results with a description of the environment that produced them"""
+    data = {
+        "metadata": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+        },
+        "results": results,
+    }
+    with path.open("w") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+
+
+def get_menu_parser(args: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="benchmarks",
+        description="Time strategies and backtester on synthetic OHLCV data and "
+        "compare the results with a baseline",
+    )
+    parser.add_argument(
+        "-b",
+        "--baseline",
+        help=f"Baseline results file (default: {DEFAULT_BASELINE.name})",
+        type=Path,
+        default=DEFAULT_BASELINE,
+        metavar="FILEPATH",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        help="Store the results as the new baseline instead of comparing them",
+        action="store_true",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="Also save the results to this file",
+        type=Path,
+        default=None,
+        metavar="FILEPATH",
+    )
+    parser.add_argument(
+        "-k",
+        "--filter",
+        help="Only run the benchmarks whose name contains this text",
+        default="",
+        metavar="TEXT",
+    )
+    parser.add_argument(
+        "--sizes",
+        help=f"Number of bars of the synthetic data (default: {SIZES})",
+        type=int,
+        nargs="+",
+        default=None,
+        metavar="BARS",
+    )
+    parser.add_argument(
+        "--quick",
+        help=f"Only use small datasets, same as --sizes {' '.join(map(str, QUICK_SIZES))}",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--repeat",
+        help="Maximum number of runs of each benchmark, the best is reported "
+        "(default: 5)",
+        type=int,
+        default=5,
+        metavar="N",
+    )
+    parser.add_argument(
+        "--threshold",
+        help="Slowdown from the baseline reported as regression, in percentage "
+        "(default: 20)",
+        type=float,
+        default=20.0,
+        metavar="PERCENT",
+    )
+    return parser.parse_args(args)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = get_menu_parser(argv)
+    # The strategies log at every signal and backtesting.py warns at every
+    # rejected order, which would flood the output and affect the timings
+    logging.disable(logging.CRITICAL)
+    warnings.simplefilter("ignore")
+    names = [n for n in BENCHMARKS if args.filter in n]
+    if not names:
+        print(f"No benchmark matches {args.filter}")
+        return 2
+    sizes = args.sizes or (QUICK_SIZES if args.quick else SIZES)
+    results = run(names, sizes, args.repeat)
+    if args.output:
+        save_results(args.output, results)
+    if args.save_baseline:
+        # Keep the baseline of the benchmarks that have not been run
+        baseline = load_results(args.baseline) if args.baseline.exists() else {}
+        for name, values in results.items():
+            baseline.setdefault(name, {}).update(values)
+        save_results(args.baseline, baseline)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"No baseline found at {args.baseline}, run with --save-baseline")
+        return 0
+
+    table = compare(load_results(args.baseline), results, args.threshold / 100)
+    print()
+    print(table.to_string(index=False, float_format=lambda v: f"{v:.6g}"))
+    regressions = table[table["Regression"]]
+    if not regressions.empty:
+        print(f"\n{len(regressions)} regressions above {args.threshold}%")
+        return 1
+    print(f"\nNo regressions above {args.threshold}%")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+from tradingbot.interfaces import Market, MarketHistory
+
+
+def make_ohlcv(bars: int, seed: int = 0, freq: str = "min") -> pd.DataFrame:
+    """
+    Generate a deterministic OHLCV dataframe following a geometric random walk,
+    with the columns of the backtest CSV files
+    """
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, bars)))
+    open_ = close * np.exp(rng.normal(0, 0.001, bars))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.002, bars))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.002, bars))
+    volume = rng.integers(1000, 5000, bars).astype(float)
+    index = pd.date_range("2000-01-01", periods=bars, freq=freq, name="Gmt time")
+    return pd.DataFrame(
+        {"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume},
+        index=index,
+    )
+
+
+def make_market_history(bars: int, seed: int = 0) -> MarketHistory:
+    """Generate a deterministic MarketHistory as returned by the Broker"""
+    df = make_ohlcv(bars, seed)
+    market = Market()
+    market.epic = market.id = market.name = "BENCHMARK"
+    market.bid = market.offer = float(df["Close"].iloc[-1])
+    return MarketHistory(
+        market,
+        df.index.strftime("%Y-%m-%d %H:%M:%S").tolist(),
+        df["High"].to_numpy(),
+        df["Low"].to_numpy(),
+        df["Close"].to_numpy(),
+        df["Volume"].to_numpy(),
+    )
+
+
+def write_csv(bars: int, path: str, seed: int = 0) -> str:
+    """Write a deterministic backtest CSV file"""
+    make_ohlcv(bars, seed).to_csv(path, date_format="%d.%m.%Y %H:%M:%S.000")
+    return path
@@ -1,6 +1,8 @@
+import copy
 import json
 import re
 from enum import Enum
+from urllib.parse import parse_qs, urlsplit
 
 from tradingbot.components.broker import IG_API_URL
 
@@ -80,6 +82,26 @@ def ig_request_market_info(mock, args="", data="mock_market_info.json", fail=Fal
     )
 
 
+def ig_market_details(url, missing=()):
+    """Return the details of the markets requested by epics in the url"""
+    epics = parse_qs(urlsplit(url).query)["epics"][0].split(",")
+    info = read_json(f"{TEST_DATA_IG}/mock_market_info.json")
+    details = []
+    for epic in (e for e in epics if e not in missing):
+        details.append(copy.deepcopy(info))
+        details[-1]["instrument"]["epic"] = epic
+    return {"marketDetails": details}
+
+
+def ig_request_market_infos(mock, fail=False, missing=()):
+    """Mock multiple markets info call, returning the requested epics not missing"""
+    mock.get(
+        re.compile(re.escape(f"{IG_BASE_URI}/{IG_API_URL.MARKETS.value}?epics=")),
+        json=lambda request, context: ig_market_details(request.url, missing),
+        status_code=401 if fail else 200,
+    )
+
+
 def ig_request_search_market(mock, args="", data="mock_market_search.json", fail=False):
     """Mock market search call"""
     mock.get(
@@ -0,0 +1,87 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from common.MockRequests import TEST_DATA_IG, ig_market_details, read_json
+
+from tradingbot.components.broker import IG_API_URL
+
+# Json file returned by each IG REST API GET endpoint
+IG_GET_RESPONSES = {
+    IG_API_URL.ACCOUNTS.value: "mock_account_details.json",
+    IG_API_URL.POSITIONS.value: "mock_positions.json",
+    IG_API_URL.MARKETS.value: "mock_market_info.json",
+    IG_API_URL.PRICES.value: "mock_historic_price.json",
+    IG_API_URL.WATCHLISTS.value: "mock_watchlist.json",
+}
+IG_CONFIRM = {"dealId": "123456789", "dealStatus": "SUCCESS", "reason": "SUCCESS"}
+IG_DEAL = {"dealReference": "123456789"}
+
+
+class IGServer(ThreadingHTTPServer):
+    """
+    Local stand-in of the IG REST API, replying with the test data after delay
+    seconds. It records the requests and the maximum number of requests
+    served at the same time
+    """
+
+    def __init__(self, delay=0.0):
+        super().__init__(("127.0.0.1", 0), IGRequestHandler)
+        self.delay = delay
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
+
+
+class IGRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlsplit(self.path)
+        endpoint = url.path.strip("/").split("/")[0]
+        if endpoint == IG_API_URL.CONFIRMS.value:
+            self._reply(IG_CONFIRM)
+        elif endpoint == IG_API_URL.MARKETS.value and "epics=" in url.query:
+            self._reply(ig_market_details(self.path))
+        elif endpoint in IG_GET_RESPONSES:
+            self._reply(read_json(f"{TEST_DATA_IG}/{IG_GET_RESPONSES[endpoint]}"))
+        else:
+            self._reply({"errorCode": "error.not-found"}, 404)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._reply(IG_DEAL)
+
+    def _reply(self, data, status=200):
+        server = self.server
+        with server.lock:
+            server.requests.append((self.command, self.path))
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            time.sleep(server.delay)
+            body = json.dumps(data).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def log_message(self, *args):
+        pass
@@ -0,0 +1,69 @@
+import threading
+import time
+from datetime import timezone
+
+from tradingbot.components.broker import StreamingInterface
+
+
+class StreamPublisher(StreamingInterface):
+    """
+    Local stand-in of the IG streaming feed, publishing the updates given to
+    publish() to the listeners of the subscribed items from its own thread
+    """
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.connected = False
+        self.items = set()
+        self.subscribed_items = set()
+        self.subscribed = threading.Event()
+
+    def connect(self):
+        self.connected = True
+
+    def disconnect(self):
+        self.connected = False
+
+    def subscribe(self, items):
+        self.items.update(items)
+        self.subscribed_items.update(items)
+        self.subscribed.set()
+
+    def unsubscribe(self, items):
+        self.items.difference_update(items)
+
+    def publish(self, updates, delay=0.0):
+        """
+        Publish the (item, values) updates once the markets are subscribed,
+        waiting delay seconds before each one. Return the publishing thread
+        """
+
+        def run():
+            self.subscribed.wait(10)
+            for item, values in updates:
+                time.sleep(delay)
+                if item in self.items:
+                    self._notify(item, values)
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+
+def price(bid, offer, update_time="10:00:00"):
+    """Values of a MARKET item update"""
+    return {"BID": str(bid), "OFFER": str(offer), "UPDATE_TIME": update_time}
+
+
+def candle(time, close, complete=True, volume=10):
+    """Values of a CHART item update at the naive UTC time"""
+    utm = int(time.replace(tzinfo=timezone.utc).timestamp() * 1000)
+    return {
+        "BID_OPEN": str(close - 1),
+        "BID_HIGH": str(close + 1),
+        "BID_LOW": str(close - 2),
+        "BID_CLOSE": str(close),
+        "LTV": str(volume),
+        "UTM": str(utm),
+        "CONS_END": "1" if complete else "0",
+    }
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+
+def make_ohlcv(bars, seed=0, start="2020-01-01", freq="D"):
+    """Generate a deterministic random walk OHLCV dataframe"""
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, bars))
+    open_ = close + rng.normal(0, 0.5, bars)
+    high = np.maximum(open_, close) + rng.uniform(0, 1, bars)
+    low = np.minimum(open_, close) - rng.uniform(0, 1, bars)
+    volume = rng.integers(1000, 5000, bars).astype(float)
+    index = pd.date_range(start, periods=bars, freq=freq)
+    return pd.DataFrame(
+        {"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume},
+        index=index,
+    )
+
+
+def write_csv(dataframe, path):
+    """Write an OHLCV dataframe in the format of the backtest CSV files"""
+    dataframe = dataframe.copy()
+    dataframe.index.name = "Gmt time"
+    dataframe.to_csv(path, date_format="%d.%m.%Y %H:%M:%S.000")
+    return str(path)
+
+
+def make_history(bars, seed=0):
+    """Generate a deterministic history with the MarketHistory columns"""
+    df = make_ohlcv(bars, seed)
+    return pd.DataFrame(
+        {
+            "close": df["Close"].to_numpy(),
+            "high": df["High"].to_numpy(),
+            "low": df["Low"].to_numpy(),
+            "volume": df["Volume"].to_numpy(),
+        }
+    )
+
+
+class MockDatapoints:
+    """Wrap a dataframe as the datapoints passed to find_trade_signal()"""
+
+    def __init__(self, dataframe):
+        self.dataframe = dataframe
@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from tradingbot.components import TimeAmount, TimeProvider
+
+
+class VirtualClock(TimeProvider):
+    """
+    TimeProvider whose time only moves forward when waiting, starting at the
+    given naive UTC time. The market opens at the given hour of the next day
+    """
+
+    def __init__(self, time, opening_hour=8):
+        self.time = time
+        self.opening_hour = opening_hour
+        self.waits = []
+
+    def now(self):
+        return self.time
+
+    def is_market_open(self, timezone):
+        return True
+
+    def get_next_market_opening(self):
+        opening = self.time.replace(hour=self.opening_hour, minute=0, second=0)
+        return opening + timedelta(days=1) if opening <= self.time else opening
+
+    def wait_for(self, time_amount_type, amount=-1):
+        if time_amount_type is TimeAmount.NEXT_MARKET_OPENING:
+            amount = (self.get_next_market_opening() - self.time).total_seconds()
+        self.waits.append(amount)
+        self.time += timedelta(seconds=amount)
@@ -0,0 +1,182 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from common.SyntheticData import make_ohlcv
+
+from tradingbot.components import Backtester, Configuration, TradeDirection
+from tradingbot.components.backtest_engine import BacktestEngine
+from tradingbot.components.backtester import RESULT_METRICS
+from tradingbot.strategies import SimpleBollingerBands, SimpleMACD, VolumeProfile
+
+TRADE_COLUMNS = [
+    "Size",
+    "EntryBar",
+    "ExitBar",
+    "EntryPrice",
+    "ExitPrice",
+    "PnL",
+    "Commission",
+    "ReturnPct",
+]
+
+
+class SignalsStrategy:
+    """
+    Strategy returning the given signals
+    """
+
+    required_lookback = None
+
+    def __init__(self, signals=None):
+        self.signals = signals
+
+    def find_trade_signal(self, market, datapoints):
+        direction, limit, stop = self.signals
+        i = len(datapoints.dataframe) - 1
+        return (
+            direction[i],
+            None if np.isnan(limit[i]) else limit[i],
+            None if np.isnan(stop[i]) else stop[i],
+        )
+
+    def find_trade_signals(self, history):
+        return self.signals
+
+
+class PerBarStrategy(SignalsStrategy):
+    def find_trade_signals(self, history):
+        return None
+
+
+@pytest.fixture
+def config():
+    return Configuration.from_filepath(Path("test/test_data/trading_bot.toml"))
+
+
+def _random_signals(data, seed):
+    """Random long and short signals with valid and invalid stops and limits"""
+    rng = np.random.default_rng(seed)
+    bars = len(data)
+    close = data["Close"].to_numpy()
+    choices = [TradeDirection.BUY, TradeDirection.SELL, TradeDirection.NONE]
+    direction = np.array(
+        [choices[c] for c in rng.choice(3, bars, p=[0.2, 0.2, 0.6])], dtype=object
+    )
+    stop = np.where(rng.random(bars) < 0.8, close + rng.normal(0, 2, bars), np.nan)
+    limit = np.where(rng.random(bars) < 0.7, close + rng.normal(0, 4, bars), np.nan)
+    return direction, limit, stop
+
+
+def _assert_same_results(expected, result):
+    trades = result["_trades"]
+    assert len(trades) == len(expected["_trades"])
+    assert np.array_equal(
+        trades[TRADE_COLUMNS].to_numpy(float),
+        expected["_trades"][TRADE_COLUMNS].to_numpy(float),
+    )
+    assert np.array_equal(
+        result["_equity_curve"]["Equity"], expected["_equity_curve"]["Equity"]
+    )
+    for key in RESULT_METRICS:
+        assert result[key] == expected[key] or (
+            pd.isna(result[key]) and pd.isna(expected[key])
+        ), key
+
+
+@pytest.mark.parametrize(
+    "strategy_class", [SimpleMACD, SimpleBollingerBands, VolumeProfile]
+)
+@pytest.mark.parametrize("commission", [0.0, 0.002])
+def test_same_results_as_backtesting(config, strategy_class, commission):
+    data = make_ohlcv(1000, seed=1)
+    strategy = strategy_class(config, None)
+    expected = Backtester(strategy).run(data, commission=commission)
+    assert expected["# Trades"] > 0
+    result = Backtester(strategy, engine="native").run(data, commission=commission)
+    _assert_same_results(expected, result)
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("cash", [10000, 500])
+def test_same_results_with_random_signals(seed, cash):
+    data = make_ohlcv(500, seed=seed)
+    signals = _random_signals(data, seed)
+    expected = Backtester(SignalsStrategy()).run(
+        data, cash=cash, commission=0.002, signals=signals
+    )
+    assert expected["# Trades"] > 10
+    result = Backtester(SignalsStrategy(), engine="native").run(
+        data, cash=cash, commission=0.002, signals=signals
+    )
+    _assert_same_results(expected, result)
+
+
+def test_same_results_per_bar():
+    data = make_ohlcv(300, seed=2)
+    signals = _random_signals(data, 2)
+    expected = Backtester(PerBarStrategy(signals)).run(data)
+    result = Backtester(PerBarStrategy(signals), engine="native").run(data)
+    _assert_same_results(expected, result)
+
+
+@pytest.mark.parametrize("strategy_class", [SignalsStrategy, PerBarStrategy])
+def test_no_signal_keeps_trade_open(strategy_class):
+    data = make_ohlcv(100, seed=3)
+    direction = np.full(len(data), None, dtype=object)
+    direction[10] = TradeDirection.BUY
+    direction[30] = TradeDirection.NONE
+    signals = direction, np.full(len(data), np.nan), np.full(len(data), np.nan)
+    expected = Backtester(strategy_class(signals)).run(data)
+    result = Backtester(strategy_class(signals), engine="native").run(data)
+    _assert_same_results(expected, result)
+    # Only the NONE signal closes the trade
+    assert list(result["_trades"]["ExitBar"]) == [31]
+
+
+def test_out_of_money():
+    # A short trade with all the equity on a market that keeps rising
+    close = np.linspace(100, 400, 200)
+    data = pd.DataFrame(
+        {"Open": close, "High": close + 1, "Low": close - 1, "Close": close},
+        index=pd.date_range("2020-01-01", periods=200),
+    )
+    signals = (
+        np.full(200, TradeDirection.SELL, dtype=object),
+        np.full(200, np.nan),
+        np.full(200, np.nan),
+    )
+    result = BacktestEngine(data).run(signals)
+    assert result["# Trades"] == 1
+    assert result["Equity Final [$]"] == 0
+    exit_bar = result["_trades"]["ExitBar"].iloc[0]
+    assert (result["_equity_curve"]["Equity"].iloc[exit_bar:] == 0).all()
+
+
+def test_stop_loss_before_take_profit():
+    # The trade opened at the third bar reaches both its stop loss and take profit
+    data = pd.DataFrame(
+        {
+            "Open": [100.0, 100.0, 100.0],
+            "High": [100.0, 100.0, 120.0],
+            "Low": [100.0, 100.0, 80.0],
+            "Close": [100.0, 100.0, 100.0],
+        },
+        index=pd.date_range("2020-01-01", periods=3),
+    )
+    signals = (
+        np.array([TradeDirection.NONE, TradeDirection.BUY, TradeDirection.NONE]),
+        np.array([np.nan, 110.0, np.nan]),
+        np.array([np.nan, 90.0, np.nan]),
+    )
+    result = BacktestEngine(data, commission=0.0).run(signals)
+    trade = result["_trades"].iloc[0]
+    assert trade["EntryBar"] == 2
+    assert trade["ExitBar"] == 2
+    assert trade["ExitPrice"] == 90.0
+
+
+def test_invalid_engine(config):
+    with pytest.raises(ValueError):
+        Backtester(SimpleMACD(config, None), engine="wrong")
@@ -0,0 +1,146 @@
+import copy
+import os
+import time
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from common.SyntheticData import make_ohlcv
+
+from tradingbot.components import (
+    BacktestEngine,
+    Backtester,
+    BacktestResultCache,
+    Configuration,
+    backtest_result_cache,
+)
+from tradingbot.strategies import SimpleBollingerBands, SimpleMACD
+
+
+@pytest.fixture
+def config():
+    return Configuration.from_filepath(Path("test/test_data/trading_bot.toml"))
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return BacktestResultCache(tmp_path / "cache")
+
+
+def _make_key(data, strategy, cash=10000, commission=0.002, engine="backtesting"):
+    return BacktestResultCache.make_key(
+        data, strategy, {"window": 20}, cash, commission, engine
+    )
+
+
+def test_key(config):
+    data = make_ohlcv(300)
+    strategy = SimpleMACD(config, None)
+    key = _make_key(data, strategy)
+    assert key == _make_key(data.copy(), SimpleMACD(config, None))
+
+    changed = data.copy()
+    changed.iloc[150, changed.columns.get_loc("Close")] += 0.01
+    assert _make_key(changed, strategy) != key
+    assert _make_key(data.tz_localize("UTC"), strategy) != key
+    assert _make_key(data, SimpleBollingerBands(config, None)) != key
+    assert _make_key(data, strategy, cash=5000) != key
+    assert _make_key(data, strategy, commission=0.0) != key
+    assert _make_key(data, strategy, engine="native") != key
+    assert (
+        BacktestResultCache.make_key(data, strategy, {"window": 30}, 10000, 0.002, "")
+        != key
+    )
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "tradingbot.components.backtester",
+        "tradingbot.components.backtest_engine",
+        "tradingbot.strategies.base",
+        "tradingbot.strategies.simple_macd",
+    ],
+)
+def test_key_code(config, module, monkeypatch):
+    data = make_ohlcv(300)
+    strategy = SimpleMACD(config, None)
+    key = _make_key(data, strategy)
+    # Editing the backtest engines or the strategy modules invalidates the key
+    get_source = backtest_result_cache._get_module_source
+    monkeypatch.setattr(
+        backtest_result_cache,
+        "_get_module_source",
+        lambda name: get_source(name) + ("# edit" if name == module else ""),
+    )
+    assert _make_key(data, strategy) != key
+
+
+def test_store_and_load(cache, config):
+    data = make_ohlcv(300)
+    result = Backtester(SimpleMACD(config, None)).run(data)
+    assert cache.load("key") is None
+    cache.store("key", result)
+
+    cached = cache.load("key")
+    assert cached["_strategy"] is None
+    assert cached["Return [%]"] == result["Return [%]"]
+    pd.testing.assert_frame_equal(cached["_trades"], result["_trades"])
+    pd.testing.assert_frame_equal(cached["_equity_curve"], result["_equity_curve"])
+    # The stored result is not modified
+    assert result["_strategy"] is not None
+
+
+def test_corrupted_entry(cache):
+    cache.cache_dir.mkdir(parents=True)
+    (cache.cache_dir / f"key{cache.SUFFIX}").write_bytes(b"corrupted")
+    assert cache.load("key") is None
+
+
+def test_eviction(tmp_path):
+    result = BacktestEngine(make_ohlcv(100)).run(([None] * 100, [0] * 100, [0] * 100))
+    cache = BacktestResultCache(tmp_path, max_age=3600)
+    cache.store("old", result)
+    size = (tmp_path / f"old{cache.SUFFIX}").stat().st_size
+    # The cache keeps the most recently used entries up to max_size
+    cache.max_size = 2 * size + size // 2
+    now = time.time()
+    cache.store("new", result)
+    os.utime(tmp_path / f"old{cache.SUFFIX}", (now - 10, now - 10))
+    os.utime(tmp_path / f"new{cache.SUFFIX}", (now - 5, now - 5))
+    assert cache.load("old") is not None
+    cache.store("newest", result)
+    assert cache.load("new") is None
+    assert cache.load("old") is not None
+    assert cache.load("newest") is not None
+
+    # Entries unused for longer than max_age are removed
+    os.utime(tmp_path / f"old{cache.SUFFIX}", (now - 7200, now - 7200))
+    assert cache.load("old") is None
+    assert not (tmp_path / f"old{cache.SUFFIX}").exists()
+
+    with pytest.raises(ValueError):
+        BacktestResultCache(tmp_path, max_age=0)
+
+
+@pytest.mark.parametrize("engine", ["backtesting", "native"])
+def test_backtester_uses_cache(cache, config, engine, monkeypatch):
+    data = make_ohlcv(300)
+    backtester = Backtester(SimpleMACD(config, None), engine=engine, result_cache=cache)
+    expected = backtester.run(data)
+
+    def find_trade_signals(*args):
+        raise AssertionError("Backtest run again")
+
+    monkeypatch.setattr(SimpleMACD, "find_trade_signals", find_trade_signals)
+    result = backtester.run(data)
+    assert backtester.backtest is None
+    assert result["Return [%]"] == expected["Return [%]"]
+    assert len(result["_trades"]) == len(expected["_trades"])
+
+    # A different configuration of the strategy is backtested again
+    raw = copy.deepcopy(dict(config.get_raw_config()))
+    raw["strategies"]["simple_macd"]["max_spread_perc"] += 1
+    strategy = SimpleMACD(Configuration(raw), None)
+    with pytest.raises(AssertionError):
+        Backtester(strategy, engine=engine, result_cache=cache).run(data)
@@ -0,0 +1,269 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from common.SyntheticData import make_ohlcv, write_csv
+
+from tradingbot.components import Backtester, Configuration, TradeDirection
+from tradingbot.components.backtester import TradingBotStrategy
+from tradingbot.strategies import SimpleMACD, StrategyFactory, VolumeProfile
+
+
+class RecordingStrategy:
+    """
+    Minimal strategy that records the history received at each bar
+    """
+
+    def __init__(self, required_lookback=None):
+        self.required_lookback = required_lookback
+        self.lengths = []
+        self.closes = []
+        self.frames = []
+
+    def find_trade_signal(self, market, datapoints):
+        df = datapoints.dataframe
+        self.lengths.append(len(df))
+        self.closes.append((market.bid, df["close"].iloc[-1]))
+        self.frames.append(df)
+        return TradeDirection.NONE, None, None
+
+    def find_trade_signals(self, history):
+        return None
+
+
+class PerBarStrategy:
+    """
+    Wrap a strategy hiding its vectorised find_trade_signals()
+    """
+
+    def __init__(self, strategy):
+        self.strategy = strategy
+        self.required_lookback = strategy.required_lookback
+
+    def find_trade_signal(self, market, datapoints):
+        return self.strategy.find_trade_signal(market, datapoints)
+
+    def find_trade_signals(self, history):
+        return None
+
+
+@pytest.fixture
+def config():
+    return Configuration.from_filepath(Path("test/test_data/trading_bot.toml"))
+
+
+@pytest.fixture
+def sample_csv(tmp_path):
+    return write_csv(make_ohlcv(300), tmp_path / "data.csv")
+
+
+def test_history_grows_one_bar_at_a_time(sample_csv):
+    strategy = RecordingStrategy()
+    bt = Backtester(strategy)
+    bt.start(csv_path=sample_csv, commission=0.0)
+
+    # backtesting.py starts calling next() from the second bar
+    assert strategy.lengths == list(range(2, 301))
+    for bid, last_close in strategy.closes:
+        assert bid == last_close
+    # Every view shares the same preallocated buffer
+    first = strategy.frames[0].to_numpy()
+    last = strategy.frames[-1].to_numpy()
+    assert np.shares_memory(first, last)
+
+
+def test_history_window(sample_csv):
+    strategy = RecordingStrategy(required_lookback=50)
+    bt = Backtester(strategy)
+    bt.start(csv_path=sample_csv, commission=0.0)
+
+    assert strategy.lengths == list(range(2, 51)) + [50] * 250
+    for bid, last_close in strategy.closes:
+        assert bid == last_close
+    # Consecutive windows are views of the same buffer
+    assert np.shares_memory(
+        strategy.frames[-2].to_numpy(), strategy.frames[-1].to_numpy()
+    )
+
+
+@pytest.mark.parametrize("strategy_class", [SimpleMACD, VolumeProfile])
+def test_vectorised_signals_match_per_bar_signals(config, sample_csv, strategy_class):
+    strategy = strategy_class(config, None)
+    vectorised = Backtester(strategy)
+    vectorised.start(csv_path=sample_csv, commission=0.0)
+    per_bar = Backtester(PerBarStrategy(strategy))
+    per_bar.start(csv_path=sample_csv, commission=0.0)
+
+    assert vectorised.result["# Trades"] > 0
+    assert vectorised.result["# Trades"] == per_bar.result["# Trades"]
+    assert vectorised.result["Equity Final [$]"] == per_bar.result["Equity Final [$]"]
+
+
+def test_concurrent_backtests(config, sample_csv):
+    data = Backtester(None).load_data_from_csv(sample_csv)
+    strategies = [SimpleMACD(config, None), VolumeProfile(config, None)] * 4
+    expected = [
+        Backtester(PerBarStrategy(s)).run(data, commission=0.0)["Return [%]"]
+        for s in strategies
+    ]
+    original_init = TradingBotStrategy.init
+
+    def run(strategy):
+        result = Backtester(PerBarStrategy(strategy)).run(data, commission=0.0)
+        # The adapter class is never modified
+        assert TradingBotStrategy.init is original_init
+        return result["Return [%]"]
+
+    with ThreadPoolExecutor(max_workers=len(strategies)) as pool:
+        assert list(pool.map(run, strategies)) == expected
+
+
+def test_parse_param_grid():
+    grid = Backtester.parse_param_grid(
+        [
+            "price_bins=20,30,40",
+            "lookback_periods=30:70:10",
+            "base_atr_multiplier=1:2:0.5",
+        ]
+    )
+    assert grid == {
+        "price_bins": [20, 30, 40],
+        "lookback_periods": [30, 40, 50, 60, 70],
+        "base_atr_multiplier": [1.0, 1.5, 2.0],
+    }
+    for wrong in ["price_bins", "price_bins=", "=1,2", "lookback_periods=30:70"]:
+        with pytest.raises(ValueError):
+            Backtester.parse_param_grid([wrong])
+
+
+def test_optimize(config, sample_csv):
+    strategy = VolumeProfile(config, None)
+    grid = {"price_bins": [20, 30], "imbalance_threshold": [1.0, 1.5]}
+    table = Backtester(strategy).optimize(
+        sample_csv, grid, commission=0.0, rank_by="Return [%]", max_workers=2
+    )
+
+    assert len(table) == 4
+    assert {(r.price_bins, r.imbalance_threshold) for r in table.itertuples()} == {
+        (20, 1.0),
+        (20, 1.5),
+        (30, 1.0),
+        (30, 1.5),
+    }
+    returns = table["Return [%]"].tolist()
+    assert returns == sorted(returns, reverse=True)
+
+    # The best row matches a backtest run with the same parameters
+    best = table.iloc[0]
+    config.get_raw_config()["strategies"]["volume_profile"] = {
+        "price_bins": int(best["price_bins"]),
+        "imbalance_threshold": best["imbalance_threshold"],
+    }
+    backtester = Backtester(VolumeProfile(config, None))
+    backtester.start(csv_path=sample_csv, commission=0.0)
+    assert backtester.result["Return [%]"] == best["Return [%]"]
+
+
+def test_optimize_native_engine(config, sample_csv):
+    grid = {"price_bins": [20, 30], "imbalance_threshold": [1.0, 1.5]}
+    expected = Backtester(VolumeProfile(config, None)).optimize(
+        sample_csv, grid, rank_by="Return [%]", max_workers=2
+    )
+    table = Backtester(VolumeProfile(config, None), engine="native").optimize(
+        sample_csv, grid, rank_by="Return [%]", max_workers=2
+    )
+    assert table.equals(expected)
+
+
+def test_optimize_unknown_parameter(config, sample_csv):
+    with pytest.raises(ValueError):
+        Backtester(VolumeProfile(config, None)).optimize(sample_csv, {"wrong": [1, 2]})
+
+
+def _history(data):
+    return pd.DataFrame(
+        {
+            "close": data["Close"].to_numpy(),
+            "high": data["High"].to_numpy(),
+            "low": data["Low"].to_numpy(),
+            "volume": data["Volume"].to_numpy(),
+        }
+    )
+
+
+def test_run_with_precomputed_signals(config, sample_csv):
+    strategy = SimpleMACD(config, None)
+    backtester = Backtester(strategy)
+    data = backtester.load_data_from_csv(sample_csv)
+    expected = backtester.run(data, commission=0.0)
+
+    signals = strategy.find_trade_signals(_history(data))
+    result = Backtester(RecordingStrategy()).run(data, commission=0.0, signals=signals)
+    assert result["# Trades"] == expected["# Trades"]
+    assert result["Return [%]"] == expected["Return [%]"]
+
+
+def test_walk_forward_windows():
+    assert Backtester.walk_forward_windows(100, 40, 20) == [
+        (0, 40, 60),
+        (20, 60, 80),
+        (40, 80, 100),
+    ]
+    assert Backtester.walk_forward_windows(99, 40, 20, anchored=True) == [
+        (0, 40, 60),
+        (0, 60, 80),
+    ]
+    with pytest.raises(ValueError):
+        Backtester.walk_forward_windows(50, 40, 20)
+
+
+def test_walk_forward(config, sample_csv):
+    strategy = VolumeProfile(config, None)
+    grid = {"price_bins": [20, 30], "imbalance_threshold": [1.0, 1.5]}
+    backtester = Backtester(strategy)
+    table = backtester.walk_forward(
+        sample_csv, grid, 120, 60, commission=0.0, rank_by="Return [%]", max_workers=3
+    )
+    data = backtester.load_data_from_csv(sample_csv)
+
+    assert list(table["Window"]) == [0, 1, 2]
+    assert list(table["In-Sample Start"]) == list(data.index[[0, 60, 120]])
+    assert list(table["Start"]) == list(data.index[[120, 180, 240]])
+    assert list(table["End"]) == list(data.index[[179, 239, 299]])
+
+    # Each window matches backtests of the slices of the whole history signals
+    factory = StrategyFactory(config, None)
+    for _, row in table.iterrows():
+        start = 60 * row["Window"]
+        returns = {}
+        for bins in grid["price_bins"]:
+            for threshold in grid["imbalance_threshold"]:
+                strategy = factory.make_strategy_with_params(
+                    "volume_profile",
+                    {"price_bins": bins, "imbalance_threshold": threshold},
+                )
+                signals = strategy.find_trade_signals(_history(data))
+                window = slice(start, start + 120)
+                result = Backtester(strategy).run(
+                    data.iloc[window],
+                    commission=0.0,
+                    signals=tuple(s[window] for s in signals),
+                )
+                returns[(bins, threshold)] = result["Return [%]"]
+        best = (row["price_bins"], row["imbalance_threshold"])
+        assert returns[best] == max(returns.values())
+        assert row["In-Sample Return [%]"] == returns[best]
+
+        strategy = factory.make_strategy_with_params(
+            "volume_profile", {"price_bins": best[0], "imbalance_threshold": best[1]}
+        )
+        signals = strategy.find_trade_signals(_history(data))
+        window = slice(start + 120, start + 180)
+        result = Backtester(strategy).run(
+            data.iloc[window],
+            commission=0.0,
+            signals=tuple(s[window] for s in signals),
+        )
+        assert row["Return [%]"] == result["Return [%]"]
@@ -0,0 +1,94 @@
+from datetime import datetime
+
+import pytest
+from common.VirtualClock import VirtualClock
+
+from tradingbot.components import BarScheduler, Interval
+
+
+@pytest.fixture
+def clock():
+    return VirtualClock(datetime(2024, 5, 15, 13, 47))
+
+
+def test_bar_close_order(clock):
+    scheduler = BarScheduler(clock, delay=5)
+    scheduler.add("DAY", Interval.DAY)
+    scheduler.add("HOUR", Interval.HOUR)
+    scheduler.add("MINUTES", Interval.MINUTE_15)
+    # The markets are due just after their bars close
+    assert scheduler.wait_for_due() == ["HOUR", "MINUTES"]
+    assert clock.now() == datetime(2024, 5, 15, 14, 0, 5)
+    assert scheduler.wait_for_due() == ["MINUTES"]
+    assert clock.now() == datetime(2024, 5, 15, 14, 15, 5)
+    # The waits don't drift with the processing time
+    clock.time = datetime(2024, 5, 15, 14, 20)
+    assert scheduler.wait_for_due() == ["MINUTES"]
+    assert clock.now() == datetime(2024, 5, 15, 14, 30, 5)
+    assert scheduler.get_due_time("DAY") == datetime(2024, 5, 16, 0, 0, 5)
+    # Missed bars are skipped
+    clock.time = datetime(2024, 5, 16, 9, 2)
+    assert sorted(scheduler.pop_due()) == ["DAY", "HOUR", "MINUTES"]
+    assert scheduler.get_due_time("DAY") == datetime(2024, 5, 17, 0, 0, 5)
+    assert scheduler.get_due_time("HOUR") == datetime(2024, 5, 16, 10, 0, 5)
+    assert scheduler.pop_due() == []
+
+
+def test_spread(clock):
+    scheduler = BarScheduler(clock, delay=10, spread=60)
+    scheduler.add_all(["A", "B", "C", "A"], Interval.HOUR)
+    assert scheduler.get_epics() == ["A", "B", "C"]
+    due = []
+    for _ in range(6):
+        due += scheduler.wait_for_due()
+        due.append(clock.now())
+    # Each market is due at the same offset of every bar close
+    assert due == [
+        "A",
+        datetime(2024, 5, 15, 14, 0, 10),
+        "B",
+        datetime(2024, 5, 15, 14, 0, 30),
+        "C",
+        datetime(2024, 5, 15, 14, 0, 50),
+        "A",
+        datetime(2024, 5, 15, 15, 0, 10),
+        "B",
+        datetime(2024, 5, 15, 15, 0, 30),
+        "C",
+        datetime(2024, 5, 15, 15, 0, 50),
+    ]
+    with pytest.raises(ValueError):
+        BarScheduler(clock, spread=-1)
+
+
+def test_remove_and_postpone(clock):
+    scheduler = BarScheduler(clock)
+    scheduler.add_all(["A", "B", "C"], Interval.DAY)
+    scheduler.remove("B")
+    scheduler.remove("OTHER")
+    opening = datetime(2024, 5, 16, 8)
+    scheduler.postpone(["C"], opening)
+    assert scheduler.wait_for_due() == ["A"]
+    assert scheduler.wait_for_due() == ["C"]
+    assert clock.now() == opening
+    # Back at the close of the bars after the market opening
+    assert scheduler.get_due_time("C") == datetime(2024, 5, 17)
+    scheduler.remove("A")
+    scheduler.remove("C")
+    assert scheduler.get_next_time() is None
+    assert scheduler.wait_for_due() == []
+
+
+def test_wait_until(clock):
+    scheduler = BarScheduler(clock)
+    until = datetime(2024, 5, 15, 14, 47)
+    # Nothing scheduled, it still waits until the given time
+    assert scheduler.wait_for_due(until) == []
+    assert clock.now() == until
+    scheduler.add_all(["A", "B"], Interval.DAY)
+    assert scheduler.wait_for_due(datetime(2024, 5, 15, 15, 47)) == []
+    assert clock.now() == datetime(2024, 5, 15, 15, 47)
+    assert scheduler.wait_for_due(datetime(2024, 5, 16, 1)) == ["A", "B"]
+    assert clock.now() == datetime(2024, 5, 16)
+    scheduler.remove_all(["A", "B", "OTHER"])
+    assert scheduler.get_epics() == []
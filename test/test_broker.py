@@ -7,6 +7,7 @@ from common.MockRequests import (
     ig_request_confirm_trade,
     ig_request_login,
     ig_request_market_info,
+    ig_request_market_infos,
     ig_request_navigate_market,
     ig_request_open_positions,
     ig_request_prices,
@@ -51,6 +52,7 @@ def mock_http_calls(requests_mock):
     ig_request_account_details(requests_mock)
     ig_request_open_positions(requests_mock)
     ig_request_market_info(requests_mock)
+    ig_request_market_infos(requests_mock)
     ig_request_search_market(requests_mock)
     ig_request_prices(requests_mock)
     ig_request_trade(requests_mock)
@@ -1,3 +1,9 @@
+import asyncio
+import gc
+import threading
+import warnings
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
 import pytest
 import toml
 from common.MockRequests import (
@@ -5,6 +11,7 @@ from common.MockRequests import (
     ig_request_confirm_trade,
     ig_request_login,
     ig_request_market_info,
+    ig_request_market_infos,
     ig_request_navigate_market,
     ig_request_open_positions,
     ig_request_prices,
@@ -13,6 +20,7 @@ from common.MockRequests import (
     ig_request_trade,
     ig_request_watchlist,
 )
+from common.MockServer import IGServer
 
 from tradingbot.components import Configuration, Interval, TradeDirection
 from tradingbot.components.broker import IGInterface, InterfaceNames
@@ -116,8 +124,37 @@ def test_get_market_info_fail(ig, requests_mock):
         _ = ig.get_market_info("mock")
 
 
+def test_get_market_infos(ig, requests_mock, monkeypatch):
+    ig_request_market_infos(requests_mock)
+    monkeypatch.setattr(ig, "MARKETS_BATCH_SIZE", 2)
+    epics = [f"EPIC.{i}" for i in range(5)]
+    markets = ig.get_market_infos(epics)
+    assert [m.epic for m in markets] == epics
+    # The markets are requested in batches with a single call each
+    requests = [r for r in requests_mock.request_history if "epics=" in r.url]
+    assert len(requests) == 3
+    assert requests_mock.last_request.headers["Version"] == "2"
+    assert "epics=EPIC.4" in requests_mock.last_request.url
+
+
+def test_get_market_infos_fail(ig, requests_mock):
+    ig_request_market_infos(requests_mock, fail=True)
+    with pytest.raises(RuntimeError):
+        _ = ig.get_market_infos(["mock"])
+
+
+def test_get_market_infos_missing(ig, requests_mock, monkeypatch):
+    # A market missing from a batch doesn't drop the others
+    ig_request_market_infos(requests_mock, missing=["EPIC.1"])
+    monkeypatch.setattr(ig, "MARKETS_BATCH_SIZE", 2)
+    epics = [f"EPIC.{i}" for i in range(5)]
+    markets = ig.get_market_infos(epics)
+    assert [m.epic for m in markets] == ["EPIC.0", "EPIC.2", "EPIC.3", "EPIC.4"]
+    assert ig.get_market_infos(["EPIC.1"]) == []
+
+
 def test_search_market(ig, requests_mock):
-    ig_request_market_info(requests_mock)
+    ig_request_market_infos(requests_mock)
     ig_request_search_market(requests_mock)
     markets = ig.search_market("mock")
 
@@ -294,7 +331,7 @@ def test_navigate_market_node_markets(ig, requests_mock):
 
 
 def test_get_watchlist_markets(ig, requests_mock):
-    ig_request_market_info(requests_mock)
+    ig_request_market_infos(requests_mock)
     ig_request_watchlist(requests_mock, data="mock_watchlist_list.json")
     ig_request_watchlist(requests_mock, args="12345678", data="mock_watchlist.json")
 
@@ -302,6 +339,7 @@ def test_get_watchlist_markets(ig, requests_mock):
     assert isinstance(data, list)
     assert len(data) == 3
     assert isinstance(data[0], Market)
+    assert data[1].epic == "IX.D.FTSE.DAILY.IP"
 
     data = ig.get_markets_from_watchlist("wrong_name")
     assert len(data) == 0
@@ -311,3 +349,96 @@ def test_get_watchlist_markets(ig, requests_mock):
     )
     data = ig.get_markets_from_watchlist("wrong_name")
     assert len(data) == 0
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """Reply with a server error to the first request of each method"""
+
+    requests: list = []
+
+    def _reply(self):
+        self.requests.append(self.command)
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        status = 503 if self.requests.count(self.command) == 1 else 200
+        self.send_response(status)
+        body = b'{"reason": "SUCCESS", "dealReference": "123"}'
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _reply
+    do_POST = _reply
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def flaky_server(ig, requests_mock, monkeypatch):
+    FlakyHandler.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    requests_mock.real_http = True
+    monkeypatch.setattr(ig, "api_base_url", f"http://127.0.0.1:{server.server_port}")
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_session_retries(ig, flaky_server):
+    # Server errors of idempotent requests are retried on the same session
+    assert ig.confirm_order("123")
+    assert FlakyHandler.requests == ["GET", "GET"]
+    # Orders are not sent again
+    assert ig.trade("mock", TradeDirection.BUY, 0, 0) is False
+    assert FlakyHandler.requests == ["GET", "GET", "POST"]
+
+
+@pytest.fixture
+def ig_server(ig, requests_mock, monkeypatch):
+    with IGServer(delay=0.05) as server:
+        requests_mock.real_http = True
+        monkeypatch.setattr(ig, "api_base_url", server.url)
+        yield server
+
+
+def test_async_calls(ig, ig_server):
+    async def main():
+        try:
+            positions = await ig.get_open_positions_async()
+            markets = await asyncio.gather(
+                *(ig.get_market_info_async(f"EPIC.{i}") for i in range(5))
+            )
+            markets += await ig.get_market_infos_async(["EPIC.5", "EPIC.6"])
+            history = await ig.get_prices_async(markets[0], Interval.DAY, 10)
+            traded = await ig.trade_async("mock", TradeDirection.BUY, 0, 0)
+            return positions, markets, history, traded
+        finally:
+            await ig.close_async()
+
+    positions, markets, history, traded = asyncio.run(main())
+    assert len(positions) > 0
+    assert all(isinstance(p, Position) for p in positions)
+    assert all(isinstance(m, Market) for m in markets)
+    assert markets[-1].epic == "EPIC.6"
+    assert isinstance(history, MarketHistory)
+    assert traded
+    # The market snapshots are fetched at the same time
+    assert ig_server.max_active > 1
+
+
+def test_async_session_closed_with_loop(ig, ig_server):
+    # Without close_async(), the session of each event loop is closed with it
+    sessions = []
+
+    async def main():
+        await ig.get_market_info_async("EPIC.0")
+        sessions.append(ig._async_session)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", ResourceWarning)
+        asyncio.run(main())
+        asyncio.run(main())
+        gc.collect()
+    assert sessions[0] is not sessions[1]
+    assert all(session.closed for session in sessions)
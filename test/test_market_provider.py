@@ -4,12 +4,14 @@ import pytest
 from common.MockRequests import (
     ig_request_login,
     ig_request_market_info,
+    ig_request_market_infos,
+    ig_request_navigate_market,
     ig_request_search_market,
     ig_request_set_account,
     ig_request_watchlist,
 )
 
-from tradingbot.components import Configuration, MarketProvider
+from tradingbot.components import Configuration, MarketProvider, market_provider
 from tradingbot.components.broker import Broker, BrokerFactory
 
 
@@ -26,6 +28,7 @@ def broker(requests_mock, config):
     ig_request_login(requests_mock)
     ig_request_set_account(requests_mock)
     ig_request_market_info(requests_mock)
+    ig_request_market_infos(requests_mock)
     ig_request_search_market(requests_mock)
     ig_request_watchlist(requests_mock, data="mock_watchlist_list.json")
     ig_request_watchlist(requests_mock, args="12345678", data="mock_watchlist.json")
@@ -69,6 +72,26 @@ def test_market_provider_epics_list(config, broker):
         raise AssertionError("Expected StopIteration to be raised")
 
 
+def test_market_provider_epics_list_missing(
+    config, broker, requests_mock, tmp_path, monkeypatch
+):
+    # The markets the broker can't find are skipped, even a whole batch
+    epics = [f"EPIC.{i}" for i in range(5)]
+    epics_file = tmp_path / "epics.txt"
+    epics_file.write_text("".join(f"{e}\n" for e in epics))
+    config.config.market_source.active = "list"
+    config.config.market_source.epic_id_list.filepath = str(epics_file)
+    ig_request_market_infos(requests_mock, missing=["EPIC.0", "EPIC.1", "EPIC.3"])
+    monkeypatch.setattr(market_provider, "MARKETS_BATCH_SIZE", 2)
+
+    mp = MarketProvider(config, broker)
+    assert [mp.next().epic, mp.next().epic] == ["EPIC.2", "EPIC.4"]
+    with pytest.raises(StopIteration):
+        mp.next()
+    markets = mp.get_markets_from_epics(epics)
+    assert [m.epic for m in markets] == ["EPIC.2", "EPIC.4"]
+
+
 def test_market_provider_watchlist(config, broker):
     """
     Test the MarketProvider configured to fetch markets from an IG watchlist
@@ -81,30 +104,57 @@ def test_market_provider_watchlist(config, broker):
     # Create class to test
     mp = MarketProvider(config, broker)
 
-    # The test data for market_info return always the same epic id, but the test
-    # data for the watchlist contains 3 markets
+    # The test data for the watchlist contains 3 markets
     # Run the test several times resetting the market provider
     for _ in range(4):
-        assert mp.next().epic == "KA.D.GSK.DAILY.IP"
-        assert mp.next().epic == "KA.D.GSK.DAILY.IP"
-        assert mp.next().epic == "KA.D.GSK.DAILY.IP"
+        assert mp.next().epic == "CS.D.BITCOIN.TODAY.IP"
+        assert mp.next().epic == "IX.D.FTSE.DAILY.IP"
+        assert mp.next().epic == "IX.D.DAX.DAILY.IP"
 
         with pytest.raises(StopIteration):
             mp.next()
         mp.reset()
 
 
-def test_market_provider_api(config, broker):
+def test_market_provider_api(config, broker, requests_mock, tmp_path):
     """
     Test the MarketProvider configured to fetch markets from IG nodes
     """
     # Define configuration for this test
     config.config.market_source.active = "api"
+    config.config.market_source.api.tree_filepath = str(tmp_path / "tree.json")
+    ig_request_navigate_market(requests_mock)
+    ig_request_navigate_market(
+        requests_mock, args="668394", data="mock_navigate_markets_daily.json"
+    )
+    ig_request_navigate_market(
+        requests_mock, args="77976799", data="mock_navigate_markets_markets.json"
+    )
+    ig_request_navigate_market(
+        requests_mock, args="89291253", data="mock_navigate_markets_markets.json"
+    )
 
-    # TODO
     # Create class to test
-    # mp = MarketProvider(config, broker)
-    assert True
+    mp = MarketProvider(config, broker)
+
+    # The tree is explored once and only the DFB, TODAY and DAILY markets
+    # are returned
+    for _ in range(4):
+        assert mp.next().epic == "IX.D.FTSE.DAILY.IP"
+        assert mp.next().epic == "CS.D.BITCOIN.TODAY.IP"
+        with pytest.raises(StopIteration):
+            mp.next()
+        mp.reset()
+    navigations = [
+        r for r in requests_mock.request_history if "marketnavigation" in r.url
+    ]
+    assert len(navigations) == 4
+    # The saved tree is used by the next market providers
+    assert MarketProvider(config, broker).next().epic == "IX.D.FTSE.DAILY.IP"
+    navigations = [
+        r for r in requests_mock.request_history if "marketnavigation" in r.url
+    ]
+    assert len(navigations) == 4
 
 
 def test_market_provider_market_from_epic(config, broker):
@@ -0,0 +1,129 @@
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from common.MockStream import StreamPublisher, candle, price
+
+from tradingbot.components import Configuration, Interval, MarketStream
+from tradingbot.interfaces import Market, MarketHistory
+
+
+@pytest.fixture
+def publisher():
+    config = Configuration.from_filepath(Path("test/test_data/trading_bot.toml"))
+    return StreamPublisher(config)
+
+
+def _make_market(epic):
+    market = Market()
+    market.epic = market.id = epic
+    return market
+
+
+def _stream(publisher, interval, epics=("A", "B")):
+    market_stream = MarketStream(publisher, interval)
+    market_stream.subscribe([_make_market(epic) for epic in epics])
+    return market_stream
+
+
+def test_subscribe(publisher):
+    market_stream = _stream(publisher, Interval.MINUTE_15)
+    assert publisher.items == {
+        "MARKET:A",
+        "CHART:A:5MINUTE",
+        "MARKET:B",
+        "CHART:B:5MINUTE",
+    }
+    assert market_stream.get_epics() == ["A", "B"]
+    market_stream.close()
+    assert publisher.items == set()
+    assert market_stream.get_epics() == []
+
+
+def test_prices(publisher):
+    market_stream = _stream(publisher, Interval.HOUR)
+    publisher.publish([("MARKET:A", price(100.5, 101.5, "10:01:02"))]).join()
+    market = market_stream.get_market("A")
+    assert (market.bid, market.offer) == (100.5, 101.5)
+    assert market_stream.get_state("A").update_time == "10:01:02"
+    # Fields without a value are unchanged
+    publisher.publish([("MARKET:A", {"BID": None, "OFFER": "102"})]).join()
+    market = market_stream.get_market("A")
+    assert (market.bid, market.offer) == (100.5, 102)
+    assert market_stream.get_market("B").bid == 0.0
+
+
+def test_bar_close(publisher):
+    market_stream = _stream(publisher, Interval.DAY)
+    updates = [
+        ("CHART:A:HOUR", candle(datetime(2024, 5, 15, 22, 10), 10, complete=False)),
+        ("CHART:A:HOUR", candle(datetime(2024, 5, 15, 22, 59), 11)),
+        ("CHART:A:HOUR", candle(datetime(2024, 5, 15, 23, 30), 12, complete=False)),
+        ("CHART:B:HOUR", candle(datetime(2024, 5, 15, 23, 59), 9)),
+    ]
+    publisher.publish(updates).join()
+    state = market_stream.get_state("A")
+    assert state.bar_start == datetime(2024, 5, 15)
+    assert (state.open, state.high, state.low, state.close) == (9, 13, 8, 12)
+    assert state.volume == 20
+    # Only the bar of B is over
+    assert market_stream.wait_for_bar_closes(1) == ["B"]
+    assert market_stream.wait_for_bar_closes(0) == []
+
+    updates = [
+        ("CHART:A:HOUR", candle(datetime(2024, 5, 15, 23, 59), 12)),
+        ("CHART:B:HOUR", candle(datetime(2024, 5, 16, 0, 1), 10, complete=False)),
+    ]
+    publisher.publish(updates).join()
+    assert market_stream.wait_for_bar_closes(1) == ["A"]
+    assert market_stream.get_state("B").bar_start == datetime(2024, 5, 16)
+
+
+def test_late_bar_close(publisher):
+    market_stream = _stream(publisher, Interval.HOUR_4)
+    updates = [
+        ("CHART:A:HOUR", candle(datetime(2024, 5, 15, 13, 59), 10)),
+        # The market doesn't trade at the end of the bar, which is closed by
+        # the first candle of the next one
+        ("CHART:A:HOUR", candle(datetime(2024, 5, 15, 17, 1), 11, complete=False)),
+        ("CHART:A:HOUR", candle(datetime(2024, 5, 15, 17, 2), 11, complete=False)),
+        # Older candles and other scales are ignored
+        ("CHART:A:HOUR", candle(datetime(2024, 5, 15, 15, 59), 11)),
+        ("CHART:B:5MINUTE", candle(datetime(2024, 5, 15, 15, 59), 11)),
+    ]
+    publisher.publish(updates).join()
+    assert market_stream.wait_for_bar_closes(1) == ["A"]
+    assert market_stream.wait_for_bar_closes(0) == []
+
+
+def test_history(publisher):
+    market_stream = MarketStream(publisher, Interval.DAY, max_bars=3)
+    market_stream.subscribe([_make_market("A")])
+    updates = [
+        ("CHART:A:HOUR", candle(datetime(2024, 5, 14, 23, 59), 10)),
+        # The bar of the 15th is closed by the first candle of the 16th
+        ("CHART:A:HOUR", candle(datetime(2024, 5, 15, 12, 59), 11)),
+        ("CHART:A:HOUR", candle(datetime(2024, 5, 16, 0, 59), 12, complete=False)),
+    ]
+    publisher.publish(updates).join()
+    assert not market_stream.is_seeded("A")
+    history = market_stream.get_history("A").dataframe
+    assert list(history["date"]) == ["2024-05-14T00:00:00", "2024-05-15T00:00:00"]
+    assert list(history["close"]) == [10, 11]
+    assert list(history["volume"]) == [10, 10]
+    # The seeded bars the streamed ones replace are ignored
+    seed = MarketHistory(
+        _make_market("A"),
+        ["2024-05-12T00:00:00", "2024-05-13T00:00:00", "2024-05-14T00:00:00"],
+        [5, 6, 7],
+        [1, 2, 3],
+        [3, 4, 5],
+        [1, 1, 1],
+        [2, 3, 4],
+    )
+    market_stream.seed("A", seed)
+    assert market_stream.is_seeded("A")
+    history = market_stream.get_history("A").dataframe
+    assert list(history["close"]) == [4, 10, 11]
+    assert list(history["open"]) == [3, 9, 10]
+    assert history["date"].iloc[0] == "2024-05-13T00:00:00"
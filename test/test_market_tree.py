@@ -0,0 +1,97 @@
+import json
+import threading
+import time
+
+import pytest
+
+from tradingbot.components import MarketTree
+
+# Children nodes and market epics of each node id
+TREE = {
+    "ROOT": (["A", "B", "C"], []),
+    "A": (["A1", "A2"], ["IX.D.FTSE.DAILY.IP", "KC.D.AVLN8875P.DEC.IP"]),
+    "A1": ([], ["CS.D.BITCOIN.TODAY.IP"]),
+    "A2": (["A"], ["IX.D.FTSE.DAILY.IP"]),
+    "B": ([], ["UA.D.AAPL.DFB.IP"]),
+    "C": ([], []),
+}
+
+
+class MockBroker:
+    def __init__(self, fail=()):
+        self.fail = fail
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def navigate_market_node(self, node_id):
+        with self.lock:
+            self.calls.append(node_id)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.05)
+        with self.lock:
+            self.active -= 1
+        if node_id in self.fail:
+            raise RuntimeError("Request failed")
+        nodes, epics = TREE[node_id]
+        return {
+            "nodes": [{"id": n, "name": n} for n in nodes],
+            "markets": [{"epic": e} for e in epics] if epics else None,
+        }
+
+
+def test_fetch(tmp_path):
+    broker = MockBroker()
+    tree = MarketTree(broker, tmp_path / "tree.json", workers=3)
+    # Filtered markets in depth first order, without duplicates
+    assert tree.get_epics("ROOT") == [
+        "IX.D.FTSE.DAILY.IP",
+        "CS.D.BITCOIN.TODAY.IP",
+        "UA.D.AAPL.DFB.IP",
+    ]
+    # Each node is fetched once, the siblings concurrently
+    assert sorted(broker.calls) == sorted(TREE)
+    assert broker.max_active == 3
+    assert tree.get_nodes()["A"] == {
+        "nodes": ["A1", "A2"],
+        "markets": ["IX.D.FTSE.DAILY.IP", "KC.D.AVLN8875P.DEC.IP"],
+    }
+    # The epic list is built once
+    tree.get_epics("ROOT")
+    assert len(broker.calls) == len(TREE)
+    with pytest.raises(ValueError):
+        MarketTree(broker, workers=0)
+
+
+def test_saved_tree(tmp_path):
+    filepath = tmp_path / "tree.json"
+    epics = MarketTree(MockBroker(), filepath).get_epics("ROOT")
+    assert json.loads(filepath.read_text())["root"] == "ROOT"
+    # The saved tree is reused by the next runs until it expires
+    broker = MockBroker()
+    assert MarketTree(broker, filepath).get_epics("ROOT") == epics
+    assert broker.calls == []
+    assert MarketTree(broker, filepath).get_epics("A") == epics[:2]
+    assert broker.calls == ["A", "A1", "A2"]
+    broker = MockBroker()
+    assert MarketTree(broker, filepath, ttl=0).get_epics("ROOT") == epics
+    assert len(broker.calls) == len(TREE)
+    # Unreadable files are fetched again
+    filepath.write_text("{")
+    broker = MockBroker()
+    assert MarketTree(broker, filepath).get_epics("ROOT") == epics
+    assert len(broker.calls) == len(TREE)
+
+
+def test_incomplete_tree(tmp_path):
+    filepath = tmp_path / "tree.json"
+    broker = MockBroker(fail=["B"])
+    tree = MarketTree(broker, filepath)
+    assert tree.get_epics("ROOT") == ["IX.D.FTSE.DAILY.IP", "CS.D.BITCOIN.TODAY.IP"]
+    # The incomplete tree is not saved and fetched again at the next load
+    assert not filepath.exists()
+    broker.fail = []
+    assert tree.get_epics("ROOT")[-1] == "UA.D.AAPL.DFB.IP"
+    assert filepath.exists()
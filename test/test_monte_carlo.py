@@ -0,0 +1,94 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from common.SyntheticData import make_ohlcv
+
+from tradingbot.components import Backtester, Configuration, MonteCarlo
+from tradingbot.strategies import VolumeProfile
+
+
+@pytest.fixture(scope="module")
+def result():
+    config = Configuration.from_filepath(Path("test/test_data/trading_bot.toml"))
+    backtester = Backtester(VolumeProfile(config, None))
+    return backtester.run(make_ohlcv(1000, seed=1))
+
+
+def _naive_paths(trade_returns, indices):
+    """Simulate each path with a loop over its trades"""
+    returns, drawdowns = [], []
+    for path in indices:
+        equity = peak = 1.0
+        drawdown = 0.0
+        for i in path:
+            equity *= 1 + trade_returns[i]
+            peak = max(peak, equity)
+            drawdown = min(drawdown, equity / peak - 1)
+        returns.append((equity - 1) * 100)
+        drawdowns.append(drawdown * 100)
+    return np.array(returns), np.array(drawdowns)
+
+
+def test_trade_returns(result):
+    monte_carlo = MonteCarlo(result)
+    trades = result["_trades"]
+    assert len(monte_carlo.trade_returns) == len(trades) > 10
+    # Replaying the trades in their order gives the equity after the last one
+    equity = result["_equity_curve"]["Equity"]
+    final = equity.iloc[0] * np.prod(1 + monte_carlo.trade_returns)
+    assert final == pytest.approx(equity.iloc[trades["ExitBar"].iloc[-1]])
+
+
+def test_bootstrap(result):
+    monte_carlo = MonteCarlo(result)
+    monte_carlo.run(200, seed=1)
+
+    rng = np.random.default_rng(1)
+    trades = len(monte_carlo.trade_returns)
+    indices = rng.integers(0, trades, (200, trades))
+    returns, drawdowns = _naive_paths(monte_carlo.trade_returns, indices)
+    assert monte_carlo.returns == pytest.approx(returns)
+    assert monte_carlo.max_drawdowns == pytest.approx(drawdowns)
+
+    monte_carlo.run(200, seed=1)
+    assert monte_carlo.returns == pytest.approx(returns)
+
+
+def test_shuffle(result, monkeypatch):
+    monte_carlo = MonteCarlo(result)
+    # Small batches are processed like a single one
+    monkeypatch.setattr("tradingbot.components.monte_carlo._BATCH_ELEMENTS", 100)
+    monte_carlo.run(50, method="shuffle", seed=2)
+
+    # The order of the trades does not change the final return
+    expected = (np.prod(1 + monte_carlo.trade_returns) - 1) * 100
+    assert monte_carlo.returns == pytest.approx(np.full(50, expected))
+    assert (monte_carlo.max_drawdowns <= 0).all()
+    assert len(np.unique(monte_carlo.max_drawdowns)) > 1
+
+
+def test_confidence_bands(result):
+    monte_carlo = MonteCarlo(result)
+    with pytest.raises(RuntimeError):
+        monte_carlo.get_confidence_bands()
+    monte_carlo.run(1000, seed=3)
+    bands = monte_carlo.get_confidence_bands()
+    assert list(bands.index) == ["5%", "25%", "50%", "75%", "95%"]
+    assert bands["Return [%]"].is_monotonic_increasing
+    assert bands["Max. Drawdown [%]"].is_monotonic_increasing
+    assert bands.loc["50%", "Return [%]"] == np.median(monte_carlo.returns)
+
+
+def test_invalid_arguments(result):
+    monte_carlo = MonteCarlo(result)
+    with pytest.raises(ValueError):
+        monte_carlo.run(100, method="wrong")
+    with pytest.raises(ValueError):
+        monte_carlo.run(0)
+
+    no_trades = result.copy()
+    no_trades["_trades"] = pd.DataFrame(columns=result["_trades"].columns)
+    with pytest.raises(ValueError):
+        MonteCarlo(no_trades)
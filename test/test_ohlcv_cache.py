@@ -0,0 +1,67 @@
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+from common.SyntheticData import make_ohlcv, write_csv
+
+from tradingbot.components import Backtester, Configuration, OHLCVCache
+from tradingbot.strategies import SimpleMACD
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return OHLCVCache(tmp_path / "cache")
+
+
+@pytest.fixture
+def sample_csv(tmp_path):
+    return write_csv(make_ohlcv(300), tmp_path / "data.csv")
+
+
+def test_store_and_load(cache, sample_csv):
+    assert cache.load(sample_csv) is None
+    data = Backtester(None).load_data_from_csv(sample_csv)
+    cache.store(sample_csv, data)
+
+    cached = cache.load(sample_csv)
+    assert cached.equals(data)
+    assert cached.index.name == "Date"
+    # Columns are memory mapped from the cache files without copies
+    base = cached["Close"].to_numpy()
+    while base.base is not None and not isinstance(base, np.memmap):
+        base = base.base
+    assert isinstance(base, np.memmap)
+
+
+def test_store_timezone(cache, sample_csv):
+    data = make_ohlcv(10).tz_localize("Europe/London")
+    cache.store(sample_csv, data)
+    assert cache.load(sample_csv).equals(data)
+
+
+def test_modified_file_is_not_loaded(cache, sample_csv):
+    cache.store(sample_csv, make_ohlcv(300))
+    stat = os.stat(sample_csv)
+    os.utime(sample_csv, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+    assert cache.load(sample_csv) is None
+
+    # Older versions of the file are removed from the cache
+    cache.store(sample_csv, make_ohlcv(100))
+    assert len(list(cache.cache_dir.iterdir())) == 1
+    assert len(cache.load(sample_csv)) == 100
+
+
+def test_backtester_uses_cache(cache, sample_csv, monkeypatch):
+    config = Configuration.from_filepath(Path("test/test_data/trading_bot.toml"))
+    backtester = Backtester(SimpleMACD(config, None), cache)
+    expected = Backtester(SimpleMACD(config, None)).start(sample_csv)
+    backtester.start(sample_csv)
+
+    def parse_csv(*args):
+        raise AssertionError("CSV file parsed again")
+
+    monkeypatch.setattr(Backtester, "_parse_csv", parse_csv)
+    result = backtester.start(sample_csv)
+    assert result["Return [%]"] == expected["Return [%]"]
+    assert result["# Trades"] == expected["# Trades"]
@@ -0,0 +1,78 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from common.SyntheticData import make_ohlcv
+
+from tradingbot.components import Backtester, Configuration, OHLCVStore
+from tradingbot.strategies import SimpleMACD
+
+
+@pytest.fixture
+def store(tmp_path):
+    return OHLCVStore(tmp_path / "ohlcv.db")
+
+
+def test_write_and_read(store):
+    data = make_ohlcv(300)
+    store.write("EPIC", "DAY", data)
+    stored = store.read("EPIC", "DAY")
+    assert stored.index.name == "Date"
+    assert str(stored.index.tz) == "UTC"
+    np.testing.assert_array_equal(stored.to_numpy(), data.to_numpy())
+    assert (stored.index == data.index.tz_localize("UTC")).all()
+    # Series are independent
+    assert store.read("EPIC", "HOUR").empty
+    assert store.read("OTHER", "DAY").empty
+    assert store.get_series() == [("EPIC", "DAY", 300)]
+
+
+def test_time_range(store):
+    data = make_ohlcv(300)
+    store.write("EPIC", "DAY", data)
+    start, end = data.index[100], data.index[149]
+    stored = store.read("EPIC", "DAY", start, end)
+    assert len(stored) == 50
+    assert stored.index[0] == start.tz_localize("UTC")
+    # The last bars of the range, in ascending order
+    stored = store.read("EPIC", "DAY", end=end, limit=10)
+    assert list(stored["Close"]) == list(data["Close"].iloc[140:150])
+    # Times of other timezones are converted to UTC
+    start = data.index[290].tz_localize("UTC").tz_convert("America/New_York")
+    assert len(store.read("EPIC", "DAY", start)) == 10
+
+
+def test_replace_and_delete(store):
+    data = make_ohlcv(10)
+    store.write("EPIC", "DAY", data)
+    # The last bar is updated and missing values are stored as NULL
+    update = data.iloc[-2:].copy()
+    update["Close"] += 1
+    update.loc[update.index[-1], "Open"] = np.nan
+    store.write("EPIC", "DAY", update)
+    stored = store.read("EPIC", "DAY")
+    assert len(stored) == 10
+    assert list(stored["Close"].iloc[-2:]) == list(update["Close"])
+    assert np.isnan(stored["Open"].iloc[-1])
+
+    store.delete("EPIC", "DAY")
+    assert store.read("EPIC", "DAY").empty
+
+
+def test_backtest_from_store(store):
+    config = Configuration.from_filepath(Path("test/test_data/trading_bot.toml"))
+    data = make_ohlcv(300)
+    data.iloc[0, data.columns.get_loc("Open")] = np.nan
+    store.write("EPIC", "DAY", data)
+    backtester = Backtester(SimpleMACD(config, None))
+    loaded = backtester.load_data_from_store(
+        store, "EPIC", "DAY", start=pd.Timestamp("2020-02-01")
+    )
+    assert len(loaded) == 300 - 31
+    result = backtester.run(loaded)
+    assert result["# Trades"] >= 0
+    # Incomplete bars are dropped
+    assert len(backtester.load_data_from_store(store, "EPIC", "DAY")) == 299
+    with pytest.raises(ValueError):
+        backtester.load_data_from_store(store, "OTHER", "DAY")
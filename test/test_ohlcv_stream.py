@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+from common.SyntheticData import make_ohlcv, write_csv
+
+from tradingbot.components import Backtester, OHLCVCache, OHLCVStream
+
+AGGREGATIONS = {
+    "Open": "first",
+    "High": "max",
+    "Low": "min",
+    "Close": "last",
+    "Volume": "sum",
+}
+
+
+@pytest.fixture
+def minute_csv(tmp_path):
+    return write_csv(make_ohlcv(3000, freq="min"), tmp_path / "minutes.csv")
+
+
+def test_parse_timeframe():
+    assert OHLCVStream.parse_timeframe("MINUTE_5") == "5min"
+    assert OHLCVStream.parse_timeframe("HOUR") == "1h"
+    assert OHLCVStream.parse_timeframe("15min") == "15min"
+    with pytest.raises(ValueError):
+        OHLCVStream.parse_timeframe("wrong")
+
+
+def test_stream_without_resampling(minute_csv):
+    stream = OHLCVStream(minute_csv, chunksize=100)
+    chunks = list(stream)
+    assert len(chunks) == 30
+    assert all(len(c) == 100 for c in chunks)
+    assert stream.load().equals(Backtester(None).load_data_from_csv(minute_csv))
+
+
+@pytest.mark.parametrize("timeframe", ["MINUTE_5", "7min", "HOUR", "DAY"])
+def test_stream_resampling(minute_csv, timeframe):
+    data = Backtester(None).load_data_from_csv(minute_csv)
+    freq = OHLCVStream.parse_timeframe(timeframe)
+    origin = "start_day" if freq == "1D" else "epoch"
+    expected = data.resample(freq, origin=origin).agg(AGGREGATIONS).dropna()
+
+    # Bars spanning two chunks are merged
+    stream = OHLCVStream(minute_csv, timeframe, chunksize=97)
+    assert stream.load().equals(expected)
+
+
+def test_stream_ticks(tmp_path):
+    index = pd.date_range("2020-01-01", periods=600, freq="s")
+    bid = 100 + np.cumsum(np.random.default_rng(0).normal(0, 0.1, len(index)))
+    ticks = pd.DataFrame(
+        {
+            "Ask": bid + 0.2,
+            "Bid": bid,
+            "AskVolume": np.ones(len(index)),
+            "BidVolume": np.full(len(index), 2.0),
+        },
+        index=index,
+    )
+    csv_path = write_csv(ticks, tmp_path / "ticks.csv")
+
+    with pytest.raises(ValueError):
+        OHLCVStream(csv_path).load()
+    bars = OHLCVStream(csv_path, "MINUTE_1", chunksize=45).load()
+    assert len(bars) == 10
+    mid = (bid + 0.1)[:60]
+    assert bars["Open"].iloc[0] == pytest.approx(mid[0])
+    assert bars["High"].iloc[0] == pytest.approx(mid.max())
+    assert bars["Low"].iloc[0] == pytest.approx(mid.min())
+    assert bars["Close"].iloc[0] == pytest.approx(mid[-1])
+    assert (bars["Volume"] == 180).all()
+
+
+def test_stream_unsorted_file(tmp_path):
+    data = make_ohlcv(100)
+    csv_path = write_csv(
+        pd.concat([data.iloc[50:], data.iloc[:50]]), tmp_path / "a.csv"
+    )
+    with pytest.raises(ValueError):
+        OHLCVStream(csv_path, chunksize=50).load()
+
+
+def test_backtester_timeframe(tmp_path, minute_csv):
+    cache = OHLCVCache(tmp_path / "cache")
+    hours = Backtester(None, cache, timeframe="HOUR").load_data_from_csv(minute_csv)
+    minutes = Backtester(None, cache).load_data_from_csv(minute_csv)
+    assert len(hours) == 50
+    assert len(minutes) == 3000
+    # Each timeframe is cached separately
+    assert len(list(cache.cache_dir.iterdir())) == 2
+    assert Backtester(None, cache, "HOUR").load_data_from_csv(minute_csv).equals(hours)
@@ -0,0 +1,70 @@
+from pathlib import Path
+
+import pytest
+from common.SyntheticData import make_ohlcv, write_csv
+
+from tradingbot.components import Backtester, Configuration, PortfolioBacktester
+from tradingbot.strategies import VolumeProfile
+
+
+@pytest.fixture
+def config():
+    return Configuration.from_filepath(Path("test/test_data/trading_bot.toml"))
+
+
+@pytest.fixture
+def markets_dir(tmp_path):
+    path = tmp_path / "markets"
+    path.mkdir()
+    # Markets with different lengths and partially overlapping dates
+    write_csv(make_ohlcv(300, seed=1), path / "AAA.csv")
+    write_csv(make_ohlcv(250, seed=2, start="2020-02-01"), path / "BBB.csv")
+    write_csv(make_ohlcv(200, seed=3, start="2020-01-15"), path / "CCC.csv")
+    return path
+
+
+def test_load_markets(tmp_path, markets_dir):
+    markets = PortfolioBacktester.load_markets(str(markets_dir))
+    assert list(markets.keys()) == ["AAA", "BBB", "CCC"]
+    assert markets["AAA"] == str(markets_dir / "AAA.csv")
+
+    manifest = tmp_path / "manifest.txt"
+    manifest.write_text("# Markets\nmarkets/CCC.csv\n\nmarkets/AAA.csv\n")
+    markets = PortfolioBacktester.load_markets(str(manifest))
+    assert list(markets.keys()) == ["CCC", "AAA"]
+    assert markets["AAA"] == str(markets_dir / "AAA.csv")
+
+    manifest.write_text("markets/AAA.csv\nmarkets/AAA.csv\n")
+    with pytest.raises(ValueError):
+        PortfolioBacktester.load_markets(str(manifest))
+    with pytest.raises(ValueError):
+        PortfolioBacktester.load_markets(str(tmp_path / "missing"))
+
+
+def test_portfolio_backtest(config, markets_dir):
+    # Broken files are reported but do not stop the other markets
+    (markets_dir / "DDD.csv").write_text("wrong,data\n1,2\n")
+    portfolio = PortfolioBacktester(VolumeProfile(config, None))
+    result = portfolio.start(str(markets_dir), cash=40000, max_workers=2)
+
+    assert result["# Markets"] == 4
+    assert result["# Failed Markets"] == 1
+    assert list(portfolio.markets.index) == ["AAA", "BBB", "CCC"]
+    assert result["# Trades"] == portfolio.markets["# Trades"].sum()
+
+    # Each market backtest matches a standalone run with its share of cash
+    bt = Backtester(VolumeProfile(config, None))
+    bt.start(str(markets_dir / "BBB.csv"), cash=10000)
+    expected = bt.get_metrics()
+    for key in ["Start", "End", "Equity Final [$]", "Return [%]", "# Trades"]:
+        assert portfolio.markets.loc["BBB", key] == expected[key]
+
+    # The portfolio equity spans every market and includes the idle cash
+    equity = portfolio.equity_curve
+    assert equity.index[0] == make_ohlcv(1).index[0]
+    assert equity.index.is_monotonic_increasing
+    assert equity.iloc[0] == pytest.approx(40000)
+    final = portfolio.markets["Equity Final [$]"].sum() + 10000
+    assert result["Equity Final [$]"] == pytest.approx(final)
+    assert result["Return [%]"] == pytest.approx((final - 40000) / 400)
+    assert result["Max. Drawdown [%]"] <= 0
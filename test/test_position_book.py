@@ -0,0 +1,83 @@
+import pytest
+
+from tradingbot.components import PositionBook, TradeDirection
+from tradingbot.interfaces import Position
+
+
+def make_position(epic, direction, deal_id="1"):
+    return Position(
+        deal_id=deal_id,
+        size=1,
+        create_date="2020-01-01T00:00:00",
+        direction=direction,
+        level=100,
+        limit=110,
+        stop=90,
+        currency="GBP",
+        epic=epic,
+        market_id=None,
+    )
+
+
+class MockBroker:
+    def __init__(self, positions):
+        self.positions = positions
+        self.calls = 0
+
+    def get_open_positions(self):
+        self.calls += 1
+        return self.positions
+
+
+@pytest.fixture
+def broker():
+    return MockBroker(
+        [
+            make_position("A", TradeDirection.BUY, "1"),
+            make_position("B", TradeDirection.SELL, "2"),
+            make_position("A", TradeDirection.BUY, "3"),
+        ]
+    )
+
+
+def test_refresh(broker):
+    book = PositionBook(broker)
+    assert book.get_positions() == []
+    book.refresh()
+    assert broker.calls == 1
+    assert book.get_epics() == ["A", "B"]
+    assert [p.deal_id for p in book.get("A")] == ["1", "3"]
+    assert [p.deal_id for p in book.get("A", TradeDirection.BUY)] == ["1", "3"]
+    assert book.get("A", TradeDirection.SELL) == []
+    assert book.get("C") == []
+    assert len(book.get_positions()) == 3
+
+    broker.positions = None
+    with pytest.raises(RuntimeError):
+        book.refresh()
+
+
+def test_local_updates(broker):
+    book = PositionBook(broker)
+    book.refresh()
+    book.remove(book.get("B")[0])
+    assert book.get_epics() == ["A"]
+    book.add_trade("C", TradeDirection.SELL, 90, 110)
+    position = book.get("C", TradeDirection.SELL)[0]
+    assert position.deal_id is None
+    assert (position.limit, position.stop) == (90, 110)
+    assert broker.calls == 1
+
+
+def test_reconcile(broker):
+    book = PositionBook(broker)
+    book.refresh()
+    book.add_trade("C", TradeDirection.SELL, 90, 110)
+    broker.positions = broker.positions[:1]
+    book.reconcile()
+    assert book.get_epics() == ["A"]
+
+    # The book is kept if the positions can't be fetched
+    broker.positions = None
+    book.reconcile()
+    assert book.get_epics() == ["A"]
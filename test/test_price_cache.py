@@ -0,0 +1,136 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from tradingbot.components import Interval, OHLCVStore, PriceHistoryCache
+from tradingbot.interfaces import Market, MarketHistory
+
+
+class MockBroker:
+    """
+    Daily bars up to days_ago days ago, the last one changing at every request.
+    When limit is set the next request returns only that number of bars
+    """
+
+    def __init__(self, bars=500, days_ago=0, descending=False):
+        today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0)
+        self.dates = [today - timedelta(days=days_ago + i) for i in range(bars)]
+        self.dates.reverse()
+        self.closes = np.arange(bars, dtype=float)
+        self.descending = descending
+        self.limit = None
+        self.requests = []
+
+    def get_prices(self, market, interval, data_range):
+        self.requests.append(data_range)
+        self.closes[-1] += 0.5
+        if self.limit:
+            data_range, self.limit = self.limit, None
+        dates = [d.isoformat() for d in self.dates[-data_range:]]
+        closes = list(self.closes[-data_range:])
+        if self.descending:
+            dates, closes = dates[::-1], closes[::-1]
+        return MarketHistory(market, dates, closes, closes, closes, closes)
+
+    async def get_prices_async(self, market, interval, data_range):
+        return self.get_prices(market, interval, data_range)
+
+    def add_bar(self):
+        self.dates.append(self.dates[-1] + timedelta(days=1))
+        self.closes = np.append(self.closes, self.closes[-1] + 1)
+
+
+def _get_prices(cache, broker, data_range=300):
+    market = Market()
+    market.epic = "mock"
+    return cache.get_prices(
+        market,
+        Interval.DAY,
+        data_range,
+        lambda bars: broker.get_prices(market, Interval.DAY, bars),
+    )
+
+
+def _closes(history):
+    return list(history.dataframe[MarketHistory.CLOSE_COLUMN])
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_incremental_fetch(descending):
+    cache = PriceHistoryCache()
+    broker = MockBroker(days_ago=2, descending=descending)
+    _get_prices(cache, broker)
+    history = _get_prices(cache, broker)
+    # Only the bars of the days since the last cached one are requested, and
+    # the last cached bar is updated
+    assert broker.requests == [300, 3]
+    expected = list(broker.closes[-300:])
+    assert _closes(history) == (expected[::-1] if descending else expected)
+
+    broker.add_bar()
+    broker.add_bar()
+    history = _get_prices(cache, broker)
+    assert broker.requests[-1] == 3
+    expected = list(broker.closes[-300:])
+    assert _closes(history) == (expected[::-1] if descending else expected)
+    # Shorter histories are served from the same cache
+    assert len(_get_prices(cache, broker, 70).dataframe) == 70
+    assert len(_get_prices(cache, broker).dataframe) == 300
+
+
+def test_gap_and_longer_history():
+    cache = PriceHistoryCache()
+    broker = MockBroker(days_ago=3)
+    _get_prices(cache, broker, 100)
+    # Longer histories are requested in full
+    assert len(_get_prices(cache, broker, 200).dataframe) == 200
+    assert broker.requests == [100, 200]
+    # The whole history is requested if the new bars don't overlap the cache
+    for _ in range(3):
+        broker.add_bar()
+    broker.limit = 1
+    history = _get_prices(cache, broker, 200)
+    assert broker.requests[2:] == [4, 200]
+    assert _closes(history) == list(broker.closes[-200:])
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_store(tmp_path, descending):
+    store = OHLCVStore(tmp_path / "ohlcv.db")
+    broker = MockBroker(descending=descending)
+    _get_prices(PriceHistoryCache(store), broker)
+    # The histories are loaded from the store after a restart
+    cache = PriceHistoryCache(store)
+    history = _get_prices(cache, broker)
+    assert broker.requests == [300, 2]
+    expected = list(broker.closes[-300:])
+    assert _closes(history) == (expected[::-1] if descending else expected)
+    stored = store.read("mock", Interval.DAY.value)
+    assert list(stored["Close"]) == list(broker.closes[-300:])
+    assert stored.index[-1] == broker.dates[-1]
+    # Clearing the cache doesn't remove the stored bars
+    cache.clear()
+    _get_prices(cache, broker)
+    assert broker.requests == [300, 2, 2]
+
+
+def test_async_fetch():
+    cache = PriceHistoryCache()
+    broker = MockBroker()
+    market = Market()
+    market.epic = "mock"
+
+    async def get_prices():
+        return await cache.get_prices_async(
+            market,
+            Interval.DAY,
+            300,
+            lambda bars: broker.get_prices_async(market, Interval.DAY, bars),
+        )
+
+    asyncio.run(get_prices())
+    history = asyncio.run(get_prices())
+    assert broker.requests == [300, 2]
+    assert _closes(history) == list(broker.closes[-300:])
@@ -0,0 +1,87 @@
+import asyncio
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from tradingbot.components import Configuration, RateLimiter, TokenBucket, rate_limiter
+
+
+def test_token_bucket():
+    bucket = TokenBucket(10, burst=2)
+    # The burst calls are allowed at once, then one every interval
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(10, abs=0.01)
+    assert bucket.reserve() == pytest.approx(20, abs=0.01)
+    # Without limit the calls never wait
+    bucket = TokenBucket(0)
+    assert all(bucket.reserve() == 0 for _ in range(10))
+    with pytest.raises(ValueError):
+        TokenBucket(-1)
+    with pytest.raises(ValueError):
+        TokenBucket(1, burst=0)
+
+
+class FakeTime:
+    """Clock of the rate limiter, frozen, recording the sleeps"""
+
+    def __init__(self):
+        self.sleeps = []
+        self.lock = threading.Lock()
+
+    def monotonic(self):
+        return 1000.0
+
+    def sleep(self, seconds):
+        with self.lock:
+            self.sleeps.append(seconds)
+
+
+def test_wait_threads(monkeypatch):
+    fake_time = FakeTime()
+    monkeypatch.setattr(rate_limiter, "time", fake_time)
+    limiter = RateLimiter(0.05)
+    threads = [threading.Thread(target=limiter.wait) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    # Concurrent calls take one token each, the first one without waiting
+    # and the others one interval after the previous one
+    assert sorted(fake_time.sleeps) == pytest.approx([0.05, 0.1, 0.15, 0.2])
+
+
+def test_wait_async():
+    limiter = RateLimiter(0.05, burst=2)
+
+    async def main():
+        start = time.monotonic()
+        await asyncio.gather(*(limiter.wait_async() for _ in range(4)))
+        return time.monotonic() - start
+
+    assert 0.09 <= asyncio.run(main()) < 0.5
+
+
+def test_endpoint_limits():
+    limiter = RateLimiter(0, endpoint_intervals={"prices": 10})
+    limiter.wait("prices")
+    # Other endpoints are not affected by the limit of prices
+    start = time.monotonic()
+    limiter.wait("markets")
+    limiter.wait()
+    assert time.monotonic() - start < 0.1
+    assert limiter.endpoint_buckets["prices"].reserve() > 9
+
+
+def test_from_config():
+    config = Configuration.from_filepath(Path("test/test_data/trading_bot.toml"))
+    config.config.stocks_interface.ig_interface.api_burst = 3
+    config.config.stocks_interface.ig_interface.api_endpoint_timeouts = {"prices": 5}
+    limiter = RateLimiter.from_config(config, "ig_interface")
+    assert limiter.interface_bucket.interval == config.get_ig_api_timeout()
+    assert limiter.interface_bucket.burst == 3
+    assert limiter.endpoint_buckets["prices"].interval == 5
+    with pytest.raises(ValueError):
+        RateLimiter.from_config(config, "unknown")
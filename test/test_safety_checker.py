@@ -0,0 +1,93 @@
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from common.VirtualClock import VirtualClock
+
+from tradingbot.components import (
+    Configuration,
+    MarketClosedException,
+    NotSafeToTradeException,
+    SafetyChecker,
+    TimeAmount,
+    TimeProvider,
+)
+
+
+class MockBroker:
+    def __init__(self, percent_used):
+        self.percent_used = percent_used
+        self.calls = 0
+
+    def get_account_used_perc(self):
+        self.calls += 1
+        return self.percent_used
+
+
+class MockTimeProvider(TimeProvider):
+    def __init__(self, market_open=True):
+        self.market_open = market_open
+        self.calls = 0
+
+    def is_market_open(self, timezone):
+        self.calls += 1
+        return self.market_open
+
+
+@pytest.fixture
+def config():
+    return Configuration.from_filepath(Path("test/test_data/trading_bot.toml"))
+
+
+def test_results_are_cached(config):
+    broker = MockBroker(10.0)
+    time_provider = MockTimeProvider()
+    checker = SafetyChecker(config, broker, time_provider, ttl=3600)
+    for _ in range(5):
+        checker.check()
+    assert broker.calls == time_provider.calls == 1
+
+    checker.invalidate()
+    checker.check()
+    assert broker.calls == time_provider.calls == 2
+
+    # The cache can be disabled
+    checker = SafetyChecker(config, broker, time_provider, ttl=0)
+    checker.check()
+    checker.check()
+    assert broker.calls == time_provider.calls == 4
+
+
+def test_results_expire(config):
+    # The time to live is measured by the clock of the time provider
+    broker = MockBroker(10.0)
+    clock = VirtualClock(datetime(2024, 5, 15, 13, 47))
+    checker = SafetyChecker(config, broker, clock, ttl=60)
+    checker.check()
+    clock.wait_for(TimeAmount.SECONDS, 59)
+    checker.check()
+    assert broker.calls == 1
+    clock.wait_for(TimeAmount.SECONDS, 1)
+    checker.check()
+    assert broker.calls == 2
+
+
+def test_not_safe_to_trade(config):
+    broker = MockBroker(None)
+    checker = SafetyChecker(config, broker, MockTimeProvider(), ttl=3600)
+    # Failures to fetch the account usage are not cached
+    for _ in range(2):
+        with pytest.raises(NotSafeToTradeException):
+            checker.check()
+    assert broker.calls == 2
+
+    broker.percent_used = config.get_max_account_usable()
+    with pytest.raises(NotSafeToTradeException):
+        checker.check()
+
+
+def test_market_closed(config):
+    checker = SafetyChecker(config, MockBroker(10.0), MockTimeProvider(False))
+    assert checker.ttl == config.get_safety_checks_ttl()
+    with pytest.raises(MarketClosedException):
+        checker.check()
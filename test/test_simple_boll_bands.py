@@ -1,5 +1,6 @@
 from pathlib import Path
 
+import numpy as np
 import pytest
 from common.MockRequests import (
     av_request_macd_ext,
@@ -8,6 +9,7 @@ from common.MockRequests import (
     ig_request_confirm_trade,
     ig_request_login,
     ig_request_market_info,
+    ig_request_market_infos,
     ig_request_navigate_market,
     ig_request_open_positions,
     ig_request_prices,
@@ -16,9 +18,11 @@ from common.MockRequests import (
     ig_request_trade,
     ig_request_watchlist,
 )
+from common.SyntheticData import MockDatapoints, make_history
 
 from tradingbot.components import Configuration, TradeDirection
 from tradingbot.components.broker import Broker, BrokerFactory
+from tradingbot.interfaces import Market
 from tradingbot.strategies import SimpleBollingerBands
 
 
@@ -29,6 +33,7 @@ def mock_http_calls(requests_mock):
     ig_request_account_details(requests_mock)
     ig_request_open_positions(requests_mock)
     ig_request_market_info(requests_mock)
+    ig_request_market_infos(requests_mock)
     ig_request_search_market(requests_mock)
     ig_request_prices(requests_mock)
     ig_request_trade(requests_mock)
@@ -122,3 +127,26 @@ def test_find_trade_signal_hold(config, broker, requests_mock):
     assert stop is None
 
     assert tradeDir == TradeDirection.NONE
+
+
+def test_find_trade_signals(config):
+    """Test the vectorised signals match the signals of each bar"""
+    strategy = SimpleBollingerBands(config, "mock")
+    history = make_history(200)
+    directions, limits, stops = strategy.find_trade_signals(history)
+
+    assert len(directions) == len(history)
+    assert TradeDirection.BUY in directions
+    window = strategy.window * 2
+    for i in range(1, len(history)):
+        market = Market()
+        market.bid = market.offer = history["close"].iloc[i]
+        # find_trade_signal() expects the most recent prices first
+        recent = history.iloc[max(0, i - window + 1) : i + 1][::-1]
+        datapoints = MockDatapoints(recent.reset_index(drop=True))
+        direction, limit, stop = strategy.find_trade_signal(market, datapoints)
+        assert directions[i] is direction
+        if direction is TradeDirection.NONE:
+            assert np.isnan(limits[i]) and np.isnan(stops[i])
+        else:
+            assert (limits[i], stops[i]) == (limit, stop)
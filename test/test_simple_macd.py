@@ -1,5 +1,6 @@
 from pathlib import Path
 
+import numpy as np
 import pytest
 from common.MockRequests import (
     av_request_macd_ext,
@@ -8,6 +9,7 @@ from common.MockRequests import (
     ig_request_confirm_trade,
     ig_request_login,
     ig_request_market_info,
+    ig_request_market_infos,
     ig_request_navigate_market,
     ig_request_open_positions,
     ig_request_prices,
@@ -16,9 +18,11 @@ from common.MockRequests import (
     ig_request_trade,
     ig_request_watchlist,
 )
+from common.SyntheticData import MockDatapoints, make_history
 
 from tradingbot.components import Configuration, TradeDirection
 from tradingbot.components.broker import Broker, BrokerFactory
+from tradingbot.interfaces import Market
 from tradingbot.strategies import SimpleMACD
 
 
@@ -29,6 +33,7 @@ def mock_http_calls(requests_mock):
     ig_request_account_details(requests_mock)
     ig_request_open_positions(requests_mock)
     ig_request_market_info(requests_mock)
+    ig_request_market_infos(requests_mock)
     ig_request_search_market(requests_mock)
     ig_request_prices(requests_mock)
     ig_request_trade(requests_mock)
@@ -148,6 +153,49 @@ def test_calculate_indicators(config, broker, requests_mock):
     assert "ATR" in df.columns
 
 
+def _assert_bar_signals(strategy, history):
+    """Assert the vectorised signals match the signal of each bar, computed on
+    its last required_lookback bars as fetched by the bot"""
+    directions, limits, stops = strategy.find_trade_signals(history)
+    assert len(directions) == len(history)
+    lookback = strategy.required_lookback
+    for i in range(strategy.ema_period, len(history)):
+        market = Market()
+        market.bid = market.offer = history["close"].iloc[i]
+        datapoints = MockDatapoints(history.iloc[max(0, i + 1 - lookback) : i + 1])
+        direction, limit, stop = strategy.find_trade_signal(market, datapoints)
+        assert directions[i] is direction
+        if direction is TradeDirection.NONE:
+            assert np.isnan(limits[i]) and np.isnan(stops[i])
+        else:
+            assert (limits[i], stops[i]) == pytest.approx((limit, stop))
+    return directions
+
+
+def test_find_trade_signals(config):
+    """Test the vectorised signals match the signals of each bar"""
+    strategy = SimpleMACD(config, "mock")
+    directions = _assert_bar_signals(strategy, make_history(500, seed=3))
+    assert TradeDirection.BUY in directions
+    assert TradeDirection.SELL in directions
+    # Not enough data for EMA 200 in the first bars
+    assert all(d is TradeDirection.NONE for d in directions[: strategy.ema_period - 1])
+
+
+def test_find_trade_signals_long_history(config):
+    """
+    Test the indicators of the vectorised signals are computed over the same
+    trailing window as the signal of each bar, on a history much longer than it
+    """
+    strategy = SimpleMACD(config, "mock")
+    history = make_history(1500, seed=3)
+    directions = _assert_bar_signals(strategy, history)
+    # Signals well past the first window are compared too
+    later = directions[2 * strategy.required_lookback :]
+    assert TradeDirection.BUY in later
+    assert TradeDirection.SELL in later
+
+
 # Removed old tests that don't apply to the new implementation:
 # - test_generate_signals_from_dataframe (method removed)
 # - test_get_trade_direction_from_signals (method removed)
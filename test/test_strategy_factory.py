@@ -32,3 +32,24 @@ def test_make_strategy(config, broker):
 
     strategy = sf.make_strategy("volume_profile")
     assert isinstance(strategy, VolumeProfile)
+
+
+def test_get_strategy_name(config, broker):
+    sf = StrategyFactory(config, broker)
+    for name in ["simple_macd", "simple_boll_bands", "volume_profile"]:
+        assert StrategyFactory.get_strategy_name(sf.make_strategy(name)) == name
+
+    with pytest.raises(ValueError):
+        StrategyFactory.get_strategy_name("wrong")
+
+
+def test_make_strategy_with_params(config, broker):
+    sf = StrategyFactory(config, broker)
+    strategy = sf.make_strategy_with_params("volume_profile", {"price_bins": 12})
+    assert isinstance(strategy, VolumeProfile)
+    assert strategy.price_bins == 12
+    # The original configuration is not modified
+    assert "volume_profile" not in config.get_raw_config()["strategies"]
+
+    with pytest.raises(ValueError):
+        sf.make_strategy_with_params("volume_profile", {"wrong": 1})
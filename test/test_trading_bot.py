@@ -1,6 +1,10 @@
+import asyncio
+import threading
+from datetime import datetime
 from pathlib import Path
 
 import pytest
+import toml
 from common.MockRequests import (
     av_request_macd_ext,
     av_request_prices,
@@ -8,6 +12,7 @@ from common.MockRequests import (
     ig_request_confirm_trade,
     ig_request_login,
     ig_request_market_info,
+    ig_request_market_infos,
     ig_request_navigate_market,
     ig_request_open_positions,
     ig_request_prices,
@@ -17,9 +22,18 @@ from common.MockRequests import (
     ig_request_watchlist,
     yf_request_prices,
 )
+from common.MockServer import IGServer
+from common.MockStream import StreamPublisher, candle, price
+from common.VirtualClock import VirtualClock
 
 from tradingbot import TradingBot
-from tradingbot.components import TimeProvider
+from tradingbot.components import (
+    Configuration,
+    MarketClosedException,
+    NotSafeToTradeException,
+    TimeProvider,
+    TradeDirection,
+)
 
 
 class MockTimeProvider(TimeProvider):
@@ -43,6 +57,7 @@ def mock_http_calls(requests_mock):
     ig_request_account_details(requests_mock)
     ig_request_open_positions(requests_mock)
     ig_request_market_info(requests_mock)
+    ig_request_market_infos(requests_mock)
     ig_request_search_market(requests_mock)
     ig_request_prices(requests_mock)
     ig_request_trade(requests_mock)
@@ -79,3 +94,314 @@ def test_trading_bot(mock_http_calls):
         tb.process_market_source()
     tb.close_open_positions()
     # TODO assert somehow that the http calls have been done
+
+
+def test_process_market_source_concurrently(mock_http_calls, tmp_path, monkeypatch):
+    config = toml.load("test/test_data/trading_bot.toml")
+    config["market_workers"] = 2
+    # Watchlist name depending on test data json
+    config["market_source"]["watchlist"]["name"] = "My Watchlist"
+    config_filepath = tmp_path / "trading_bot.toml"
+    config_filepath.write_text(toml.dumps(config))
+    tb = TradingBot(MockTimeProvider(), config_filepath=config_filepath)
+    evaluated = []
+    traded = []
+
+    def run(market):
+        evaluated.append(threading.current_thread())
+        return TradeDirection.BUY, 1.0, 2.0
+
+    def process_trade(market, direction, limit, stop):
+        traded.append(threading.current_thread())
+
+    monkeypatch.setattr(tb.strategy, "run", run)
+    monkeypatch.setattr(tb, "process_trade", process_trade)
+    with pytest.raises(StopIteration):
+        tb.process_market_source()
+    # Markets are evaluated by the workers and traded by the calling thread
+    assert len(evaluated) == len(traded) == 3
+    assert all(t is not threading.current_thread() for t in evaluated)
+    assert all(t is threading.current_thread() for t in traded)
+
+
+def test_open_positions_fetched_once(mock_http_calls, monkeypatch):
+    config = Path("test/test_data/trading_bot.toml")
+    tb = TradingBot(MockTimeProvider(), config_filepath=config)
+    calls = []
+    get_open_positions = tb.broker.get_open_positions
+
+    def count_calls():
+        calls.append(1)
+        return get_open_positions()
+
+    monkeypatch.setattr(tb.broker, "get_open_positions", count_calls)
+    monkeypatch.setattr(tb.broker, "trade", lambda *args: True)
+    tb.process_open_positions()
+    epic = tb.position_book.get_epics()[0]
+    market = tb.market_provider.get_market_from_epic(epic)
+    market.epic = "NEW"
+    tb.process_trade(market, TradeDirection.BUY, 1.0, 2.0)
+    # The book is updated locally after a trade and reconciled at the end
+    assert len(tb.position_book.get("NEW", TradeDirection.BUY)) == 1
+    with pytest.raises(StopIteration):
+        tb.process_market_source()
+    assert len(calls) == 2
+    assert tb.position_book.get("NEW") == []
+
+
+def test_start_async(mock_http_calls, requests_mock, tmp_path, monkeypatch):
+    config = toml.load("test/test_data/trading_bot.toml")
+    config["market_workers"] = 3
+    config["market_source"]["watchlist"]["name"] = "My Watchlist"
+    config_filepath = tmp_path / "trading_bot.toml"
+    config_filepath.write_text(toml.dumps(config))
+    tb = TradingBot(MockTimeProvider(), config_filepath=config_filepath)
+    with IGServer(delay=0.05) as server:
+        requests_mock.real_http = True
+        monkeypatch.setattr(tb.broker.account_ifc, "api_base_url", server.url)
+        asyncio.run(tb.start_async(single_pass=True))
+    # The prices of the open positions and watchlist markets are fetched
+    # concurrently by the asynchronous broker calls
+    positions = [p for _, p in server.requests if p == "/positions"]
+    prices = [p for _, p in server.requests if p.startswith("/prices/")]
+    assert len(positions) == 2
+    assert len(prices) == len(tb.position_book.get_epics()) + 3
+    assert server.max_active > 1
+
+
+def test_start_streaming(mock_http_calls, requests_mock, tmp_path, monkeypatch):
+    config = toml.load("test/test_data/trading_bot.toml")
+    config["market_source"]["watchlist"]["name"] = "My Watchlist"
+    config["stream_on_bar_close"] = True
+    config_filepath = tmp_path / "trading_bot.toml"
+    config_filepath.write_text(toml.dumps(config))
+    with pytest.raises(RuntimeError):
+        TradingBot(MockTimeProvider(), config_filepath=config_filepath).start()
+    stream = StreamPublisher(Configuration.from_filepath(config_filepath))
+    tb = TradingBot(MockTimeProvider(), config_filepath=config_filepath, stream=stream)
+    processed = []
+
+    def find_trade_signal(market, datapoints):
+        processed.append((market, datapoints))
+        return TradeDirection.NONE, None, None
+
+    monkeypatch.setattr(tb.strategy, "find_trade_signal", find_trade_signal)
+    stream.publish(
+        [
+            ("MARKET:IX.D.FTSE.DAILY.IP", price(7500, 7501)),
+            ("CHART:IX.D.FTSE.DAILY.IP:HOUR", candle(datetime(2024, 5, 15, 23), 10)),
+        ]
+    )
+    tb.start(single_pass=True)
+    # The open positions and watchlist markets are streamed and the strategy
+    # runs on a market when its daily bar closes, with the streamed prices
+    assert "CHART:CS.D.BITCOIN.TODAY.IP:HOUR" in stream.subscribed_items
+    assert [m.epic for m, _ in processed] == ["IX.D.FTSE.DAILY.IP"]
+    assert processed[0][0].bid == 7500
+    assert not stream.connected
+    assert stream.items == set()
+    # and the streamed bars, after those fetched once from the broker instead
+    # of by the strategy
+    history = processed[0][1].dataframe
+    assert len(history) == min(tb.strategy.required_lookback, 31)
+    assert history["date"].iloc[-1] == "2024-05-15T00:00:00"
+    assert history["close"].iloc[-1] == 10
+    prices = [r for r in requests_mock.request_history if "/prices/" in r.url]
+    assert len(prices) == 1
+
+
+def test_start_scheduled(mock_http_calls, tmp_path, monkeypatch):
+    config = toml.load("test/test_data/trading_bot.toml")
+    config["market_source"]["watchlist"]["name"] = "My Watchlist"
+    config["schedule_on_bar_close"] = True
+    config["bar_close_delay"] = 5
+    config["bar_close_spread"] = 0
+    config_filepath = tmp_path / "trading_bot.toml"
+    config_filepath.write_text(toml.dumps(config))
+    clock = VirtualClock(datetime(2024, 5, 15, 13, 47))
+    tb = TradingBot(clock, config_filepath=config_filepath)
+    processed = []
+    monkeypatch.setattr(tb, "process_market", processed.append)
+    tb.start(single_pass=True)
+    # The open positions and watchlist markets are processed once, just after
+    # their daily bar closes
+    epics = [m.epic for m in processed]
+    assert clock.waits == [36785]
+    assert clock.now() == datetime(2024, 5, 16, 0, 0, 5)
+    assert "IX.D.FTSE.DAILY.IP" in epics
+    assert sorted(epics) == sorted(set(epics))
+    assert len(epics) == len(set(tb.position_book.get_epics())) + 3
+
+
+def test_start_scheduled_market_closed(mock_http_calls, tmp_path, monkeypatch):
+    config = toml.load("test/test_data/trading_bot.toml")
+    config["market_source"]["watchlist"]["name"] = "My Watchlist"
+    config["bar_close_spread"] = 0
+    config_filepath = tmp_path / "trading_bot.toml"
+    config_filepath.write_text(toml.dumps(config))
+    clock = VirtualClock(datetime(2024, 5, 15, 13, 47))
+    tb = TradingBot(clock, config_filepath=config_filepath)
+    processed = []
+
+    def process_market(market):
+        if clock.now().hour < 8:
+            raise MarketClosedException()
+        processed.append(market.epic)
+
+    monkeypatch.setattr(tb, "process_market", process_market)
+    scheduler = tb.schedule_markets()
+    with pytest.raises(MarketClosedException):
+        tb.process_due_markets(scheduler)
+    assert processed == []
+    # The markets are processed at the market opening instead of the next close
+    assert tb.process_due_markets(scheduler) == len(scheduler.get_epics())
+    assert clock.now() == datetime(2024, 5, 16, 8)
+    assert sorted(processed) == sorted(scheduler.get_epics())
+    assert scheduler.get_next_time() == datetime(2024, 5, 17, 0, 0, 10)
+
+
+class StopLoop(BaseException):
+    """Stop the main loop, not caught as a generic exception"""
+
+
+def test_start_scheduled_sync(mock_http_calls, tmp_path, monkeypatch):
+    config = toml.load("test/test_data/trading_bot.toml")
+    config["schedule_on_bar_close"] = True
+    config["bar_close_delay"] = 5
+    config["bar_close_spread"] = 0
+    config_filepath = tmp_path / "trading_bot.toml"
+    config_filepath.write_text(toml.dumps(config))
+    clock = VirtualClock(datetime(2024, 5, 15, 13, 47))
+    tb = TradingBot(clock, config_filepath=config_filepath)
+    # The market source replaces DAX with BITCOIN after the first load
+    sources = iter([["IX.D.FTSE.DAILY.IP", "IX.D.DAX.DAILY.IP"]])
+    resets = []
+    processed = []
+
+    def get_all_markets():
+        epics = next(sources, ["IX.D.FTSE.DAILY.IP", "CS.D.BITCOIN.TODAY.IP"])
+        return tb.market_provider.get_markets_from_epics(epics)
+
+    def process_market(market):
+        processed.append(market.epic)
+        if len(processed) == 2:
+            raise StopLoop()
+
+    monkeypatch.setattr(tb, "get_all_markets", get_all_markets)
+    monkeypatch.setattr(tb.market_provider, "reset", lambda: resets.append(1))
+    monkeypatch.setattr(tb, "process_market", process_market)
+    with pytest.raises(StopLoop):
+        tb.start()
+    # The source is reloaded every spin_interval while waiting for the close
+    assert clock.waits == [3600] * 10 + [785]
+    assert len(resets) == 11
+    assert processed == ["IX.D.FTSE.DAILY.IP", "CS.D.BITCOIN.TODAY.IP"]
+
+
+def test_start_scheduled_retry(mock_http_calls, tmp_path, monkeypatch):
+    config = toml.load("test/test_data/trading_bot.toml")
+    config["schedule_on_bar_close"] = True
+    config["bar_close_delay"] = 5
+    config_filepath = tmp_path / "trading_bot.toml"
+    config_filepath.write_text(toml.dumps(config))
+    clock = VirtualClock(datetime(2024, 5, 15, 13, 47))
+    tb = TradingBot(clock, config_filepath=config_filepath)
+    calls = []
+    processed = []
+
+    def get_all_markets():
+        calls.append(clock.now())
+        if len(calls) == 1:
+            raise RuntimeError("Market source not available")
+        return tb.market_provider.get_markets_from_epics(["IX.D.FTSE.DAILY.IP"])
+
+    def process_market(market):
+        processed.append(market.epic)
+        raise StopLoop()
+
+    monkeypatch.setattr(tb, "get_all_markets", get_all_markets)
+    monkeypatch.setattr(tb, "process_market", process_market)
+    with pytest.raises(StopLoop):
+        tb.start()
+    # The failed first fill of the queue is retried after spin_interval
+    assert calls[:2] == [datetime(2024, 5, 15, 13, 47), datetime(2024, 5, 15, 14, 47)]
+    assert clock.waits == [3600] * 10 + [785]
+    assert processed == ["IX.D.FTSE.DAILY.IP"]
+
+
+def test_start_scheduled_not_safe(mock_http_calls, tmp_path, monkeypatch):
+    config = toml.load("test/test_data/trading_bot.toml")
+    config["market_source"]["watchlist"]["name"] = "My Watchlist"
+    config["bar_close_spread"] = 0
+    config_filepath = tmp_path / "trading_bot.toml"
+    config_filepath.write_text(toml.dumps(config))
+    clock = VirtualClock(datetime(2024, 5, 15, 13, 47))
+    tb = TradingBot(clock, config_filepath=config_filepath)
+    processed = []
+
+    def process_market(market):
+        if len(processed) == 1 and clock.now().hour == 0:
+            raise NotSafeToTradeException()
+        processed.append(market.epic)
+
+    monkeypatch.setattr(tb, "process_market", process_market)
+    scheduler = tb.schedule_markets()
+    with pytest.raises(NotSafeToTradeException):
+        tb.process_due_markets(scheduler)
+    assert len(processed) == 1
+    # The remaining markets are retried after spin_interval
+    remaining = len(scheduler.get_epics()) - 1
+    assert tb.process_due_markets(scheduler) == remaining
+    assert clock.now() == datetime(2024, 5, 16, 1, 0, 10)
+    assert sorted(processed) == sorted(scheduler.get_epics())
+    assert scheduler.get_next_time() == datetime(2024, 5, 17, 0, 0, 10)
+
+
+async def _async_buy(market):
+    return TradeDirection.BUY, 1.0, 2.0
+
+
+def _make_trading_account(tb, monkeypatch):
+    """
+    Trade every market, using 1.5% of the account per trade from 88% used,
+    and return the list of the traded epics
+    """
+    traded = []
+
+    def process_trade(market, direction, limit, stop):
+        traded.append(market.epic)
+        tb.safety_checker.invalidate()
+
+    async def process_trade_async(market, direction, limit, stop):
+        process_trade(market, direction, limit, stop)
+
+    monkeypatch.setattr(
+        tb.broker, "get_account_used_perc", lambda: 88.0 + 1.5 * len(traded)
+    )
+    monkeypatch.setattr(tb.strategy, "run", lambda m: (TradeDirection.BUY, 1.0, 2.0))
+    monkeypatch.setattr(tb.strategy, "run_async", _async_buy)
+    monkeypatch.setattr(tb, "process_trade", process_trade)
+    monkeypatch.setattr(tb, "process_trade_async", process_trade_async)
+    return traded
+
+
+def test_concurrent_trades_checked(mock_http_calls, tmp_path, monkeypatch):
+    config = toml.load("test/test_data/trading_bot.toml")
+    config["market_workers"] = 3
+    config["market_source"]["watchlist"]["name"] = "My Watchlist"
+    config_filepath = tmp_path / "trading_bot.toml"
+    config_filepath.write_text(toml.dumps(config))
+    tb = TradingBot(MockTimeProvider(), config_filepath=config_filepath)
+    traded = _make_trading_account(tb, monkeypatch)
+    # The account crosses max_account_usable after the first trade of the
+    # batch, so the other evaluated markets are not traded
+    with pytest.raises(NotSafeToTradeException):
+        tb.process_market_source()
+    assert len(traded) == 2
+
+    tb.market_provider.reset()
+    tb.safety_checker.invalidate()
+    traded.clear()
+    with pytest.raises(NotSafeToTradeException):
+        asyncio.run(tb.process_market_source_async())
+    assert len(traded) == 2
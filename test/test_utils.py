@@ -1,4 +1,6 @@
-from tradingbot.components import Utils
+from datetime import datetime
+
+from tradingbot.components import Interval, Utils
 
 
 def test_midpoint():
@@ -36,3 +38,28 @@ def test_humanize_time():
     assert Utils.humanize_time(3600) == "01:00:00"
     assert Utils.humanize_time(4800) == "01:20:00"
     assert Utils.humanize_time(4811) == "01:20:11"
+
+
+def test_get_bar_start():
+    time = datetime(2024, 5, 15, 13, 47, 12)
+    assert Utils.get_bar_start(time, Interval.MINUTE_5) == datetime(2024, 5, 15, 13, 45)
+    assert Utils.get_bar_start(time, Interval.HOUR_4) == datetime(2024, 5, 15, 12)
+    assert Utils.get_bar_start(time, Interval.DAY) == datetime(2024, 5, 15)
+    # Weeks start on Monday
+    assert Utils.get_bar_start(time, Interval.WEEK) == datetime(2024, 5, 13)
+    assert Utils.get_bar_start(time, Interval.MONTH) == datetime(2024, 5, 1)
+    assert Utils.get_bar_start(datetime(2024, 5, 15), Interval.DAY) == datetime(
+        2024, 5, 15
+    )
+
+
+def test_get_bar_end():
+    time = datetime(2024, 5, 15, 13, 47, 12)
+    assert Utils.get_bar_end(time, Interval.MINUTE_5) == datetime(2024, 5, 15, 13, 50)
+    assert Utils.get_bar_end(time, Interval.HOUR_4) == datetime(2024, 5, 15, 16)
+    assert Utils.get_bar_end(time, Interval.WEEK) == datetime(2024, 5, 20)
+    assert Utils.get_bar_end(time, Interval.MONTH) == datetime(2024, 6, 1)
+    # The end of a bar is the start of the next one
+    end = Utils.get_bar_end(datetime(2024, 5, 15), Interval.DAY)
+    assert end == datetime(2024, 5, 16)
+    assert Utils.get_bar_start(end, Interval.DAY) == end
@@ -0,0 +1,74 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+from common.SyntheticData import MockDatapoints, make_history
+
+from tradingbot.components import Configuration, TradeDirection
+from tradingbot.interfaces import Market
+from tradingbot.strategies import VolumeProfile
+
+
+@pytest.fixture
+def config():
+    config = Configuration.from_filepath(Path("test/test_data/trading_bot.toml"))
+    config.config.strategies.active = "volume_profile"
+    return config
+
+
+def test_build_volume_profile(config):
+    strategy = VolumeProfile(config, "mock")
+    history = make_history(strategy.lookback_periods)
+    profile = strategy._build_volume_profile(history)
+
+    assert history["low"].min() <= profile["val"] <= profile["poc"]
+    assert profile["poc"] <= profile["vah"] <= history["high"].max()
+    # The whole volume is distributed across the price levels
+    assert profile["volume_profile"].sum() == pytest.approx(history["volume"].sum())
+
+
+def test_find_trade_signals(config):
+    """Test the vectorised signals match the signals of each bar"""
+    strategy = VolumeProfile(config, "mock")
+    history = make_history(300)
+    directions, limits, stops = strategy.find_trade_signals(history)
+
+    assert len(directions) == len(history)
+    assert TradeDirection.BUY in directions
+    assert TradeDirection.SELL in directions
+    for i in range(strategy.lookback_periods - 1, len(history)):
+        market = Market()
+        market.bid = market.offer = history["close"].iloc[i]
+        datapoints = MockDatapoints(history.iloc[: i + 1])
+        direction, limit, stop = strategy.find_trade_signal(market, datapoints)
+        assert directions[i] is direction
+        if direction is TradeDirection.NONE:
+            assert np.isnan(limits[i]) and np.isnan(stops[i])
+        else:
+            assert (limits[i], stops[i]) == (limit, stop)
+
+
+def test_find_trade_signals_not_enough_data(config):
+    strategy = VolumeProfile(config, "mock")
+    history = make_history(strategy.lookback_periods - 1)
+    directions, limits, stops = strategy.find_trade_signals(history)
+
+    assert all(d is TradeDirection.NONE for d in directions)
+    assert np.isnan(limits).all() and np.isnan(stops).all()
+
+
+def test_required_lookback(config):
+    """Test the signals only depend on the declared number of bars"""
+    strategy = VolumeProfile(config, "mock")
+    history = make_history(200)
+    assert strategy.required_lookback == strategy.lookback_periods + 20
+    for i in range(strategy.required_lookback, len(history)):
+        market = Market()
+        market.bid = market.offer = history["close"].iloc[i]
+        full = MockDatapoints(history.iloc[: i + 1])
+        window = MockDatapoints(
+            history.iloc[i + 1 - strategy.required_lookback : i + 1]
+        )
+        assert strategy.find_trade_signal(market, full) == strategy.find_trade_signal(
+            market, window
+        )
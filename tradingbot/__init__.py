@@ -1,8 +1,10 @@
 import argparse
+import asyncio
+import logging
 import sys
 from pathlib import Path
 
-from .components import TimeProvider
+from .components import Interval, TimeProvider
 from .trading_bot import TradingBot
 
 
@@ -39,6 +41,12 @@ def get_menu_parser() -> argparse.Namespace:
         help="Run a single iteration on the market source",
         action="store_true",
     )
+    parser.add_argument(
+        "--asyncio",
+        help="Fetch the market data with the asynchronous broker calls, up to "
+        "market_workers markets at a time",
+        action="store_true",
+    )
     backtest_group = parser.add_argument_group("Backtesting")
     backtest_group.add_argument(
         "--cash",
@@ -54,6 +62,101 @@ def get_menu_parser() -> argparse.Namespace:
         default=0.2,
         metavar="PERCENT",
     )
+    backtest_group.add_argument(
+        "--portfolio",
+        help="Backtest a portfolio of markets: the --backtest path is a directory "
+        "of per-market CSV files or a manifest file listing one CSV path per line",
+        action="store_true",
+    )
+    backtest_group.add_argument(
+        "--optimize",
+        help="Backtest every combination of the strategy parameters, given as a "
+        "comma separated list or an inclusive START:STOP:STEP range "
+        "(e.g. price_bins=20,30,40 lookback_periods=30:70:10)",
+        nargs="+",
+        metavar="PARAM=VALUES",
+        default=None,
+    )
+    backtest_group.add_argument(
+        "--walk-forward",
+        help="Walk-forward analysis: optimize the --optimize parameters on rolling "
+        "windows of IN_SAMPLE bars and backtest the best ones on the following "
+        "OUT_OF_SAMPLE bars",
+        nargs=2,
+        type=int,
+        metavar=("IN_SAMPLE", "OUT_OF_SAMPLE"),
+        default=None,
+    )
+    backtest_group.add_argument(
+        "--rank-by",
+        help="Metric used to rank the optimization results (default: SQN)",
+        default="SQN",
+        metavar="METRIC",
+    )
+    backtest_group.add_argument(
+        "--workers",
+        help="Number of worker processes (default: number of CPUs)",
+        type=int,
+        default=None,
+        metavar="N",
+    )
+    backtest_group.add_argument(
+        "--store",
+        help="Backtest the bars stored by the bot in the price cache database: "
+        "the --backtest argument is the market epic",
+        action="store_true",
+    )
+    backtest_group.add_argument(
+        "--interval",
+        help="Interval of the stored bars to backtest with --store (default: DAY)",
+        choices=[i.value for i in Interval],
+        default=Interval.DAY.value,
+    )
+    backtest_group.add_argument(
+        "--timeframe",
+        help="Resample the CSV data to this timeframe while reading it, as "
+        "interval (e.g. MINUTE_5, HOUR, DAY) or pandas frequency (e.g. 5min, 1h). "
+        "Required for files of Bid/Ask ticks",
+        default=None,
+        metavar="TIMEFRAME",
+    )
+    backtest_group.add_argument(
+        "--chunksize",
+        help="Read the CSV files this number of rows at a time to bound memory "
+        "usage (default: 1000000 when --timeframe is set)",
+        type=int,
+        default=None,
+        metavar="ROWS",
+    )
+    backtest_group.add_argument(
+        "--no-cache",
+        help="Always parse the CSV files and run the backtests instead of using "
+        "the cache of the previously loaded files and backtest results",
+        action="store_true",
+    )
+    backtest_group.add_argument(
+        "--monte-carlo",
+        help="Run this number of Monte Carlo simulations of the backtest trades "
+        "and report the confidence bands of return and max drawdown",
+        type=int,
+        default=None,
+        metavar="SIMULATIONS",
+    )
+    backtest_group.add_argument(
+        "--monte-carlo-method",
+        help="Draw the simulated trades with replacement (bootstrap) or reorder "
+        "them (shuffle) (default: bootstrap)",
+        choices=["bootstrap", "shuffle"],
+        default="bootstrap",
+    )
+    backtest_group.add_argument(
+        "--engine",
+        help="Engine running the backtests: the backtesting.py library or the "
+        "faster built-in native engine, giving the same results (default: "
+        "backtesting)",
+        choices=["backtesting", "native"],
+        default="backtesting",
+    )
     backtest_group.add_argument(
         "--plot",
         help="Save backtest plot to specified HTML file",
@@ -61,7 +164,20 @@ def get_menu_parser() -> argparse.Namespace:
         metavar="FILENAME",
         default=None,
     )
-    return parser.parse_args()
+    args = parser.parse_args()
+    if args.portfolio and args.optimize:
+        parser.error("--portfolio and --optimize cannot be used together")
+    if args.walk_forward and not args.optimize:
+        parser.error("--walk-forward requires --optimize")
+    if args.monte_carlo and (args.portfolio or args.optimize):
+        parser.error("--monte-carlo cannot be used with --portfolio or --optimize")
+    if args.store and (args.portfolio or args.optimize or args.timeframe):
+        parser.error(
+            "--store cannot be used with --portfolio, --optimize or --timeframe"
+        )
+    if args.plot and args.engine == "native":
+        parser.error("--plot requires the backtesting engine")
+    return args
 
 
 def main() -> None:
@@ -71,7 +187,15 @@ def main() -> None:
     if args.backtest:
         from typing import cast
 
-        from .components import Backtester, Configuration
+        from .components import (
+            Backtester,
+            BacktestResultCache,
+            Configuration,
+            MonteCarlo,
+            OHLCVCache,
+            OHLCVStore,
+            PortfolioBacktester,
+        )
         from .components.broker import Broker
         from .strategies import StrategyFactory
 
@@ -91,22 +215,92 @@ def main() -> None:
         ).make_from_configuration()
 
         # Create backtester
-        backtester = Backtester(strategy)
+        cache = None if args.no_cache else OHLCVCache()
+        # Plotting needs the backtesting.py instance, which is not cached
+        result_cache = None if args.no_cache or args.plot else BacktestResultCache()
+        backtester = Backtester(
+            strategy, cache, args.timeframe, args.chunksize, args.engine, result_cache
+        )
 
         # Convert commission from percentage to decimal
         commission = args.commission / 100.0
         plot_file = args.plot[0] if args.plot else None
 
+        if args.portfolio:
+            # Run the strategy on every market and combine the results
+            portfolio = PortfolioBacktester(
+                strategy,
+                cache,
+                args.timeframe,
+                args.chunksize,
+                args.engine,
+                result_cache,
+            )
+            portfolio.start(
+                path=args.backtest[0],
+                cash=args.cash,
+                commission=commission,
+                max_workers=args.workers,
+            )
+            portfolio.print_results()
+            return
+
+        if args.walk_forward:
+            # Optimize and validate the parameters on rolling windows
+            table = backtester.walk_forward(
+                csv_path=args.backtest[0],
+                param_grid=Backtester.parse_param_grid(args.optimize),
+                in_sample=args.walk_forward[0],
+                out_of_sample=args.walk_forward[1],
+                cash=args.cash,
+                commission=commission,
+                rank_by=args.rank_by,
+                max_workers=args.workers,
+            )
+            backtester.print_walk_forward_results(table)
+            return
+
+        if args.optimize:
+            # Run a backtest for each combination of the strategy parameters
+            table = backtester.optimize(
+                csv_path=args.backtest[0],
+                param_grid=Backtester.parse_param_grid(args.optimize),
+                cash=args.cash,
+                commission=commission,
+                rank_by=args.rank_by,
+                max_workers=args.workers,
+            )
+            backtester.print_optimization_results(table)
+            return
+
         # Run backtest
-        backtester.start(
-            csv_path=args.backtest[0],
-            cash=args.cash,
-            commission=commission,
-        )
+        if args.store:
+            database = config.get_price_cache_database()
+            data = backtester.load_data_from_store(
+                OHLCVStore(Path(database) if database else None),
+                args.backtest[0],
+                args.interval,
+            )
+            backtester.run(data, cash=args.cash, commission=commission)
+        else:
+            backtester.start(
+                csv_path=args.backtest[0],
+                cash=args.cash,
+                commission=commission,
+            )
 
         # Print results
         backtester.print_results()
 
+        if args.monte_carlo:
+            # Check how much the results depend on the sequence of the trades
+            if backtester.result is None or backtester.result["_trades"].empty:
+                logging.warning("No trades to run the Monte Carlo simulations on")
+            else:
+                monte_carlo = MonteCarlo(backtester.result)
+                monte_carlo.run(args.monte_carlo, args.monte_carlo_method)
+                monte_carlo.print_results()
+
         # Generate plot if requested
         if plot_file:
             backtester.plot_results(filename=plot_file)
@@ -115,5 +309,7 @@ def main() -> None:
         bot = TradingBot(time_provider=TimeProvider(), config_filepath=args.config)
         if args.close_positions:
             bot.close_open_positions()
+        elif args.asyncio:
+            asyncio.run(bot.start_async(single_pass=args.single_pass))
         else:
             bot.start(single_pass=args.single_pass)
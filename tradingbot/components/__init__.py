@@ -13,6 +13,20 @@ from .utils import (  # NOQA # isort:skip
     TradeDirection,
     Utils,
 )
+from .rate_limiter import RateLimiter, TokenBucket  # NOQA # isort:skip
+from .ohlcv_store import OHLCVStore  # NOQA # isort:skip
+from .price_cache import PriceHistoryCache  # NOQA # isort:skip
+from .ohlcv_cache import OHLCVCache  # NOQA # isort:skip
+from .ohlcv_stream import OHLCVStream  # NOQA # isort:skip
+from .backtest_engine import BacktestEngine  # NOQA # isort:skip
+from .backtest_result_cache import BacktestResultCache  # NOQA # isort:skip
 from .backtester import Backtester  # NOQA # isort:skip
+from .portfolio_backtester import PortfolioBacktester  # NOQA # isort:skip
+from .monte_carlo import MonteCarlo  # NOQA # isort:skip
+from .market_tree import MarketTree  # NOQA # isort:skip
 from .market_provider import MarketProvider, MarketSource  # NOQA # isort:skip
+from .position_book import PositionBook  # NOQA # isort:skip
+from .market_stream import MarketState, MarketStream  # NOQA # isort:skip
 from .time_provider import TimeProvider, TimeAmount  # NOQA # isort:skip
+from .bar_scheduler import BarScheduler  # NOQA # isort:skip
+from .safety_checker import SafetyChecker  # NOQA # isort:skip
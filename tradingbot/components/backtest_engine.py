@@ -0,0 +1,319 @@
+import sys
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from backtesting._stats import compute_stats  # Private, pinned in pyproject.toml
+
+from ..components import TradeDirection
+from ..strategies import TradeSignals
+
+# Fraction of the equity risked by each trade with a stop loss
+RISK_PER_TRADE = 0.02
+# Order size used by backtesting.py when buy() and sell() have no size
+FULL_EQUITY = 1 - sys.float_info.epsilon
+
+# Action taken on a signal: open a long or short trade, close the open trade or
+# nothing at all, when the strategy failed to produce the signal
+_BUY, _SELL, _CLOSE, _SKIP = 1, -1, 0, 2
+
+# Columns of the closed trades log
+_SIZE, _ENTRY_BAR, _EXIT_BAR, _ENTRY_PRICE, _EXIT_PRICE, _SL, _TP, _COMMISSION = range(
+    8
+)
+
+# Market order waiting to be filled: signed size, stop loss and take profit
+_Order = Tuple[float, float, float]
+
+
+class BacktestEngine:
+    """
+    Event driven backtest engine that trades the strategy signals exactly as
+    TradingBotStrategy does with backtesting.py, without its per bar overhead.
+    Market orders are filled at the open of the next bar, the stop loss and
+    take profit when the bar range reaches them, the stop loss first. Bars in
+    which nothing can happen are processed in bulk with numpy
+    """
+
+    data: pd.DataFrame
+    cash: float
+    commission: float
+
+    def __init__(
+        self, data: pd.DataFrame, cash: float = 10000, commission: float = 0.002
+    ) -> None:
+        """
+        - **data**: dataframe with Open, High, Low, Close columns
+        - **cash**: initial cash amount
+        - **commission**: commission percentage per trade (e.g. 0.002 = 0.2%)
+        """
+        if cash <= 0:
+            raise ValueError(f"cash should be > 0, is {cash}")
+        if not -0.1 <= commission < 0.1:
+            raise ValueError("commission should be between -10% and 10%")
+        if len(data) == 0:
+            raise ValueError("OHLC data is empty")
+        self.data = data
+        self.cash = cash
+        self.commission = commission
+        self._open, self._high, self._low, self._close = (
+            data[c].to_numpy(dtype=float) for c in ["Open", "High", "Low", "Close"]
+        )
+        if np.isnan(np.stack([self._open, self._high, self._low, self._close])).any():
+            raise ValueError("OHLC data contains NaN values")
+
+    def run(self, signals: TradeSignals) -> pd.Series:
+        """
+        Backtest the signals, one per bar as returned by find_trade_signals(),
+        with a None direction for the bars without a signal. Returns the
+        statistics computed by backtesting.py
+        """
+        direction, limits, stops = signals
+        bars = len(self._close)
+        if not len(direction) == len(limits) == len(stops) == bars:
+            raise ValueError(f"Expected one signal for each of the {bars} bars")
+        actions = self._get_actions(direction)
+        limits = np.asarray(limits, dtype=float)
+        stops = np.asarray(stops, dtype=float)
+        # Bars at which the strategy opens a trade when there is none open, and
+        # bars at which it closes the open one
+        entries = np.flatnonzero((actions == _BUY) | (actions == _SELL))
+        exits = np.flatnonzero(actions == _CLOSE)
+
+        self._cash = float(self.cash)
+        self._size = 0
+        self._entry_price = self._sl = self._tp = np.nan
+        self._entry_bar = 0
+        self._trades = np.empty((64, 8))
+        self._trades_count = 0
+        equity = np.full(bars, np.nan)
+        order: Optional[_Order] = None
+        close_order = False
+        # As in backtesting.py the strategy sees the first bar only from the
+        # second one, when the orders can be processed at the first time
+        i = 1
+        while i < bars:
+            # Orders placed at the previous bar are processed at the open...
+            if close_order:
+                self._close_trade(i, self._open[i])
+                close_order = False
+            else:
+                if order is not None:
+                    self._fill_order(i, *order)
+                    order = None
+                if self._size:
+                    self._check_exits(i)
+            equity[i] = self._get_equity(i)
+            if equity[i] <= 0:
+                # Out of money, the simulation stops
+                if self._size:
+                    self._close_trade(i, self._close[i])
+                self._cash = 0
+                equity[i:] = 0
+                break
+
+            # ...and the strategy acts at the close
+            action = actions[i]
+            if not self._size:
+                if action == _BUY or action == _SELL:
+                    order = self._make_order(action, i, limits[i], stops[i])
+                if order is None:
+                    # Nothing happens until the next entry signal
+                    following = np.searchsorted(entries, i, side="right")
+                    next_bar = entries[following] if following < len(entries) else bars
+                    equity[i + 1 : next_bar] = self._cash
+                    i = next_bar
+                    continue
+            elif action == _CLOSE:
+                close_order = True
+            else:
+                # The trade stays open until it hits the stop loss or the take
+                # profit, runs out of money or the next exit signal
+                following = np.searchsorted(exits, i, side="right")
+                stop = exits[following] if following < len(exits) else bars
+                next_bar = self._find_event(i + 1, stop)
+                equity[i + 1 : next_bar] = self._get_trade_equity(i + 1, next_bar)
+                i = next_bar
+                continue
+            i += 1
+
+        return self._compute_stats(
+            pd.Series(equity).bfill().fillna(self._cash).to_numpy()
+        )
+
+    @staticmethod
+    def _get_actions(direction: np.ndarray) -> np.ndarray:
+        """Convert the signal directions to the actions of TradingBotStrategy"""
+        direction = np.asarray(direction, dtype=object)
+        actions = np.full(len(direction), _CLOSE, dtype=np.int8)
+        actions[direction == TradeDirection.BUY] = _BUY
+        actions[direction == TradeDirection.SELL] = _SELL
+        actions[pd.isna(direction)] = _SKIP
+        return actions
+
+    def _make_order(
+        self, action: int, i: int, limit: float, stop: float
+    ) -> Optional[_Order]:
+        """
+        Return the order placed by TradingBotStrategy for the signal or None if
+        backtesting.py would reject it
+        """
+        price = float(self._close[i])
+        size = FULL_EQUITY
+        sl: Optional[float] = None
+        tp: Optional[float] = None
+        if not np.isnan(stop) and stop > 0:
+            stop_distance = abs(price - stop)
+            if stop_distance > 0:
+                # Risk 2% of the equity, which is the cash as no trade is open
+                size = min(self._cash * RISK_PER_TRADE / stop_distance, 1.0)
+                sl = float(stop)
+                tp = None if np.isnan(limit) else float(limit)
+        if not (0 < size < 1 or round(size) == size >= 1):
+            return None
+        if action == _BUY:
+            if not (sl or -np.inf) < price < (tp or np.inf):
+                return None
+        else:
+            size = -size
+            if not (tp or -np.inf) < price < (sl or np.inf):
+                return None
+        return size, sl or np.nan, tp or np.nan
+
+    def _fill_order(self, i: int, size: float, sl: float, tp: float) -> None:
+        """Open a trade at the open of the bar if there is enough cash"""
+        price = float(self._open[i])
+        price_plus_commission = price + abs(size) * price * self.commission / abs(size)
+        if -1 < size < 1:
+            # Size in fraction of the equity
+            units = int(self._cash * abs(size) // price_plus_commission)
+            if not units:
+                return
+            size = np.copysign(units, size)
+        if abs(int(size)) * price_plus_commission > self._cash:
+            return
+        for level in (tp, sl):
+            if not np.isnan(level) and not 0 < level < np.inf:
+                raise ValueError(f"Make sure 0 < price < inf! price: {level}")
+        self._size = int(size)
+        self._entry_price = price
+        self._entry_bar = i
+        self._sl = sl
+        self._tp = tp
+        self._cash -= abs(self._size) * price * self.commission
+
+    def _check_exits(self, i: int) -> None:
+        """Close the trade if the bar reaches the stop loss or take profit"""
+        price = float(self._open[i])
+        if self._size > 0:
+            if self._low[i] <= self._sl:
+                self._close_trade(i, min(price, self._sl))
+            elif self._high[i] >= self._tp:
+                self._close_trade(i, max(price, self._tp))
+        else:
+            if self._high[i] >= self._sl:
+                self._close_trade(i, max(price, self._sl))
+            elif self._low[i] <= self._tp:
+                self._close_trade(i, min(price, self._tp))
+
+    def _find_event(self, start: int, stop: int) -> int:
+        """
+        Return the first bar from start to stop excluded at which the open trade
+        reaches the stop loss or the take profit or runs out of money, or stop.
+        The bars are scanned in growing blocks to bound the work to the length
+        of the trade
+        """
+        block = 256
+        while start < stop:
+            end = min(start + block, stop)
+            if self._size > 0:
+                hit = (self._low[start:end] <= self._sl) | (
+                    self._high[start:end] >= self._tp
+                )
+            else:
+                hit = (self._high[start:end] >= self._sl) | (
+                    self._low[start:end] <= self._tp
+                )
+            hit |= self._get_trade_equity(start, end) <= 0
+            if hit.any():
+                return start + int(hit.argmax())
+            start = end
+            block *= 2
+        return stop
+
+    def _get_trade_equity(self, start: int, stop: int) -> np.ndarray:
+        """Equity of the bars from start to stop excluded with the trade open"""
+        return self._cash + (
+            self._close[start:stop] * self._size - self._size * self._entry_price
+        )
+
+    def _get_equity(self, i: int) -> float:
+        if not self._size:
+            return self._cash
+        return self._cash + (
+            self._close[i] * self._size - self._size * self._entry_price
+        )
+
+    def _close_trade(self, i: int, price: float) -> None:
+        """Close the open trade at the price, paying the commission"""
+        commission = abs(self._size) * price * self.commission
+        self._cash += self._size * (price - self._entry_price) - commission
+        if self._trades_count == len(self._trades):
+            self._trades = np.concatenate([self._trades, np.empty_like(self._trades)])
+        self._trades[self._trades_count] = (
+            self._size,
+            self._entry_bar,
+            i,
+            self._entry_price,
+            price,
+            self._sl,
+            self._tp,
+            commission + abs(self._size) * self._entry_price * self.commission,
+        )
+        self._trades_count += 1
+        self._size = 0
+
+    def _compute_stats(self, equity: np.ndarray) -> pd.Series:
+        """Compute the statistics of backtesting.py from the trades and equity"""
+        trades = self._trades[: self._trades_count]
+        size = trades[:, _SIZE].astype(np.int64)
+        entry_bar = trades[:, _ENTRY_BAR].astype(np.int64)
+        exit_bar = trades[:, _EXIT_BAR].astype(np.int64)
+        entry_price = trades[:, _ENTRY_PRICE]
+        exit_price = trades[:, _EXIT_PRICE]
+        commission = trades[:, _COMMISSION]
+        index = self.data.index
+        trades_df = pd.DataFrame(
+            {
+                "Size": size,
+                "EntryBar": entry_bar,
+                "ExitBar": exit_bar,
+                "EntryPrice": entry_price,
+                "ExitPrice": exit_price,
+                "SL": trades[:, _SL],
+                "TP": trades[:, _TP],
+                "PnL": size * (exit_price - entry_price) - commission,
+                "Commission": commission,
+                "ReturnPct": np.sign(size) * (exit_price / entry_price - 1)
+                - commission / (np.abs(size) * entry_price),
+                "EntryTime": index[entry_bar],
+                "ExitTime": index[exit_bar],
+            }
+        )
+        trades_df["Duration"] = trades_df["ExitTime"] - trades_df["EntryTime"]
+        trades_df["Tag"] = None
+        stats = compute_stats(
+            trades=trades_df,
+            equity=equity,
+            ohlc_data=self.data,
+            strategy_instance=None,
+            risk_free_rate=0.0,
+        )
+        # Reported by backtesting.py only when given the trades objects
+        commissions = sum(commission.tolist())
+        if commissions:
+            items = list(stats.items())
+            position = stats.index.get_loc("Equity Peak [$]") + 1
+            items.insert(position, ("Commissions [$]", commissions))
+            stats = type(stats)(dict(items), dtype=object)
+        return stats
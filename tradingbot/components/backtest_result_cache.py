@@ -0,0 +1,185 @@
+import functools
+import hashlib
+import importlib
+import inspect
+import json
+import logging
+import os
+import pickle
+import time
+from pathlib import Path
+from typing import Any, Mapping, Optional
+
+import backtesting
+import numpy as np
+import pandas as pd
+
+DEFAULT_CACHE_PATH = Path.home() / ".TradingBot" / "cache" / "results"
+DEFAULT_MAX_SIZE = 1 << 30
+DEFAULT_MAX_AGE = 30 * 24 * 3600
+# Modules running the backtests, whose code determines the results too
+ENGINE_MODULES = [f"{__package__}.backtester", f"{__package__}.backtest_engine"]
+
+
+class BacktestResultCache:
+    """
+    Cache of the backtest results, keyed by the content of everything that
+    determines them: the data, the strategy code and configuration, the cash,
+    the commission and the engine. Entries unused for more than max_age seconds
+    are removed, as are the least recently used ones when the cache grows over
+    max_size bytes
+    """
+
+    VERSION = 1
+    SUFFIX = ".pkl"
+
+    cache_dir: Path
+    max_size: int
+    max_age: float
+
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = None,
+        max_size: int = DEFAULT_MAX_SIZE,
+        max_age: float = DEFAULT_MAX_AGE,
+    ) -> None:
+        """
+        - **cache_dir**: folder of the cache entries
+        - **max_size**: maximum total size of the entries in bytes
+        - **max_age**: maximum time in seconds since an entry was last used
+        """
+        if max_size <= 0 or max_age <= 0:
+            raise ValueError("max_size and max_age must be positive")
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_PATH
+        self.max_size = max_size
+        self.max_age = max_age
+
+    @classmethod
+    def make_key(
+        cls,
+        data: pd.DataFrame,
+        strategy: Any,
+        strategy_config: Mapping[str, Any],
+        cash: float,
+        commission: float,
+        engine: str,
+    ) -> str:
+        """
+        Return the key of the backtest of the strategy on the data. The code is
+        identified by the source of the modules of the strategy class and of
+        its base classes and of the ENGINE_MODULES, so editing them invalidates
+        the results, but changes to other modules they call are not detected
+        """
+        digest = hashlib.sha1()
+        index = pd.util.hash_pandas_object(data.index, index=False)
+        digest.update(index.to_numpy().data)
+        digest.update(str(getattr(data.index, "tz", None)).encode())
+        numeric = data.select_dtypes("number")
+        digest.update(json.dumps([str(c) for c in numeric.columns]).encode())
+        # Column by column, hashing the arrays in place
+        for column in numeric.columns:
+            values = np.ascontiguousarray(numeric[column].to_numpy(np.float64))
+            digest.update(values.data)
+        strategy_class = type(strategy)
+        modules = [c.__module__ for c in strategy_class.__mro__] + ENGINE_MODULES
+        sources = [_get_module_source(m) for m in dict.fromkeys(modules)]
+        digest.update(
+            json.dumps(
+                [
+                    cls.VERSION,
+                    backtesting.__version__,
+                    f"{strategy_class.__module__}.{strategy_class.__qualname__}",
+                    sources,
+                    strategy_config,
+                    float(cash),
+                    float(commission),
+                    engine,
+                ],
+                sort_keys=True,
+                default=str,
+            ).encode()
+        )
+        return digest.hexdigest()
+
+    def load(self, key: str) -> Optional[pd.Series]:
+        """Return the cached backtest result or None if not in cache"""
+        entry = self._entry_path(key)
+        try:
+            if time.time() - entry.stat().st_mtime > self.max_age:
+                entry.unlink(missing_ok=True)
+                return None
+            with entry.open("rb") as f:
+                result = pickle.load(f)
+            # Mark the entry as recently used
+            os.utime(entry)
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError) as e:
+            logging.warning(f"Ignoring corrupted cache entry {entry}: {e}")
+            return None
+        logging.info(f"Loaded backtest result {key} from cache")
+        return result
+
+    def store(self, key: str, result: pd.Series) -> None:
+        """
+        Store the backtest result, with its trades and equity curve but without
+        the backtesting.py strategy instance, then evict the old entries
+        """
+        entry = self._entry_path(key)
+        result = result.copy()
+        if "_strategy" in result.index:
+            result["_strategy"] = None
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # Write in a temporary file and rename it, so that concurrent readers
+        # never see a partially written entry
+        tmp = entry.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with tmp.open("wb") as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, entry)
+        except OSError as e:
+            logging.warning(f"Unable to store backtest result {key} in cache: {e}")
+        finally:
+            tmp.unlink(missing_ok=True)
+        self.evict()
+
+    def evict(self) -> None:
+        """
+        Remove the entries unused for more than max_age, then the least recently
+        used ones until the cache is not bigger than max_size
+        """
+        entries = []
+        now = time.time()
+        for entry in self.cache_dir.glob(f"*{self.SUFFIX}"):
+            try:
+                stat = entry.stat()
+            except OSError:
+                # Removed by another process
+                continue
+            if now - stat.st_mtime > self.max_age:
+                entry.unlink(missing_ok=True)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, entry))
+        size = sum(s for _, s, _ in entries)
+        for _, entry_size, entry in sorted(entries, key=lambda e: e[0]):
+            if size <= self.max_size:
+                break
+            entry.unlink(missing_ok=True)
+            size -= entry_size
+
+    def clear(self) -> None:
+        """Remove all the cache entries"""
+        for entry in self.cache_dir.glob(f"*{self.SUFFIX}"):
+            entry.unlink(missing_ok=True)
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}{self.SUFFIX}"
+
+
+@functools.lru_cache(maxsize=None)
+def _get_module_source(name: str) -> str:
+    """Return the source code of the module, empty if not available"""
+    try:
+        return inspect.getsource(importlib.import_module(name))
+    except (ImportError, OSError, TypeError):
+        return ""
@@ -1,119 +1,522 @@
+import itertools
 import logging
-from typing import Optional
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, cast
 
+import numpy as np
 import pandas as pd
 from backtesting import Backtest
 from backtesting import Strategy as BacktestStrategy
 
-from ..components import TradeDirection
-from ..strategies import StrategyImpl
+from ..components import ConfigDict, Configuration, TradeDirection
+from ..components.backtest_engine import BacktestEngine
+from ..components.backtest_result_cache import BacktestResultCache
+from ..components.broker import Broker
+from ..components.ohlcv_cache import OHLCVCache
+from ..components.ohlcv_store import OHLCVStore
+from ..components.ohlcv_stream import DEFAULT_CHUNKSIZE, OHLCVStream
+from ..interfaces import Market, MarketHistory
+from ..strategies import StrategyFactory, StrategyImpl, TradeSignal, TradeSignals
+
+# Backtest statistics reported by print_results() and optimize()
+RESULT_METRICS = [
+    "Start",
+    "End",
+    "Duration",
+    "Exposure Time [%]",
+    "Equity Final [$]",
+    "Equity Peak [$]",
+    "Return [%]",
+    "Buy & Hold Return [%]",
+    "Return (Ann.) [%]",
+    "Volatility (Ann.) [%]",
+    "Sharpe Ratio",
+    "Sortino Ratio",
+    "Calmar Ratio",
+    "Max. Drawdown [%]",
+    "Avg. Drawdown [%]",
+    "Max. Drawdown Duration",
+    "Avg. Drawdown Duration",
+    "# Trades",
+    "Win Rate [%]",
+    "Best Trade [%]",
+    "Worst Trade [%]",
+    "Avg. Trade [%]",
+    "Max. Trade Duration",
+    "Avg. Trade Duration",
+    "Profit Factor",
+    "Expectancy [%]",
+    "SQN",
+]
+
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+# Engines that can run the backtests: the backtesting.py library or the
+# built-in BacktestEngine, which gives the same results faster
+ENGINES = ["backtesting", "native"]
+
+
+class _HistoryView:
+    """
+    Historical OHLCV data handed to the wrapped strategy, in the same shape as
+    MarketHistory. The dataframe grows by one row at each bar without copying,
+    up to the number of bars required by the strategy
+    """
+
+    COLUMNS = [
+        MarketHistory.CLOSE_COLUMN,
+        MarketHistory.HIGH_COLUMN,
+        MarketHistory.LOW_COLUMN,
+        MarketHistory.VOLUME_COLUMN,
+    ]
+
+    dataframe: pd.DataFrame
+
+    def __init__(
+        self,
+        close: np.ndarray,
+        high: np.ndarray,
+        low: np.ndarray,
+        volume: np.ndarray,
+    ) -> None:
+        # Preallocate one buffer for the whole backtest so that each bar only
+        # needs to slice it rather than rebuild the history from scratch
+        self._buffer = np.empty((len(close), len(self.COLUMNS)), dtype=float)
+        for i, column in enumerate([close, high, low, volume]):
+            self._buffer[:, i] = column
+        self._frame = pd.DataFrame(self._buffer, columns=self.COLUMNS, copy=False)
+        self.dataframe = self._frame.iloc[:0]
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """The whole history, regardless of the current length"""
+        return self._frame
+
+    @property
+    def close(self) -> np.ndarray:
+        return self._buffer[:, 0]
+
+    def set_length(self, length: int, lookback: Optional[int] = None) -> None:
+        """
+        Expose the first length bars of the history, or only the most recent
+        lookback bars of them
+        """
+        start = 0 if lookback is None else max(0, length - lookback)
+        self.dataframe = self._frame.iloc[start:length]
 
 
 class TradingBotStrategy(BacktestStrategy):
     """
-    Adapter class that wraps our TradingBot strategies to work with backtesting.py
+    Adapter class that wraps our TradingBot strategies to work with backtesting.py.
+    The TradingBot strategy and its signals are parameters of each run, given
+    to Backtest.run(), so that concurrent backtests do not share any state
     """
 
+    # backtesting.py parameters, set on the instance by Backtest.run()
+    wrapped_strategy: Optional[StrategyImpl] = None
+    signals: Optional[TradeSignals] = None
+
     def init(self):
         """Initialize the strategy with the wrapped TradingBot strategy"""
-        # The wrapped strategy will be set externally
-        self.wrapped_strategy = None
-        self.signals = []
+        # backtesting.py exposes the full dataset during init()
+        self.history = _HistoryView(
+            self.data.Close, self.data.High, self.data.Low, self.data.Volume
+        )
+        self.market = Market()
+        self.market.epic = "BACKTEST"
+        self.market.id = "BACKTEST"
+        if self.wrapped_strategy is not None:
+            self.set_wrapped_strategy(self.wrapped_strategy, self.signals)
+
+    def set_wrapped_strategy(
+        self, strategy: StrategyImpl, signals: Optional[TradeSignals] = None
+    ) -> None:
+        """
+        Set the TradingBot strategy to backtest. If the strategy supports it, the
+        signals of all the bars are computed here in a single pass, unless
+        they have been computed already and are provided with signals
+        """
+        self.wrapped_strategy = strategy
+        if signals is None:
+            signals = strategy.find_trade_signals(self.history.frame)
+        self.signals = signals
 
     def next(self):
         """Called on each bar to generate trading signals"""
         if self.wrapped_strategy is None:
             return
 
-        # Create a mock market object with current price data
-        class MockMarket:
-            def __init__(self, data):
-                self.bid = float(data.Close[-1])
-                self.offer = float(data.Close[-1])
-                self.epic = "BACKTEST"
-                self.id = "BACKTEST"
-
-        # Create a mock datapoints object with historical data
-        class MockDatapoints:
-            def __init__(self, df):
-                self.dataframe = df
-
-        # Get all historical data up to current point
-        historical_data = pd.DataFrame(
-            {
-                "close": self.data.Close[:],
-                "high": self.data.High[:],
-                "low": self.data.Low[:],
-                "volume": self.data.Volume[:],
-            }
-        )
+        length = len(self.data)
+        price = float(self.history.close[length - 1])
 
-        mock_market = MockMarket(self.data)
-        mock_datapoints = MockDatapoints(historical_data)
-
-        # Get signal from wrapped strategy
         try:
-            trade_direction, limit, stop = self.wrapped_strategy.find_trade_signal(
-                mock_market, mock_datapoints
-            )
+            if self.signals is not None:
+                trade_direction, limit, stop = self._get_precomputed_signal(length - 1)
+            else:
+                # Update the market snapshot and the history up to the current bar
+                self.market.bid = price
+                self.market.offer = price
+                self.history.set_length(length, self.wrapped_strategy.required_lookback)
+                trade_direction, limit, stop = self.wrapped_strategy.find_trade_signal(
+                    self.market, self.history
+                )
+            self._execute_signal(trade_direction, limit, stop, price)
+        except Exception as e:
+            logging.debug(f"Error in strategy execution: {e}")
+
+    def _get_precomputed_signal(self, index: int) -> TradeSignal:
+        assert self.signals is not None
+        direction, limits, stops = self.signals
+        limit = None if np.isnan(limits[index]) else float(limits[index])
+        stop = None if np.isnan(stops[index]) else float(stops[index])
+        return direction[index], limit, stop
 
-            # Execute trades based on signal
-            if trade_direction == TradeDirection.BUY:
-                if not self.position:
-                    # Calculate position size based on stop loss if available
-                    if stop and stop > 0:
-                        risk_per_trade = self.equity * 0.02  # Risk 2% per trade
-                        stop_distance = abs(self.data.Close[-1] - stop)
-                        if stop_distance > 0:
-                            size = risk_per_trade / stop_distance
-                            self.buy(size=min(size, 1.0), sl=stop, tp=limit)
-                        else:
-                            self.buy()
+    def _execute_signal(
+        self,
+        trade_direction: TradeDirection,
+        limit: Optional[float],
+        stop: Optional[float],
+        price: float,
+    ) -> None:
+        """Place or close orders based on the strategy signal"""
+        if trade_direction is None or pd.isna(trade_direction):
+            # No signal, e.g. while the indicators warm up, keeps the trade open
+            return
+        if trade_direction == TradeDirection.BUY:
+            if not self.position:
+                # Calculate position size based on stop loss if available
+                if stop and stop > 0:
+                    risk_per_trade = self.equity * 0.02  # Risk 2% per trade
+                    stop_distance = abs(price - stop)
+                    if stop_distance > 0:
+                        size = risk_per_trade / stop_distance
+                        self.buy(size=min(size, 1.0), sl=stop, tp=limit)
                     else:
                         self.buy()
+                else:
+                    self.buy()
 
-            elif trade_direction == TradeDirection.SELL:
-                if not self.position:
-                    # Calculate position size based on stop loss if available
-                    if stop and stop > 0:
-                        risk_per_trade = self.equity * 0.02  # Risk 2% per trade
-                        stop_distance = abs(stop - self.data.Close[-1])
-                        if stop_distance > 0:
-                            size = risk_per_trade / stop_distance
-                            self.sell(size=min(size, 1.0), sl=stop, tp=limit)
-                        else:
-                            self.sell()
+        elif trade_direction == TradeDirection.SELL:
+            if not self.position:
+                # Calculate position size based on stop loss if available
+                if stop and stop > 0:
+                    risk_per_trade = self.equity * 0.02  # Risk 2% per trade
+                    stop_distance = abs(stop - price)
+                    if stop_distance > 0:
+                        size = risk_per_trade / stop_distance
+                        self.sell(size=min(size, 1.0), sl=stop, tp=limit)
                     else:
                         self.sell()
+                else:
+                    self.sell()
 
-            # Close position if we get opposite signal
-            elif self.position:
-                self.position.close()
+        # Close position if we get opposite signal
+        elif self.position:
+            self.position.close()
 
+
+def _find_signals_per_bar(
+    strategy: StrategyImpl, history: _HistoryView
+) -> TradeSignals:
+    """
+    Ask the strategy for the signal of every bar as TradingBotStrategy.next()
+    does, for the strategies that do not implement find_trade_signals(). The
+    direction is None for the bars without a signal
+    """
+    bars = len(history.frame)
+    direction = np.full(bars, None, dtype=object)
+    limit = np.full(bars, np.nan)
+    stop = np.full(bars, np.nan)
+    market = Market()
+    market.epic = "BACKTEST"
+    market.id = "BACKTEST"
+    # backtesting.py runs the strategy from the second bar
+    for i in range(1, bars):
+        price = float(history.close[i])
+        market.bid = price
+        market.offer = price
+        history.set_length(i + 1, strategy.required_lookback)
+        try:
+            direction[i], bar_limit, bar_stop = strategy.find_trade_signal(
+                market, cast(MarketHistory, history)
+            )
         except Exception as e:
             logging.debug(f"Error in strategy execution: {e}")
+            continue
+        limit[i] = np.nan if bar_limit is None else bar_limit
+        stop[i] = np.nan if bar_stop is None else bar_stop
+    return direction, limit, stop
+
+
+class SharedData:
+    """
+    OHLCV dataframe published in shared memory, so that worker processes can
+    use it without parsing the CSV file again or copying the data
+    """
+
+    # (shared memory name, number of rows, index timezone)
+    Descriptor = Tuple[str, int, Optional[str]]
+
+    def __init__(self, data: pd.DataFrame) -> None:
+        rows = len(data)
+        index = pd.DatetimeIndex(data.index)
+        self._memory = SharedMemory(create=True, size=max(1, rows * 8 * 6))
+        shared_index, shared_values = self._arrays(self._memory, rows)
+        shared_index[:] = (
+            index.tz_localize(None).to_numpy(dtype="datetime64[ns]").view(np.int64)
+        )
+        shared_values[:] = data[OHLCV_COLUMNS].to_numpy(dtype=float)
+        self.descriptor = (
+            self._memory.name,
+            rows,
+            str(index.tz) if index.tz is not None else None,
+        )
+
+    def __enter__(self) -> "SharedData":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.release()
+
+    def release(self) -> None:
+        """Free the shared memory. Workers must not use the data anymore"""
+        self._memory.close()
+        self._memory.unlink()
+
+    @staticmethod
+    def _arrays(memory: SharedMemory, rows: int) -> Tuple[np.ndarray, np.ndarray]:
+        index = np.ndarray((rows,), dtype=np.int64, buffer=memory.buf)
+        values = np.ndarray(
+            (rows, len(OHLCV_COLUMNS)), dtype=float, buffer=memory.buf, offset=rows * 8
+        )
+        return index, values
+
+    @staticmethod
+    def attach(descriptor: "SharedData.Descriptor") -> pd.DataFrame:
+        """
+        Return a dataframe backed by the shared memory described by descriptor.
+        The memory stays mapped for the lifetime of the calling process
+        """
+        name, rows, tz = descriptor
+        if sys.version_info >= (3, 13):
+            memory = SharedMemory(name=name, track=False)
+        else:
+            # Only the creator unlinks the memory, so attaching must not register
+            # it with the resource tracker (python/cpython#82300)
+            register = resource_tracker.register
+            resource_tracker.register = lambda *args, **kwargs: None
+            try:
+                memory = SharedMemory(name=name)
+            finally:
+                resource_tracker.register = register
+        _attached_memory.append(memory)
+        index, values = SharedData._arrays(memory, rows)
+        date_index = pd.DatetimeIndex(index.view("datetime64[ns]"), name="Date")
+        if tz is not None:
+            date_index = date_index.tz_localize(tz)
+        return pd.DataFrame(values, index=date_index, columns=OHLCV_COLUMNS, copy=False)
+
+
+# State of the worker processes used by the Backtester
+_attached_memory: List[SharedMemory] = []
+_worker_data: Optional[pd.DataFrame] = None
+# Signals of the whole worker data of the most recent parameters combinations
+_worker_signals: Dict[Tuple[Any, ...], Optional[TradeSignals]] = {}
+_WORKER_SIGNALS_SIZE = 4
+
+
+def _init_worker(descriptor: SharedData.Descriptor) -> None:
+    global _worker_data
+    _worker_data = SharedData.attach(descriptor)
+    _worker_signals.clear()
+
+
+def _run_optimization(
+    raw_config: ConfigDict,
+    strategy_name: str,
+    params: Dict[str, Any],
+    cash: float,
+    commission: float,
+    engine: str,
+    result_cache: Optional[BacktestResultCache],
+) -> Dict[str, Any]:
+    """Backtest one parameters combination on the worker data"""
+    if _worker_data is None:
+        raise RuntimeError("Worker data not initialised")
+    # Strategies do not use the broker when backtesting
+    factory = StrategyFactory(Configuration(raw_config), cast(Broker, None))
+    strategy = factory.make_strategy_with_params(strategy_name, params)
+    backtester = Backtester(strategy, engine=engine, result_cache=result_cache)
+    backtester.run(_worker_data, cash=cash, commission=commission)
+    return {**params, **backtester.get_metrics()}
+
+
+def _get_worker_signals(
+    strategy: StrategyImpl, params: Dict[str, Any]
+) -> Optional[TradeSignals]:
+    """
+    Return the signals of the strategy over the whole worker data, computing
+    them only the first time the parameters combination is seen
+    """
+    assert _worker_data is not None
+    key = (type(strategy).__name__, *sorted(params.items()))
+    if key not in _worker_signals:
+        if len(_worker_signals) >= _WORKER_SIGNALS_SIZE:
+            del _worker_signals[next(iter(_worker_signals))]
+        history = _HistoryView(
+            *(_worker_data[c].to_numpy() for c in ["Close", "High", "Low", "Volume"])
+        )
+        _worker_signals[key] = strategy.find_trade_signals(history.frame)
+    return _worker_signals[key]
+
+
+def _run_windows(
+    raw_config: ConfigDict,
+    strategy_name: str,
+    params: Dict[str, Any],
+    windows: List[Tuple[int, int]],
+    cash: float,
+    commission: float,
+    engine: str,
+) -> List[Dict[str, Any]]:
+    """
+    Backtest one parameters combination on each (start, stop) rows range of the
+    worker data. The indicators are computed once over the whole data and
+    sliced for each window
+    """
+    if _worker_data is None:
+        raise RuntimeError("Worker data not initialised")
+    factory = StrategyFactory(Configuration(raw_config), cast(Broker, None))
+    strategy = factory.make_strategy_with_params(strategy_name, params)
+    signals = _get_worker_signals(strategy, params)
+    results = []
+    for start, stop in windows:
+        window_signals = None
+        if signals is not None:
+            direction, limit, stop_level = signals
+            window_signals = (
+                direction[start:stop],
+                limit[start:stop],
+                stop_level[start:stop],
+            )
+        backtester = Backtester(strategy, engine=engine)
+        backtester.run(
+            _worker_data.iloc[start:stop],
+            cash=cash,
+            commission=commission,
+            signals=window_signals,
+        )
+        results.append(backtester.get_metrics())
+    return results
 
 
 class Backtester:
     """
-    Provides capability to backtest strategies using backtesting.py library
+    Provides capability to backtest strategies using backtesting.py library or
+    the equivalent built-in BacktestEngine.
+    Strategies implementing find_trade_signals() are evaluated in a single
+    vectorised pass, the others are asked for a signal at every bar
     """
 
     strategy: StrategyImpl
     result: Optional[pd.Series]
     backtest: Optional[Backtest]
+    cache: Optional[OHLCVCache]
+    timeframe: Optional[str]
+    chunksize: Optional[int]
+    engine: str
+    result_cache: Optional[BacktestResultCache]
 
-    def __init__(self, strategy: StrategyImpl) -> None:
+    def __init__(
+        self,
+        strategy: StrategyImpl,
+        cache: Optional[OHLCVCache] = None,
+        timeframe: Optional[str] = None,
+        chunksize: Optional[int] = None,
+        engine: str = "backtesting",
+        result_cache: Optional[BacktestResultCache] = None,
+    ) -> None:
+        """
+        - **strategy**: the strategy to backtest
+        - **cache**: cache of the data loaded from CSV files, if any
+        - **timeframe**: resample the CSV data to this timeframe while reading
+          it, as Interval name (e.g. HOUR) or pandas frequency (e.g. 1h). This
+          also allows to load files of Bid/Ask ticks (see OHLCVStream)
+        - **chunksize**: read the CSV files this number of rows at a time to
+          bound memory usage, used by default when timeframe is set
+        - **engine**: "backtesting" to run the backtests with backtesting.py or
+          "native" to use the faster BacktestEngine, which does not support
+          plot_results()
+        - **result_cache**: cache of the backtest results, if any. Results
+          loaded from the cache cannot be plotted
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"Invalid engine {engine}, expected one of {ENGINES}")
         logging.info("Backtester created")
         self.strategy = strategy
         self.result = None
         self.backtest = None
+        self.cache = cache
+        self.timeframe = timeframe
+        self.chunksize = chunksize
+        self.engine = engine
+        self.result_cache = result_cache
 
     def load_data_from_csv(self, csv_path: str) -> pd.DataFrame:
         """
         Load OHLCV data from CSV file.
         Expected columns: Gmt time, Open, High, Low, Close, Volume
+        If the Backtester has a cache, the parsed data is read from and stored
+        in the cache, in which case only the numeric columns are returned.
+        If the Backtester has a timeframe or chunksize, the file is streamed
+        with OHLCVStream
         """
+        variant = self.timeframe or ""
+        if self.cache is not None:
+            data = self.cache.load(csv_path, variant)
+            if data is not None:
+                return data
+        if self.timeframe is None and self.chunksize is None:
+            data = self._parse_csv(csv_path)
+        else:
+            data = OHLCVStream(
+                csv_path, self.timeframe, self.chunksize or DEFAULT_CHUNKSIZE
+            ).load()
+        if self.cache is not None:
+            self.cache.store(csv_path, data, variant)
+            cached = self.cache.load(csv_path, variant)
+            if cached is not None:
+                return cached
+        return data
+
+    def load_data_from_store(
+        self,
+        store: OHLCVStore,
+        epic: str,
+        interval: str,
+        start: Optional[pd.Timestamp] = None,
+        end: Optional[pd.Timestamp] = None,
+    ) -> pd.DataFrame:
+        """
+        Load the OHLCV bars of the market stored by the bot between start and
+        end included, e.g. to backtest on the same data traded live.
+        Raise ValueError if there are no complete bars
+        """
+        data = store.read(epic, interval, start, end).dropna()
+        if data.empty:
+            raise ValueError(f"No OHLCV data of {epic} {interval} in {store.db_path}")
+        logging.info(
+            f"Loaded {len(data)} rows of {epic} {interval} from {data.index[0]} "
+            f"to {data.index[-1]}"
+        )
+        return data
+
+    def _parse_csv(self, csv_path: str) -> pd.DataFrame:
+        """Parse and clean the OHLCV data of the CSV file"""
         logging.info(f"Loading data from {csv_path}")
 
         # Read CSV
@@ -173,7 +576,7 @@ class Backtester:
 
     def start(
         self, csv_path: str, cash: float = 10000, commission: float = 0.002
-    ) -> None:
+    ) -> pd.Series:
         """
         Run backtest on data from CSV file
 
@@ -182,40 +585,366 @@ class Backtester:
             cash: Initial cash amount (default: 10000)
             commission: Commission percentage per trade (default: 0.002 = 0.2%)
         """
+        # Load data
+        data = self.load_data_from_csv(csv_path)
+        return self.run(data, cash=cash, commission=commission)
+
+    def run(
+        self,
+        data: pd.DataFrame,
+        cash: float = 10000,
+        commission: float = 0.002,
+        signals: Optional[TradeSignals] = None,
+    ) -> pd.Series:
+        """
+        Run backtest on an OHLCV dataframe as returned by load_data_from_csv()
+
+        Args:
+            data: Dataframe with Open, High, Low, Close, Volume columns
+            cash: Initial cash amount (default: 10000)
+            commission: Commission percentage per trade (default: 0.002 = 0.2%)
+            signals: Signals of the strategy for each row of data, as returned
+                by find_trade_signals(), if already computed
+        """
         logging.info(
             f"Starting backtest with {cash} initial cash and {commission * 100}% commission"
         )
+        # Signals given by the caller are not part of the key of cached results
+        key = None
+        if signals is None:
+            key = self._get_result_key(data, cash, commission)
+        if self.result_cache is not None and key is not None:
+            cached = self.result_cache.load(key)
+            if cached is not None:
+                self.backtest = None
+                self.result = cached
+                return self.result
 
-        # Load data
-        data = self.load_data_from_csv(csv_path)
+        if self.engine == "native":
+            self.result = self._run_native(data, cash, commission, signals)
+        else:
+            # Create backtesting.py Backtest instance
+            self.backtest = Backtest(
+                data,
+                TradingBotStrategy,
+                cash=cash,
+                commission=commission,
+                exclusive_orders=True,
+            )
+
+            # Run backtest, injecting our strategy as parameter of this run only
+            logging.info("Running backtest...")
+            self.result = self.backtest.run(
+                wrapped_strategy=self.strategy, signals=signals
+            )
+            logging.info("Backtest completed")
+        if self.result_cache is not None and key is not None:
+            self.result_cache.store(key, self.result)
+        return self.result
 
-        # Create backtesting.py Backtest instance
-        self.backtest = Backtest(
+    def _get_result_key(
+        self, data: pd.DataFrame, cash: float, commission: float
+    ) -> Optional[str]:
+        """
+        Return the key of the backtest result in the result cache, or None if
+        there is no cache or the strategy is not one of the configured ones
+        """
+        if self.result_cache is None:
+            return None
+        try:
+            strategy_name = StrategyFactory.get_strategy_name(self.strategy)
+        except ValueError:
+            return None
+        strategies = self.strategy.config.get_raw_config().get("strategies", {})
+        return self.result_cache.make_key(
             data,
-            TradingBotStrategy,
-            cash=cash,
-            commission=commission,
-            exclusive_orders=True,
+            self.strategy,
+            strategies.get(strategy_name, {}),
+            cash,
+            commission,
+            self.engine,
         )
 
-        # Inject our strategy into the backtesting strategy
-        # We need to do this via a custom init
-        original_init = TradingBotStrategy.init
+    def _run_native(
+        self,
+        data: pd.DataFrame,
+        cash: float,
+        commission: float,
+        signals: Optional[TradeSignals],
+    ) -> pd.Series:
+        """Run the backtest with the BacktestEngine"""
+        if signals is None:
+            history = _HistoryView(
+                *(data[c].to_numpy() for c in ["Close", "High", "Low", "Volume"])
+            )
+            signals = self.strategy.find_trade_signals(history.frame)
+            if signals is None:
+                signals = _find_signals_per_bar(self.strategy, history)
+        logging.info("Running backtest...")
+        self.backtest = None
+        result = BacktestEngine(data, cash, commission).run(signals)
+        logging.info("Backtest completed")
+        return result
+
+    def optimize(
+        self,
+        csv_path: str,
+        param_grid: Mapping[str, Sequence[Any]],
+        cash: float = 10000,
+        commission: float = 0.002,
+        rank_by: str = "SQN",
+        max_workers: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        Backtest every combination of the strategy parameters in parallel
 
-        def custom_init(bt_strategy):
-            original_init(bt_strategy)
-            bt_strategy.wrapped_strategy = self.strategy
+        Args:
+            csv_path: Path to CSV file with OHLCV data
+            param_grid: Values to test for each parameter of the strategy
+                configuration section, e.g. {"price_bins": [20, 30, 40]}
+            cash: Initial cash amount (default: 10000)
+            commission: Commission percentage per trade (default: 0.002 = 0.2%)
+            rank_by: Metric used to rank the results, highest first (default: SQN)
+            max_workers: Number of worker processes (default: number of CPUs)
 
-        TradingBotStrategy.init = custom_init  # type: ignore
+        Returns a dataframe with one row per combination, with the parameters and
+        the metrics reported by print_results()
+        """
+        strategy_name = StrategyFactory.get_strategy_name(self.strategy)
+        raw_config = self.strategy.config.get_raw_config()
+        names = list(param_grid.keys())
+        combinations = self._make_combinations(param_grid, rank_by)
 
-        # Run backtest
-        logging.info("Running backtest...")
-        self.result = self.backtest.run()
+        data = self.load_data_from_csv(csv_path)
+        max_workers = max_workers or os.cpu_count() or 1
+        logging.info(
+            f"Optimizing {strategy_name} over {len(combinations)} combinations "
+            f"with {max_workers} workers"
+        )
+        results = []
+        with SharedData(data) as shared, ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker,
+            initargs=(shared.descriptor,),
+        ) as pool:
+            futures = [
+                pool.submit(
+                    _run_optimization,
+                    raw_config,
+                    strategy_name,
+                    params,
+                    cash,
+                    commission,
+                    self.engine,
+                    self.result_cache,
+                )
+                for params in combinations
+            ]
+            for done, future in enumerate(as_completed(futures), start=1):
+                results.append(future.result())
+                logging.info(f"Completed {done}/{len(combinations)} backtests")
 
-        # Restore original init
-        TradingBotStrategy.init = original_init  # type: ignore
+        table = pd.DataFrame(results, columns=names + RESULT_METRICS)
+        return table.sort_values(
+            rank_by, ascending=False, na_position="last", ignore_index=True
+        )
 
-        logging.info("Backtest completed")
+    def walk_forward(
+        self,
+        csv_path: str,
+        param_grid: Mapping[str, Sequence[Any]],
+        in_sample: int,
+        out_of_sample: int,
+        cash: float = 10000,
+        commission: float = 0.002,
+        rank_by: str = "SQN",
+        anchored: bool = False,
+        max_workers: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        Walk-forward analysis: optimize the strategy parameters on rolling
+        in-sample windows and backtest the best ones on the following
+        out-of-sample window. The windows move forward by out_of_sample bars
+
+        Args:
+            csv_path: Path to CSV file with OHLCV data
+            param_grid: Values to test for each parameter of the strategy
+                configuration section, e.g. {"price_bins": [20, 30, 40]}
+            in_sample: Number of bars of the in-sample windows
+            out_of_sample: Number of bars of the out-of-sample windows
+            cash: Initial cash amount of each window backtest (default: 10000)
+            commission: Commission percentage per trade (default: 0.002 = 0.2%)
+            rank_by: Metric used to select the best parameters (default: SQN)
+            anchored: If True the in-sample windows all start from the first bar
+            max_workers: Number of worker processes (default: number of CPUs)
+
+        Returns a dataframe with one row per window, with the in-sample range,
+        the selected parameters, their in-sample rank_by metric and the
+        out-of-sample metrics reported by print_results()
+        """
+        strategy_name = StrategyFactory.get_strategy_name(self.strategy)
+        raw_config = self.strategy.config.get_raw_config()
+        names = list(param_grid.keys())
+        combinations = self._make_combinations(param_grid, rank_by)
+
+        data = self.load_data_from_csv(csv_path)
+        windows = self.walk_forward_windows(
+            len(data), in_sample, out_of_sample, anchored
+        )
+        max_workers = max_workers or os.cpu_count() or 1
+        # Split the windows of each combination in enough groups to keep all
+        # the workers busy. Each task computes the indicators only once
+        groups = min(len(windows), -(-max_workers // len(combinations)))
+        logging.info(
+            f"Walk-forward of {strategy_name} over {len(windows)} windows and "
+            f"{len(combinations)} combinations with {max_workers} workers"
+        )
+        with SharedData(data) as shared, ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker,
+            initargs=(shared.descriptor,),
+        ) as pool:
+            # Optimize on the in-sample windows
+            in_sample_results = np.full((len(windows), len(combinations)), np.nan)
+            futures = {}
+            for c, params in enumerate(combinations):
+                for g in range(groups):
+                    ids = list(range(g, len(windows), groups))
+                    ranges = [(windows[w][0], windows[w][1]) for w in ids]
+                    future = pool.submit(
+                        _run_windows,
+                        raw_config,
+                        strategy_name,
+                        params,
+                        ranges,
+                        cash,
+                        commission,
+                        self.engine,
+                    )
+                    futures[future] = (c, ids)
+            for done, future in enumerate(as_completed(futures), start=1):
+                c, ids = futures[future]
+                for w, metrics in zip(ids, future.result()):
+                    value = metrics.get(rank_by)
+                    in_sample_results[w, c] = np.nan if value is None else value
+                logging.info(f"Completed {done}/{len(futures)} in-sample tasks")
+
+            # Backtest the best combination of each window out-of-sample
+            best = [
+                int(np.nanargmax(row)) if not np.isnan(row).all() else 0
+                for row in in_sample_results
+            ]
+            futures = {}
+            for c in sorted(set(best)):
+                ids = [w for w in range(len(windows)) if best[w] == c]
+                ranges = [(windows[w][1], windows[w][2]) for w in ids]
+                future = pool.submit(
+                    _run_windows,
+                    raw_config,
+                    strategy_name,
+                    combinations[c],
+                    ranges,
+                    cash,
+                    commission,
+                    self.engine,
+                )
+                futures[future] = (c, ids)
+            out_of_sample_results: Dict[int, Dict[str, Any]] = {}
+            for future in as_completed(futures):
+                _, ids = futures[future]
+                out_of_sample_results.update(zip(ids, future.result()))
+
+        rows = []
+        for w, (start, split, _) in enumerate(windows):
+            rows.append(
+                {
+                    "Window": w,
+                    "In-Sample Start": data.index[start],
+                    "In-Sample End": data.index[split - 1],
+                    **combinations[best[w]],
+                    f"In-Sample {rank_by}": in_sample_results[w, best[w]],
+                    **out_of_sample_results[w],
+                }
+            )
+        columns = (
+            ["Window", "In-Sample Start", "In-Sample End"]
+            + names
+            + [f"In-Sample {rank_by}"]
+            + RESULT_METRICS
+        )
+        return pd.DataFrame(rows, columns=columns)
+
+    @staticmethod
+    def walk_forward_windows(
+        rows: int, in_sample: int, out_of_sample: int, anchored: bool = False
+    ) -> List[Tuple[int, int, int]]:
+        """
+        Return the (start, split, stop) rows of each walk-forward window, where
+        start:split is the in-sample range and split:stop the out-of-sample one
+        """
+        if in_sample < 2 or out_of_sample < 2:
+            raise ValueError("Walk-forward windows must have at least 2 bars")
+        windows = []
+        split = in_sample
+        while split + out_of_sample <= rows:
+            start = 0 if anchored else split - in_sample
+            windows.append((start, split, split + out_of_sample))
+            split += out_of_sample
+        if not windows:
+            raise ValueError(
+                f"Not enough data for a walk-forward window: {rows} bars, "
+                f"{in_sample + out_of_sample} required"
+            )
+        return windows
+
+    def _make_combinations(
+        self, param_grid: Mapping[str, Sequence[Any]], rank_by: str
+    ) -> List[Dict[str, Any]]:
+        """Return every combination of the parameters after validating them"""
+        if rank_by not in RESULT_METRICS:
+            raise ValueError(f"Unknown metric {rank_by}")
+        names = list(param_grid.keys())
+        combinations = [
+            dict(zip(names, values))
+            for values in itertools.product(*[param_grid[n] for n in names])
+        ]
+        # Fail early on unknown parameters rather than in every worker
+        StrategyFactory(
+            self.strategy.config, self.strategy.broker
+        ).make_strategy_with_params(
+            StrategyFactory.get_strategy_name(self.strategy), combinations[0]
+        )
+        return combinations
+
+    @staticmethod
+    def parse_param_grid(items: List[str]) -> Dict[str, List[Any]]:
+        """
+        Parse strategy parameter values from strings in the format NAME=VALUES,
+        where VALUES is either a comma separated list (e.g. price_bins=20,30,40)
+        or an inclusive range START:STOP:STEP (e.g. lookback_periods=30:70:10)
+        """
+        grid: Dict[str, List[Any]] = {}
+        for item in items:
+            name, sep, values = item.partition("=")
+            if not sep or not name or not values:
+                raise ValueError(f"Invalid parameter {item}, expected NAME=VALUES")
+            if ":" in values:
+                bounds = [_parse_value(v) for v in values.split(":")]
+                if len(bounds) != 3 or bounds[2] <= 0:
+                    raise ValueError(f"Invalid range {item}, expected START:STOP:STEP")
+                start, stop, step = bounds
+                count = int((stop - start) / step + 1e-9) + 1
+                # Round to hide floating point errors of decimal steps
+                grid[name] = [round(start + i * step, 10) for i in range(count)]
+            else:
+                grid[name] = [_parse_value(v) for v in values.split(",")]
+        return grid
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Return the metrics of the last backtest reported by print_results()"""
+        if self.result is None:
+            return {}
+        return {key: self.result.get(key) for key in RESULT_METRICS}
 
     def print_results(self) -> None:
         """Print backtest results"""
@@ -228,35 +957,7 @@ class Backtester:
         logging.info("=" * 60)
 
         # Print key metrics
-        metrics = {
-            "Start": self.result.get("Start"),
-            "End": self.result.get("End"),
-            "Duration": self.result.get("Duration"),
-            "Exposure Time [%]": self.result.get("Exposure Time [%]"),
-            "Equity Final [$]": self.result.get("Equity Final [$]"),
-            "Equity Peak [$]": self.result.get("Equity Peak [$]"),
-            "Return [%]": self.result.get("Return [%]"),
-            "Buy & Hold Return [%]": self.result.get("Buy & Hold Return [%]"),
-            "Return (Ann.) [%]": self.result.get("Return (Ann.) [%]"),
-            "Volatility (Ann.) [%]": self.result.get("Volatility (Ann.) [%]"),
-            "Sharpe Ratio": self.result.get("Sharpe Ratio"),
-            "Sortino Ratio": self.result.get("Sortino Ratio"),
-            "Calmar Ratio": self.result.get("Calmar Ratio"),
-            "Max. Drawdown [%]": self.result.get("Max. Drawdown [%]"),
-            "Avg. Drawdown [%]": self.result.get("Avg. Drawdown [%]"),
-            "Max. Drawdown Duration": self.result.get("Max. Drawdown Duration"),
-            "Avg. Drawdown Duration": self.result.get("Avg. Drawdown Duration"),
-            "# Trades": self.result.get("# Trades"),
-            "Win Rate [%]": self.result.get("Win Rate [%]"),
-            "Best Trade [%]": self.result.get("Best Trade [%]"),
-            "Worst Trade [%]": self.result.get("Worst Trade [%]"),
-            "Avg. Trade [%]": self.result.get("Avg. Trade [%]"),
-            "Max. Trade Duration": self.result.get("Max. Trade Duration"),
-            "Avg. Trade Duration": self.result.get("Avg. Trade Duration"),
-            "Profit Factor": self.result.get("Profit Factor"),
-            "Expectancy [%]": self.result.get("Expectancy [%]"),
-            "SQN": self.result.get("SQN"),
-        }
+        metrics = self.get_metrics()
 
         for key, value in metrics.items():
             if value is not None:
@@ -264,6 +965,45 @@ class Backtester:
 
         logging.info("=" * 60)
 
+    def print_optimization_results(self, table: pd.DataFrame, top: int = 10) -> None:
+        """Print the best rows of the table returned by optimize()"""
+        logging.info("=" * 60)
+        logging.info(f"OPTIMIZATION RESULTS (top {min(top, len(table))})")
+        logging.info("=" * 60)
+        columns = [c for c in table.columns if c not in RESULT_METRICS] + [
+            "Return [%]",
+            "Max. Drawdown [%]",
+            "Sharpe Ratio",
+            "Win Rate [%]",
+            "# Trades",
+            "SQN",
+        ]
+        for line in table[columns].head(top).to_string().splitlines():
+            logging.info(line)
+        logging.info("=" * 60)
+
+    def print_walk_forward_results(self, table: pd.DataFrame) -> None:
+        """Print the windows of the table returned by walk_forward()"""
+        logging.info("=" * 60)
+        logging.info(f"WALK-FORWARD RESULTS ({len(table)} windows)")
+        logging.info("=" * 60)
+        columns = [c for c in table.columns if c not in RESULT_METRICS] + [
+            "Start",
+            "End",
+            "Return [%]",
+            "Max. Drawdown [%]",
+            "# Trades",
+            "SQN",
+        ]
+        for line in table[columns].to_string(index=False).splitlines():
+            logging.info(line)
+        logging.info("=" * 60)
+        # Each window starts with the same cash, so returns are compounded
+        returns = table["Return [%]"].fillna(0) / 100
+        combined = ((1 + returns).prod() - 1) * 100
+        logging.info(f"{'Combined out-of-sample return [%]':35s}: {combined}")
+        logging.info("=" * 60)
+
     def plot_results(self, filename: Optional[str] = None) -> None:
         """
         Plot backtest results
@@ -271,6 +1011,9 @@ class Backtester:
         Args:
             filename: Optional filename to save the plot (e.g., 'backtest_results.html')
         """
+        if self.engine == "native":
+            logging.warning("Plotting requires the backtesting engine")
+            return
         if self.backtest is None:
             logging.warning("No backtest available. Run start() first.")
             return
@@ -279,3 +1022,16 @@ class Backtester:
         self.backtest.plot(filename=filename, open_browser=False)
         if filename:
             logging.info(f"Plot saved to {filename}")
+
+
+def _parse_value(value: str) -> Any:
+    """Convert a command line value to int or float when possible"""
+    value = value.strip()
+    for convert in (int, float):
+        try:
+            return convert(value)
+        except ValueError:
+            pass
+    if value.lower() in ("true", "false"):
+        return value.lower() == "true"
+    return value
@@ -0,0 +1,184 @@
+import heapq
+import itertools
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from . import Interval, Utils
+from .time_provider import TimeAmount, TimeProvider
+
+# Entry of the queue: time the market is due, insertion order and epic
+ScheduleEntry = Tuple[datetime, int, str]
+
+
+class BarScheduler:
+    """
+    Priority queue of the markets keyed by the time their next bar closes. A
+    market is due delay seconds after the close of its bar, and the markets are
+    spread evenly over the following spread seconds, so that the markets whose
+    bars close at the same time are not all processed at once. Times are naive
+    UTC and come from the TimeProvider, so that a virtual clock can drive it
+    """
+
+    time_provider: TimeProvider
+    delay: float
+    spread: float
+    _queue: List[ScheduleEntry]
+    _intervals: Dict[str, Interval]
+    _offsets: Dict[str, float]
+    _closes: Dict[str, datetime]
+    _due: Dict[str, ScheduleEntry]
+    _postponed: Set[str]
+
+    def __init__(
+        self, time_provider: TimeProvider, delay: float = 0.0, spread: float = 0.0
+    ) -> None:
+        """
+        - **time_provider**: the clock of the scheduler
+        - **delay**: seconds after the close of a bar the markets are due
+        - **spread**: seconds the markets are spread over after the delay
+        """
+        if delay < 0 or spread < 0:
+            raise ValueError("Invalid bar close delay or spread")
+        self.time_provider = time_provider
+        self.delay = delay
+        self.spread = spread
+        self._queue = []
+        self._counter = itertools.count()
+        self._intervals = {}
+        self._offsets = {}
+        self._closes = {}
+        self._due = {}
+        self._postponed = set()
+
+    def add(self, epic: str, interval: Interval) -> None:
+        """Schedule the market at the close of its current bar, if not already"""
+        self.add_all([epic], interval)
+
+    def add_all(self, epics: Iterable[str], interval: Interval) -> None:
+        """Schedule the markets at the close of their current bar"""
+        now = self.time_provider.now()
+        added = [epic for epic in dict.fromkeys(epics) if epic not in self._intervals]
+        for epic in added:
+            self._intervals[epic] = interval
+            self._closes[epic] = Utils.get_bar_end(now, interval)
+        if added:
+            self._update_offsets()
+
+    def remove(self, epic: str) -> None:
+        """Remove the market from the schedule"""
+        self.remove_all([epic])
+
+    def remove_all(self, epics: Iterable[str]) -> None:
+        """Remove the markets from the schedule"""
+        removed = [e for e in epics if self._intervals.pop(e, None) is not None]
+        for epic in removed:
+            del self._closes[epic]
+            del self._due[epic]
+            self._postponed.discard(epic)
+        if removed:
+            self._update_offsets()
+
+    def postpone(self, epics: Iterable[str], time: datetime) -> None:
+        """
+        Make the markets due at the given time instead, e.g. the market opening,
+        and at the close of their bars afterwards
+        """
+        for epic in epics:
+            if epic in self._intervals:
+                self._postponed.add(epic)
+                self._push(epic, time)
+
+    def get_epics(self) -> List[str]:
+        """Return the epics of the scheduled markets"""
+        return list(self._intervals)
+
+    def get_due_time(self, epic: str) -> datetime:
+        """Return the time the market is due. Raise KeyError if not scheduled"""
+        return self._due[epic][0]
+
+    def get_next_time(self) -> Optional[datetime]:
+        """Return the time the next market is due, None if none is scheduled"""
+        self._discard_stale()
+        return self._queue[0][0] if self._queue else None
+
+    def pop_due(self) -> List[str]:
+        """
+        Return the epics of the markets due, in order, and schedule them at the
+        close of their next bar
+        """
+        now = self.time_provider.now()
+        epics = []
+        self._discard_stale()
+        while self._queue and self._queue[0][0] <= now:
+            _, _, epic = heapq.heappop(self._queue)
+            epics.append(epic)
+            # Bars missed while processing late are skipped. The postponed
+            # markets are due at the close of the bar they are processed in
+            bar_time = now - self._get_lag(epic)
+            if epic not in self._postponed:
+                bar_time = max(bar_time, self._closes[epic])
+            self._schedule(epic, Utils.get_bar_end(bar_time, self._intervals[epic]))
+            self._discard_stale()
+        return epics
+
+    def wait_for_due(self, until: Optional[datetime] = None) -> List[str]:
+        """
+        Wait for the next markets to be due and return their epics. Return empty
+        at the until time if no market is due before, or at once if no market
+        is scheduled and until is None
+        """
+        while True:
+            next_time = self.get_next_time()
+            if until is not None and (next_time is None or until < next_time):
+                self._wait_until(until)
+                return []
+            if next_time is None:
+                return []
+            self._wait_until(next_time)
+            epics = self.pop_due()
+            if epics:
+                return epics
+
+    def _wait_until(self, time: datetime) -> None:
+        seconds = (time - self.time_provider.now()).total_seconds()
+        if seconds > 0:
+            self.time_provider.wait_for(TimeAmount.SECONDS, seconds)
+
+    def _schedule(self, epic: str, close: datetime) -> None:
+        self._closes[epic] = close
+        self._postponed.discard(epic)
+        self._push(epic, close + self._get_lag(epic))
+        logging.debug(f"{epic} scheduled at {self._due[epic][0]}")
+
+    def _push(self, epic: str, time: datetime) -> None:
+        entry = (time, next(self._counter), epic)
+        self._due[epic] = entry
+        heapq.heappush(self._queue, entry)
+
+    def _discard_stale(self) -> None:
+        """Pop the entries of removed or rescheduled markets"""
+        while self._queue:
+            entry = self._queue[0]
+            if self._due.get(entry[2]) == entry:
+                return
+            heapq.heappop(self._queue)
+
+    def _get_lag(self, epic: str) -> timedelta:
+        return timedelta(seconds=self.delay + self._offsets[epic])
+
+    def _update_offsets(self) -> None:
+        """
+        Spread the markets evenly in the order they were added, moving the due
+        time of the markets not postponed
+        """
+        count = len(self._intervals)
+        self._offsets = {
+            epic: self.spread * i / count for i, epic in enumerate(self._intervals)
+        }
+        for epic, close in self._closes.items():
+            if epic not in self._postponed:
+                time = close + self._get_lag(epic)
+                self._due[epic] = (time, next(self._counter), epic)
+        # A sorted list is a heap, without the entries of the removed markets
+        self._queue = sorted(self._due.values())
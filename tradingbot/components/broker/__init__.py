@@ -3,6 +3,8 @@ from .abstract_interfaces import (  # NOQA # isort:skip
     AccountBalances,
     StocksInterface,
     AccountInterface,
+    StreamingInterface,
+    StreamListener,
 )
 from .av_interface import AVInterface, AVInterval  # NOQA # isort:skip
 from .ig_interface import IGInterface, IG_API_URL  # NOQA # isort:skip
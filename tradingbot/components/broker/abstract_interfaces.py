@@ -1,28 +1,42 @@
-import datetime as dt
-import time
-from abc import abstractmethod
-from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from ...interfaces import Market, MarketHistory, MarketMACD, Position
-from .. import Configuration, Interval, SynchSingleton, TradeDirection
+from .. import Configuration, Interval, RateLimiter, SynchSingleton, TradeDirection
 
 AccountBalances = Tuple[Optional[float], Optional[float]]
+# Listener of a streaming feed, called with the name of the updated item and
+# the values of its changed fields, None for the fields without a value
+StreamListener = Callable[[str, Dict[str, Optional[str]]], None]
 
 
 # TODO ABC can't be used anymore as base class if we define the metaclass
 class AbstractInterface(metaclass=SynchSingleton):
+    # Section of the interface configuration in [stocks_interface]
+    config_section: str
+
     def __init__(self, config: Configuration) -> None:
         self._config = config
-        self._last_call_ts = dt.datetime.now()
+        self._rate_limiter = RateLimiter.from_config(config, self.config_section)
         self.initialise()
 
-    def _wait_before_call(self, timeout: float) -> None:
+    def _wait_before_call(self, endpoint: Optional[str] = None) -> None:
         """
-        Wait between API calls to not overload the server
+        Wait between API calls to not overload the server, as configured in
+        the interface section. Calls from concurrent threads wait for their turn
         """
-        while (dt.datetime.now() - self._last_call_ts) <= dt.timedelta(seconds=timeout):
-            time.sleep(0.5)
-        self._last_call_ts = dt.datetime.now()
+        self._rate_limiter.wait(endpoint)
+
+    async def _wait_before_call_async(self, endpoint: Optional[str] = None) -> None:
+        """Asynchronous _wait_before_call(), sharing the same rate limits"""
+        await self._rate_limiter.wait_async(endpoint)
+
+    async def close_async(self) -> None:
+        """Release the resources used by the asynchronous calls"""
+        pass
 
     @abstractmethod
     def initialise(self) -> None:
@@ -58,6 +72,10 @@ class AccountInterface(AbstractInterface):
     def get_market_info(self, market_ticker: str) -> Market:
         pass
 
+    def get_market_infos(self, market_tickers: List[str]) -> List[Market]:
+        # Interfaces with a multiple markets request override it
+        return [self.get_market_info(ticker) for ticker in market_tickers]
+
     @abstractmethod
     def search_market(self, search_string: str) -> List[Market]:
         pass
@@ -88,6 +106,22 @@ class AccountInterface(AbstractInterface):
     def navigate_market_node(self, node_id: str) -> Dict[str, Any]:
         pass
 
+    # Asynchronous calls. By default they run the synchronous ones in a worker
+    # thread, interfaces with an asynchronous client override them
+    async def get_open_positions_async(self) -> List[Position]:
+        return await asyncio.to_thread(self.get_open_positions)
+
+    async def get_market_info_async(self, market_ticker: str) -> Market:
+        return await asyncio.to_thread(self.get_market_info, market_ticker)
+
+    async def get_market_infos_async(self, market_tickers: List[str]) -> List[Market]:
+        return await asyncio.to_thread(self.get_market_infos, market_tickers)
+
+    async def trade_async(
+        self, ticker: str, direction: TradeDirection, limit: float, stop: float
+    ) -> bool:
+        return await asyncio.to_thread(self.trade, ticker, direction, limit, stop)
+
 
 class StocksInterface(AbstractInterface):
     # This MUST not be overwritten. Use the "initialise()" to init a children interface
@@ -105,3 +139,78 @@ class StocksInterface(AbstractInterface):
         self, market: Market, interval: Interval, data_range: int
     ) -> MarketMACD:
         pass
+
+    # Asynchronous calls. By default they run the synchronous ones in a worker
+    # thread, interfaces with an asynchronous client override them
+    async def get_prices_async(
+        self, market: Market, interval: Interval, data_range: int
+    ) -> MarketHistory:
+        return await asyncio.to_thread(self.get_prices, market, interval, data_range)
+
+
+class StreamingInterface(ABC):
+    """
+    Push feed of the market prices, modelled on the IG Lightstreamer API. The
+    items are MARKET:<epic>, the prices of a market with the MARKET_FIELDS,
+    and CHART:<epic>:<scale>, the candle of a market being built with the
+    CANDLE_FIELDS, where CONS_END is 1 once the candle is complete and UTM is
+    the time of the last update in milliseconds. The supported scales are the
+    CANDLE_SCALES. Listeners are called by the thread of the feed
+    """
+
+    MARKET_FIELDS = ["BID", "OFFER", "HIGH", "LOW", "UPDATE_TIME"]
+    CANDLE_FIELDS = [
+        "BID_OPEN",
+        "BID_HIGH",
+        "BID_LOW",
+        "BID_CLOSE",
+        "LTV",
+        "UTM",
+        "CONS_END",
+    ]
+    CANDLE_SCALES = ["1MINUTE", "5MINUTE", "HOUR"]
+
+    _listeners: List[StreamListener]
+
+    def __init__(self, config: Configuration) -> None:
+        self._config = config
+        self._listeners = []
+        self._listeners_lock = threading.Lock()
+
+    @abstractmethod
+    def connect(self) -> None:
+        pass
+
+    @abstractmethod
+    def disconnect(self) -> None:
+        pass
+
+    @abstractmethod
+    def subscribe(self, items: List[str]) -> None:
+        pass
+
+    @abstractmethod
+    def unsubscribe(self, items: List[str]) -> None:
+        pass
+
+    def add_listener(self, listener: StreamListener) -> None:
+        with self._listeners_lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: StreamListener) -> None:
+        with self._listeners_lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def _notify(self, item: str, values: Dict[str, Optional[str]]) -> None:
+        """
+        Pass an update of the feed to the listeners. Implementations call it
+        for every update of a subscribed item
+        """
+        with self._listeners_lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(item, values)
+            except Exception as e:
+                logging.error(f"Stream listener exception caught: {e}")
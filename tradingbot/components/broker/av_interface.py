@@ -33,6 +33,8 @@ class AVInterface(StocksInterface):
     and return the result in useful format handling possible errors.
     """
 
+    config_section = "alpha_vantage"
+
     def initialise(self) -> None:
         logging.info("Initialising AVInterface...")
         api_key = self._config.get_credentials()["av_api_key"]
@@ -97,6 +99,7 @@ class AVInterface(StocksInterface):
             data["3. low"].values,
             data["4. close"].values,
             data["5. volume"].values,
+            data["1. open"].values,
         )
         return history
 
@@ -107,7 +110,7 @@ class AVInterface(StocksInterface):
             - **marketId**: string representing an AlphaVantage compatible market id
             - Returns **None** if an error occurs otherwise the pandas dataframe
         """
-        self._wait_before_call(self._config.get_alphavantage_api_timeout())
+        self._wait_before_call("daily")
         market = self._format_market_id(marketId)
         try:
             data, meta_data = self.TS.get_daily(symbol=market, outputsize="full")
@@ -128,7 +131,7 @@ class AVInterface(StocksInterface):
             - **interval**: string representing an AlphaVantage interval type
             - Returns **None** if an error occurs otherwise the pandas dataframe
         """
-        self._wait_before_call(self._config.get_alphavantage_api_timeout())
+        self._wait_before_call("intraday")
         market = self._format_market_id(marketId)
         try:
             data, meta_data = self.TS.get_intraday(
@@ -149,7 +152,7 @@ class AVInterface(StocksInterface):
             - **marketId**: string representing an AlphaVantage compatible market id
             - Returns **None** if an error occurs otherwise the pandas dataframe
         """
-        self._wait_before_call(self._config.get_alphavantage_api_timeout())
+        self._wait_before_call("weekly")
         market = self._format_market_id(marketId)
         try:
             data, meta_data = self.TS.get_weekly(symbol=market)
@@ -168,7 +171,7 @@ class AVInterface(StocksInterface):
             - **market_id**: string representing the market id to fetch data of
             - Returns **None** if an error occurs otherwise the pandas dataframe
         """
-        self._wait_before_call(self._config.get_alphavantage_api_timeout())
+        self._wait_before_call("quote_endpoint")
         market = self._format_market_id(market_id)
         try:
             data, meta_data = self.TS.get_quote_endpoint(
@@ -203,7 +206,7 @@ class AVInterface(StocksInterface):
             - **interval**: string representing an AlphaVantage interval type
             - Returns **None** if an error occurs otherwise the pandas dataframe
         """
-        self._wait_before_call(self._config.get_alphavantage_api_timeout())
+        self._wait_before_call("macdext")
         market = self._format_market_id(marketId)
         data, meta_data = self.TI.get_macdext(
             market,
@@ -226,7 +229,7 @@ class AVInterface(StocksInterface):
             - **interval**: string representing an AlphaVantage interval type
             - Returns **None** if an error occurs otherwise the pandas dataframe
         """
-        self._wait_before_call(self._config.get_alphavantage_api_timeout())
+        self._wait_before_call("macd")
         market = self._format_market_id(marketId)
         data, meta_data = self.TI.get_macd(
             market,
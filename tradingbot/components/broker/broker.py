@@ -1,7 +1,8 @@
+from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 from ...interfaces import Market, MarketHistory, MarketMACD, Position
-from .. import Interval, TradeDirection
+from .. import Interval, OHLCVStore, PriceHistoryCache, TradeDirection
 from . import AccountInterface, BrokerFactory, StocksInterface
 
 
@@ -14,11 +15,18 @@ class Broker:
     factory: BrokerFactory
     stocks_ifc: StocksInterface
     account_ifc: AccountInterface
+    price_cache: Optional[PriceHistoryCache]
 
     def __init__(self, factory: BrokerFactory) -> None:
         self.factory = factory
         self.stocks_ifc = self.factory.make_stock_interface_from_config()
         self.account_ifc = self.factory.make_account_interface_from_config()
+        self.price_cache = None
+        config = self.factory.config
+        if config.is_price_cache_enabled():
+            database = config.get_price_cache_database()
+            store = OHLCVStore(Path(database)) if database else None
+            self.price_cache = PriceHistoryCache(store)
 
     def get_open_positions(self) -> List[Position]:
         """
@@ -70,6 +78,13 @@ class Broker:
         """
         return self.account_ifc.get_market_info(market_id)
 
+    def get_market_infos(self, market_ids: List[str]) -> List[Market]:
+        """
+        Return the last available snapshots of the requested markets, fetching
+        many of them with each request when the interface supports it
+        """
+        return self.account_ifc.get_market_infos(market_ids)
+
     def search_market(self, search: str) -> List[Market]:
         """
         Search for a market from a search string
@@ -95,5 +110,66 @@ class Broker:
             - interval: resolution of the time series: minute, hours, etc.
             - data_range: amount of past datapoint to fetch
             - Returns the MarketHistory instance
+
+        When the price cache is enabled only the bars after the cached ones are
+        requested to the interface
+        """
+        if self.price_cache is None or not data_range:
+            return self.stocks_ifc.get_prices(market, interval, data_range)
+        return self.price_cache.get_prices(
+            market,
+            interval,
+            data_range,
+            lambda bars: self.stocks_ifc.get_prices(market, interval, bars),
+        )
+
+    async def get_open_positions_async(self) -> List[Position]:
+        """
+        Asynchronous get_open_positions()
+        """
+        return await self.account_ifc.get_open_positions_async()
+
+    async def get_market_info_async(self, market_id: str) -> Market:
+        """
+        Asynchronous get_market_info()
+        """
+        return await self.account_ifc.get_market_info_async(market_id)
+
+    async def get_market_infos_async(self, market_ids: List[str]) -> List[Market]:
+        """
+        Asynchronous get_market_infos()
+        """
+        return await self.account_ifc.get_market_infos_async(market_ids)
+
+    async def trade_async(
+        self, market_id: str, trade_direction: TradeDirection, limit: float, stop: float
+    ) -> bool:
+        """
+        Asynchronous trade()
+        """
+        return await self.account_ifc.trade_async(
+            market_id, trade_direction, limit, stop
+        )
+
+    async def get_prices_async(
+        self, market: Market, interval: Interval, data_range: int
+    ) -> MarketHistory:
+        """
+        Asynchronous get_prices()
+        """
+        if self.price_cache is None or not data_range:
+            return await self.stocks_ifc.get_prices_async(market, interval, data_range)
+        return await self.price_cache.get_prices_async(
+            market,
+            interval,
+            data_range,
+            lambda bars: self.stocks_ifc.get_prices_async(market, interval, bars),
+        )
+
+    async def close_async(self) -> None:
+        """
+        Release the resources used by the asynchronous calls of the interfaces
         """
-        return self.stocks_ifc.get_prices(market, interval, data_range)
+        await self.stocks_ifc.close_async()
+        if self.account_ifc is not self.stocks_ifc:
+            await self.account_ifc.close_async()
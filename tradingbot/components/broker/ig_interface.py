@@ -1,10 +1,15 @@
+import asyncio
 import json
 import logging
+import random
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
+import aiohttp
 import pandas
 import requests
+from requests.adapters import DEFAULT_POOLSIZE, HTTPAdapter
+from urllib3.util.retry import Retry
 
 from ...interfaces import Market, MarketHistory, MarketMACD, Position
 from .. import Interval, TradeDirection, Utils
@@ -34,8 +39,19 @@ class IGInterface(AccountInterface, StocksInterface):
     IG broker interface class, provides functions to use the IG REST API
     """
 
+    config_section = "ig_interface"
+
+    # Server errors retried for the idempotent requests
+    RETRY_STATUSES = [500, 502, 503, 504]
+    # Maximum number of epics of a multiple markets request
+    MARKETS_BATCH_SIZE = 50
+
     api_base_url: str
     authenticated_headers: Dict[str, str]
+    session: requests.Session
+    _async_session: Optional[aiohttp.ClientSession]
+    _async_loop: Optional[asyncio.AbstractEventLoop]
+    _async_closer: Optional["asyncio.Task[None]"]
 
     def initialise(self) -> None:
         logging.info("initialising IGInterface...")
@@ -46,12 +62,42 @@ class IGInterface(AccountInterface, StocksInterface):
         )
         self.api_base_url = IG_API_URL.BASE_URI.value.replace("@", demoPrefix)
         self.authenticated_headers = {}
+        self.session = self._create_session()
+        self._async_session = None
+        self._async_loop = None
+        self._async_closer = None
         if self._config.is_paper_trading_enabled():
             logging.info("Paper trading is active")
         if not self.authenticate():
             logging.error("Authentication failed")
             raise RuntimeError("Unable to authenticate to IG Index. Check credentials")
 
+    def _create_session(self) -> requests.Session:
+        """
+        Create the HTTP session shared by all the requests, keeping the
+        connections to the IG gateway alive in a pool big enough for the market
+        workers. Failed connections are retried for all the requests, while
+        timeouts and server errors only for the idempotent ones, so that orders
+        are never sent twice. Retries wait an exponential backoff with jitter,
+        which requires urllib3 2
+        """
+        backoff = self._config.get_ig_api_retry_backoff()
+        retry = Retry(
+            total=self._config.get_ig_api_max_retries(),
+            backoff_factor=backoff,
+            backoff_jitter=backoff,
+            status_forcelist=self.RETRY_STATUSES,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_maxsize=self._get_pool_size(), max_retries=retry)
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update(
+            {"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"}
+        )
+        return session
+
     def authenticate(self) -> bool:
         """
         Authenticate the IGInterface instance with the configured credentials
@@ -67,7 +113,9 @@ class IGInterface(AccountInterface, StocksInterface):
             "Version": "2",
         }
         url = f"{self.api_base_url}/{IG_API_URL.SESSION.value}"
-        response = requests.post(url, data=json.dumps(data), headers=headers)
+        response = self.session.post(
+            url, data=json.dumps(data), headers=headers, timeout=self._get_timeout()
+        )
 
         if response.status_code != 200:
             logging.debug(f"Authentication returned code: {response.status_code}")
@@ -100,8 +148,11 @@ class IGInterface(AccountInterface, StocksInterface):
         """
         url = f"{self.api_base_url}/{IG_API_URL.SESSION.value}"
         data = {"accountId": accountId, "defaultAccount": "True"}
-        response = requests.put(
-            url, data=json.dumps(data), headers=self.authenticated_headers
+        response = self.session.put(
+            url,
+            data=json.dumps(data),
+            headers=self.authenticated_headers,
+            timeout=self._get_timeout(),
         )
 
         if response.status_code != 200:
@@ -136,7 +187,13 @@ class IGInterface(AccountInterface, StocksInterface):
             - Returns the json object returned by the IG API
         """
         url = f"{self.api_base_url}/{IG_API_URL.POSITIONS.value}"
-        data = self._http_get(url)
+        return self._parse_positions(self._http_get(url))
+
+    async def get_open_positions_async(self) -> List[Position]:
+        url = f"{self.api_base_url}/{IG_API_URL.POSITIONS.value}"
+        return self._parse_positions(await self._http_get_async(url))
+
+    def _parse_positions(self, data: Dict[str, Any]) -> List[Position]:
         positions = []
         for d in data["positions"]:
             positions.append(
@@ -180,8 +237,55 @@ class IGInterface(AccountInterface, StocksInterface):
             - Returns **None** if an error occurs otherwise the json returned by IG API
         """
         url = f"{self.api_base_url}/{IG_API_URL.MARKETS.value}/{epic_id}"
-        info = self._http_get(url)
+        return self._parse_market_info(epic_id, self._http_get(url))
+
+    async def get_market_info_async(self, epic_id: str) -> Market:
+        url = f"{self.api_base_url}/{IG_API_URL.MARKETS.value}/{epic_id}"
+        return self._parse_market_info(epic_id, await self._http_get_async(url))
+
+    def get_market_infos(self, epic_ids: List[str]) -> List[Market]:
+        """
+        Returns the info of the given markets, requesting up to
+        MARKETS_BATCH_SIZE of them at a time
+
+            - **epic_ids**: list of market epics
+            - The markets missing from the response are logged and skipped
+        """
+        markets: List[Market] = []
+        for batch in self._get_market_batches(epic_ids):
+            data = self._http_get(self._get_markets_url(batch), version="2")
+            markets += self._parse_market_infos(batch, data)
+        return markets
 
+    async def get_market_infos_async(self, epic_ids: List[str]) -> List[Market]:
+        markets: List[Market] = []
+        for batch in self._get_market_batches(epic_ids):
+            url = self._get_markets_url(batch)
+            data = await self._http_get_async(url, version="2")
+            markets += self._parse_market_infos(batch, data)
+        return markets
+
+    def _get_market_batches(self, epic_ids: List[str]) -> List[List[str]]:
+        size = self.MARKETS_BATCH_SIZE
+        return [epic_ids[i : i + size] for i in range(0, len(epic_ids), size)]
+
+    def _get_markets_url(self, epic_ids: List[str]) -> str:
+        epics = ",".join(epic_ids)
+        return f"{self.api_base_url}/{IG_API_URL.MARKETS.value}?epics={epics}"
+
+    def _parse_market_infos(
+        self, epic_ids: List[str], data: Dict[str, Any]
+    ) -> List[Market]:
+        details = {d["instrument"]["epic"]: d for d in data.get("marketDetails", [])}
+        # A missing market must not drop the other markets of the batch
+        missing = [e for e in epic_ids if e not in details]
+        if missing:
+            logging.warning(f"Unable to fetch data for {', '.join(missing)}")
+        return [
+            self._parse_market_info(e, details[e]) for e in epic_ids if e in details
+        ]
+
+    def _parse_market_info(self, epic_id: str, info: Dict[str, Any]) -> Market:
         if "markets" in info:
             raise RuntimeError(f"Multiple matches found for epic: {epic_id}")
         if self._config.get_ig_controlled_risk():
@@ -208,14 +312,22 @@ class IGInterface(AccountInterface, StocksInterface):
         data = self._http_get(url)
         markets = []
         if data is not None and "markets" in data:
-            markets = [self.get_market_info(m["epic"]) for m in data["markets"]]
+            markets = self.get_market_infos([m["epic"] for m in data["markets"]])
         return markets
 
     def get_prices(
         self, market: Market, interval: Interval, data_range: int
     ) -> MarketHistory:
         url = f"{self.api_base_url}/{IG_API_URL.PRICES.value}/{market.epic}/{interval}/{data_range}"
-        data = self._http_get(url)
+        return self._parse_prices(market, self._http_get(url))
+
+    async def get_prices_async(
+        self, market: Market, interval: Interval, data_range: int
+    ) -> MarketHistory:
+        url = f"{self.api_base_url}/{IG_API_URL.PRICES.value}/{market.epic}/{interval}/{data_range}"
+        return self._parse_prices(market, await self._http_get_async(url))
+
+    def _parse_prices(self, market: Market, data: Dict[str, Any]) -> MarketHistory:
         if "allowance" in data:
             remaining_allowance = data["allowance"]["remainingAllowance"]
             reset_time = Utils.humanize_time(int(data["allowance"]["allowanceExpiry"]))
@@ -223,17 +335,19 @@ class IGInterface(AccountInterface, StocksInterface):
                 logging.warn(f"Remaining API calls left: {str(remaining_allowance)}")
                 logging.warn(f"Time to API Key reset: {str(reset_time)}")
         dates = []
+        opens = []
         highs = []
         lows = []
         closes = []
         volumes = []
         for price in data["prices"]:
             dates.append(price["snapshotTimeUTC"])
+            opens.append(price["openPrice"]["bid"])
             highs.append(price["highPrice"]["bid"])
             lows.append(price["lowPrice"]["bid"])
             closes.append(price["closePrice"]["bid"])
             volumes.append(float(price["lastTradedVolume"]))
-        history = MarketHistory(market, dates, highs, lows, closes, volumes)
+        history = MarketHistory(market, dates, highs, lows, closes, volumes, opens)
         return history
 
     def trade(
@@ -255,7 +369,47 @@ class IGInterface(AccountInterface, StocksInterface):
             return True
 
         url = f"{self.api_base_url}/{IG_API_URL.POSITIONS_OTC.value}"
-        data = {
+        data = self._make_trade_request(epic_id, trade_direction, limit, stop)
+        r = self.session.post(
+            url,
+            data=json.dumps(data),
+            headers=self.authenticated_headers,
+            timeout=self._get_timeout(),
+        )
+
+        if r.status_code != 200:
+            return False
+
+        d = json.loads(r.text)
+        confirmed = self.confirm_order(d["dealReference"])
+        return self._log_trade(epic_id, trade_direction, limit, stop, confirmed)
+
+    async def trade_async(
+        self, epic_id: str, trade_direction: TradeDirection, limit: float, stop: float
+    ) -> bool:
+        if self._config.is_paper_trading_enabled():
+            logging.info(
+                f"Paper trade: {trade_direction.value} {epic_id} with limit={limit} and stop={stop}"
+            )
+            return True
+
+        url = f"{self.api_base_url}/{IG_API_URL.POSITIONS_OTC.value}"
+        data = self._make_trade_request(epic_id, trade_direction, limit, stop)
+        status, text = await self._http_post_async(
+            url, data, self.authenticated_headers
+        )
+
+        if status != 200:
+            return False
+
+        d = json.loads(text)
+        confirmed = await self.confirm_order_async(d["dealReference"])
+        return self._log_trade(epic_id, trade_direction, limit, stop, confirmed)
+
+    def _make_trade_request(
+        self, epic_id: str, trade_direction: TradeDirection, limit: float, stop: float
+    ) -> Dict[str, Any]:
+        return {
             "direction": trade_direction.value,
             "epic": epic_id,
             "limitLevel": limit,
@@ -268,23 +422,21 @@ class IGInterface(AccountInterface, StocksInterface):
             "stopLevel": stop,
         }
 
-        r = requests.post(
-            url, data=json.dumps(data), headers=self.authenticated_headers
-        )
-
-        if r.status_code != 200:
-            return False
-
-        d = json.loads(r.text)
-        deal_ref = d["dealReference"]
-        if self.confirm_order(deal_ref):
+    def _log_trade(
+        self,
+        epic_id: str,
+        trade_direction: TradeDirection,
+        limit: float,
+        stop: float,
+        confirmed: bool,
+    ) -> bool:
+        if confirmed:
             logging.info(
                 f"Order {trade_direction.value} for {epic_id} confirmed with limit={limit} and stop={stop}"
             )
-            return True
         else:
             logging.warning(f"Trade {trade_direction.value} of {epic_id} has failed!")
-            return False
+        return confirmed
 
     def confirm_order(self, dealRef: str) -> bool:
         """
@@ -303,6 +455,14 @@ class IGInterface(AccountInterface, StocksInterface):
                 return True
         return False
 
+    async def confirm_order_async(self, dealRef: str) -> bool:
+        """
+        Asynchronous confirm_order()
+        """
+        url = f"{self.api_base_url}/{IG_API_URL.CONFIRMS.value}/{dealRef}"
+        d = await self._http_get_async(url)
+        return d is not None and d["reason"] == "SUCCESS"
+
     def close_position(self, position: Position) -> bool:
         """
         Close the given market position
@@ -337,7 +497,9 @@ class IGInterface(AccountInterface, StocksInterface):
         }
         del_headers = dict(self.authenticated_headers)
         del_headers["_method"] = "DELETE"
-        r = requests.post(url, data=json.dumps(data), headers=del_headers)
+        r = self.session.post(
+            url, data=json.dumps(data), headers=del_headers, timeout=self._get_timeout()
+        )
         if r.status_code != 200:
             return False
         d = json.loads(r.text)
@@ -410,35 +572,148 @@ class IGInterface(AccountInterface, StocksInterface):
 
             - **name**: name of the watchlist
         """
-        markets = []
         # Request with empty name returns list of all the watchlists
         all_watchlists = self._get_watchlist("")
         for w in all_watchlists["watchlists"]:
             if "name" in w and w["name"] == name:
                 data = self._get_watchlist(w["id"])
                 if "markets" in data:
-                    for m in data["markets"]:
-                        markets.append(self.get_market_info(m["epic"]))
+                    return self.get_market_infos([m["epic"] for m in data["markets"]])
                 break
-        return markets
+        return []
 
-    def _http_get(self, url: str) -> Dict[str, Any]:
+    def _http_get(self, url: str, version: Optional[str] = None) -> Dict[str, Any]:
         """
-        Perform an HTTP GET request to the url.
+        Perform an HTTP GET request to the url, with the given version of the
+        endpoint if any.
         Return the json object returned from the API if 200 is received
         Return None if an error is received from the API
         """
-        self._wait_before_call(self._config.get_ig_api_timeout())
-        response = requests.get(url, headers=self.authenticated_headers)
-        if response.status_code != 200:
-            logging.error(f"HTTP request returned {response.status_code}")
-            raise RuntimeError(f"HTTP request returned {response.status_code}")
-        data = json.loads(response.text)
+        self._wait_before_call(self._get_endpoint(url))
+        response = self.session.get(
+            url, headers=self._get_headers(version), timeout=self._get_timeout()
+        )
+        return self._parse_response(response.status_code, response.text)
+
+    async def _http_get_async(
+        self, url: str, version: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Asynchronous _http_get(). Timeouts, failed connections and server errors
+        are retried like in the synchronous session
+        """
+        endpoint = self._get_endpoint(url)
+        retries = self._config.get_ig_api_max_retries()
+        attempt = 0
+        while True:
+            await self._wait_before_call_async(endpoint)
+            try:
+                session = self._get_async_session()
+                async with session.get(url, headers=self._get_headers(version)) as r:
+                    status, text = r.status, await r.text()
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt >= retries:
+                    raise
+            else:
+                if status not in self.RETRY_STATUSES or attempt >= retries:
+                    return self._parse_response(status, text)
+            attempt += 1
+            await asyncio.sleep(self._get_retry_delay(attempt))
+
+    async def _http_post_async(
+        self, url: str, data: Dict[str, Any], headers: Dict[str, str]
+    ) -> Tuple[int, str]:
+        """
+        Perform an HTTP POST request to the url, returning the status code and
+        the text of the response. Orders are never retried
+        """
+        session = self._get_async_session()
+        async with session.post(url, data=json.dumps(data), headers=headers) as r:
+            return r.status, await r.text()
+
+    def _get_headers(self, version: Optional[str]) -> Dict[str, str]:
+        """Return the authenticated headers requesting the endpoint version"""
+        if version is None:
+            return self.authenticated_headers
+        return {**self.authenticated_headers, "Version": version}
+
+    def _parse_response(self, status: int, text: str) -> Dict[str, Any]:
+        """
+        Return the json object of the response, raise RuntimeError if the API
+        returned an error
+        """
+        if status != 200:
+            logging.error(f"HTTP request returned {status}")
+            raise RuntimeError(f"HTTP request returned {status}")
+        data = json.loads(text)
         if "errorCode" in data:
             logging.error(data["errorCode"])
             raise RuntimeError(data["errorCode"])
         return data
 
+    def _get_async_session(self) -> aiohttp.ClientSession:
+        """
+        Return the aiohttp session of the running event loop, creating it with
+        a pool of keep-alive connections as big as the synchronous one. The
+        session is closed with its event loop, if not by close_async() before
+        """
+        loop = asyncio.get_running_loop()
+        if (
+            self._async_session is None
+            or self._async_session.closed
+            or self._async_loop is not loop
+        ):
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self._get_pool_size()),
+                timeout=aiohttp.ClientTimeout(total=self._get_timeout()),
+            )
+            self._async_session = session
+            self._async_loop = loop
+            self._async_closer = loop.create_task(self._close_at_shutdown(session))
+        return self._async_session
+
+    @staticmethod
+    async def _close_at_shutdown(session: aiohttp.ClientSession) -> None:
+        """
+        Close the session when the task is cancelled, which asyncio.run() does
+        to the pending tasks at the end, while its connections can still be
+        closed on their event loop
+        """
+        try:
+            await asyncio.get_running_loop().create_future()
+        finally:
+            await session.close()
+
+    async def close_async(self) -> None:
+        if self._async_session is not None:
+            await self._async_session.close()
+            self._async_session = None
+        if self._async_closer is not None:
+            self._async_closer.cancel()
+            self._async_closer = None
+
+    def _get_pool_size(self) -> int:
+        """Return the number of connections kept alive to the IG gateway"""
+        return max(DEFAULT_POOLSIZE, self._config.get_market_workers())
+
+    def _get_retry_delay(self, attempt: int) -> float:
+        """Return the exponential backoff with jitter of the retry attempt"""
+        backoff = self._config.get_ig_api_retry_backoff()
+        return backoff * (2 ** (attempt - 1) + random.random())
+
+    def _get_timeout(self) -> Optional[float]:
+        """Return the timeout of the requests in seconds, None to wait forever"""
+        timeout = self._config.get_ig_api_request_timeout()
+        return timeout if timeout > 0 else None
+
+    def _get_endpoint(self, url: str) -> str:
+        """
+        Return the name of the API endpoint of the url, e.g. prices, used to
+        apply its rate limit
+        """
+        path = url[len(self.api_base_url) :].split("?")[0]
+        return path.strip("/").split("/")[0]
+
     def get_macd(
         self, market: Market, interval: Interval, data_range: int
     ) -> MarketMACD:
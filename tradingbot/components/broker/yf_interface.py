@@ -25,13 +25,15 @@ class YFInterval(Enum):
 
 
 class YFinanceInterface(StocksInterface):
+    config_section = "yfinance"
+
     def initialise(self) -> None:
         logging.info("Initialising YFinanceInterface...")
 
     def get_prices(
         self, market: Market, interval: Interval, data_range: int
     ) -> MarketHistory:
-        self._wait_before_call(self._config.get_yfinance_api_timeout())
+        self._wait_before_call()
 
         ticker = yf.Ticker(self._format_market_id(market.id))
         data = ticker.history(
@@ -47,13 +49,14 @@ class YFinanceInterface(StocksInterface):
             data["Low"].values,
             data["Close"].values,
             data["Volume"].values,
+            data["Open"].values,
         )
         return history
 
     def get_macd(
         self, market: Market, interval: Interval, data_range: int
     ) -> MarketMACD:
-        self._wait_before_call(self._config.get_yfinance_api_timeout())
+        self._wait_before_call()
         # Fetch prices with at least 26 data points
         prices = self.get_prices(market, interval, 30)
         data = Utils.macd_df_from_list(
@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -9,6 +9,11 @@ class LoggingConfig(BaseModel):
     debug: bool = False
 
 
+class PriceCacheConfig(BaseModel):
+    enable: bool = False
+    database: str = ""
+
+
 class EpicIdListConfig(BaseModel):
     filepath: str = ""
 
@@ -17,14 +22,28 @@ class WatchlistConfig(BaseModel):
     name: str = ""
 
 
+class APISourceConfig(BaseModel):
+    node: str = "180500"
+    tree_filepath: str = ""
+    tree_ttl: float = 86400.0
+    workers: int = 4
+
+
 class MarketSourceConfig(BaseModel):
     active: str = "list"
     values: List[str] = []
     epic_id_list: Optional[EpicIdListConfig] = None
     watchlist: Optional[WatchlistConfig] = None
+    api: APISourceConfig = Field(default_factory=APISourceConfig)
+
+
+class APIRateLimitConfig(BaseModel):
+    api_timeout: float = 0.0
+    api_burst: int = 1
+    api_endpoint_timeouts: Dict[str, float] = {}
 
 
-class IGInterfaceConfig(BaseModel):
+class IGInterfaceConfig(APIRateLimitConfig):
     order_type: str = "MARKET"
     order_size: float = 1
     order_expiry: str = "DFB"
@@ -34,13 +53,16 @@ class IGInterfaceConfig(BaseModel):
     use_demo_account: bool = True
     controlled_risk: bool = False
     api_timeout: float = 3.0
+    api_request_timeout: float = 30.0
+    api_max_retries: int = 3
+    api_retry_backoff: float = 0.5
 
 
-class AlphaVantageConfig(BaseModel):
+class AlphaVantageConfig(APIRateLimitConfig):
     api_timeout: float = 12.0
 
 
-class YFinanceConfig(BaseModel):
+class YFinanceConfig(APIRateLimitConfig):
     api_timeout: float = 0.5
 
 
@@ -100,8 +122,15 @@ class TradingBotConfig(BaseModel):
     time_zone: str = "UTC"
     credentials_filepath: str = ""
     spin_interval: int = 3600
+    market_workers: int = 1
+    safety_checks_ttl: float = 60.0
+    schedule_on_bar_close: bool = False
+    bar_close_delay: float = 10.0
+    bar_close_spread: float = 60.0
+    stream_on_bar_close: bool = False
     paper_trading: bool = False
     logging: LoggingConfig = Field(default_factory=LoggingConfig)
+    price_cache: PriceCacheConfig = Field(default_factory=PriceCacheConfig)
     market_source: MarketSourceConfig = Field(default_factory=MarketSourceConfig)
     stocks_interface: StocksInterfaceConfig = Field(
         default_factory=StocksInterfaceConfig
@@ -6,7 +6,7 @@ from typing import Any, Dict, List, MutableMapping, Optional
 
 import toml
 
-from .config_model import TradingBotConfig
+from .config_model import APIRateLimitConfig, TradingBotConfig
 
 DEFAULT_CONFIGURATION_PATH = Path.home() / ".TradingBot" / "config" / "trading_bot.toml"
 CONFIGURATION_ROOT = "trading_bot_root"
@@ -81,6 +81,24 @@ class Configuration:
     def get_spin_interval(self) -> int:
         return self.config.spin_interval
 
+    def get_market_workers(self) -> int:
+        return self.config.market_workers
+
+    def get_safety_checks_ttl(self) -> float:
+        return self.config.safety_checks_ttl
+
+    def is_schedule_on_bar_close_enabled(self) -> bool:
+        return self.config.schedule_on_bar_close
+
+    def get_bar_close_delay(self) -> float:
+        return self.config.bar_close_delay
+
+    def get_bar_close_spread(self) -> float:
+        return self.config.bar_close_spread
+
+    def is_stream_on_bar_close_enabled(self) -> bool:
+        return self.config.stream_on_bar_close
+
     def is_logging_enabled(self) -> bool:
         return self.config.logging.enable
 
@@ -90,6 +108,12 @@ class Configuration:
     def is_logging_debug_enabled(self) -> bool:
         return self.config.logging.debug
 
+    def is_price_cache_enabled(self) -> bool:
+        return self.config.price_cache.enable
+
+    def get_price_cache_database(self) -> Optional[str]:
+        return self.config.price_cache.database or None
+
     def get_active_market_source(self) -> str:
         return self.config.market_source.active
 
@@ -106,6 +130,18 @@ class Configuration:
             return self.config.market_source.watchlist.name
         raise ValueError("watchlist configuration missing")
 
+    def get_api_node(self) -> str:
+        return self.config.market_source.api.node
+
+    def get_market_tree_filepath(self) -> str:
+        return self.config.market_source.api.tree_filepath
+
+    def get_market_tree_ttl(self) -> float:
+        return self.config.market_source.api.tree_ttl
+
+    def get_market_tree_workers(self) -> int:
+        return self.config.market_source.api.workers
+
     def get_active_stocks_interface(self) -> str:
         return self.config.stocks_interface.active
 
@@ -157,6 +193,21 @@ class Configuration:
             return self.config.stocks_interface.ig_interface.api_timeout
         raise ValueError("IG interface configuration missing")
 
+    def get_ig_api_request_timeout(self) -> float:
+        if self.config.stocks_interface.ig_interface:
+            return self.config.stocks_interface.ig_interface.api_request_timeout
+        raise ValueError("IG interface configuration missing")
+
+    def get_ig_api_max_retries(self) -> int:
+        if self.config.stocks_interface.ig_interface:
+            return self.config.stocks_interface.ig_interface.api_max_retries
+        raise ValueError("IG interface configuration missing")
+
+    def get_ig_api_retry_backoff(self) -> float:
+        if self.config.stocks_interface.ig_interface:
+            return self.config.stocks_interface.ig_interface.api_retry_backoff
+        raise ValueError("IG interface configuration missing")
+
     def is_paper_trading_enabled(self) -> bool:
         return self.config.paper_trading
 
@@ -170,6 +221,21 @@ class Configuration:
             return self.config.stocks_interface.yfinance.api_timeout
         raise ValueError("YFinance configuration missing")
 
+    def get_api_timeout(self, interface: str) -> float:
+        return self._get_api_rate_limit_config(interface).api_timeout
+
+    def get_api_burst(self, interface: str) -> int:
+        return self._get_api_rate_limit_config(interface).api_burst
+
+    def get_api_endpoint_timeouts(self, interface: str) -> Dict[str, float]:
+        return self._get_api_rate_limit_config(interface).api_endpoint_timeouts
+
+    def _get_api_rate_limit_config(self, interface: str) -> APIRateLimitConfig:
+        section = getattr(self.config.stocks_interface, interface, None)
+        if isinstance(section, APIRateLimitConfig):
+            return section
+        raise ValueError(f"{interface} configuration missing")
+
     def get_active_account_interface(self) -> str:
         return self.config.account_interface.active
 
@@ -1,13 +1,18 @@
+import asyncio
+import itertools
 import logging
-from collections import deque
 from enum import Enum
 from pathlib import Path
-from typing import Deque, Iterator, List
+from typing import AsyncIterator, Iterable, Iterator, List
 
 from ..interfaces import Market
-from . import Configuration
+from . import Configuration, MarketTree
 from .broker import Broker
 
+# Number of market snapshots of the list and api sources fetched together, as
+# the snapshots get older while the previous markets are processed
+MARKETS_BATCH_SIZE = 50
+
 
 class MarketSource(Enum):
     """
@@ -31,11 +36,20 @@ class MarketProvider:
     epic_list: List[str] = []
     epic_list_iter: Iterator[str]
     market_list_iter: Iterator[Market]
-    node_stack: Deque[str]
+    market_tree: MarketTree
 
     def __init__(self, config: Configuration, broker: Broker) -> None:
         self.config = config
         self.broker = broker
+        # Explored once a day by the api source, not at every reset
+        self.market_tree = MarketTree(
+            broker,
+            Path(config.get_market_tree_filepath())
+            if config.get_market_tree_filepath()
+            else None,
+            config.get_market_tree_ttl(),
+            config.get_market_tree_workers(),
+        )
         self._initialise()
 
     def next(self) -> Market:
@@ -48,10 +62,71 @@ class MarketProvider:
         elif source == MarketSource.WATCHLIST.value:
             return self._next_from_market_list()
         elif source == MarketSource.API.value:
-            return self._next_from_api()
+            return self._next_from_epic_list()
         else:
             raise RuntimeError("ERROR: invalid market_source configuration")
 
+    async def markets_async(self, concurrency: int = 1) -> AsyncIterator[Market]:
+        """
+        Asynchronous iterator over the remaining markets of the configured
+        source, fetching up to concurrency batches of market snapshots at once.
+        As with next(), the source is over at the first market that can't be
+        fetched
+        """
+        source = self.config.get_active_market_source()
+        # Snapshots already fetched, e.g. by next()
+        for market in self.market_list_iter:
+            yield market
+        if source == MarketSource.WATCHLIST.value:
+            return
+        if source not in [MarketSource.LIST.value, MarketSource.API.value]:
+            raise RuntimeError("ERROR: invalid market_source configuration")
+        try:
+            async for market in self.get_markets_from_epics_async(
+                self.epic_list_iter, concurrency
+            ):
+                yield market
+        except Exception as e:
+            logging.error(f"Market source stopped: {e}")
+
+    async def get_markets_from_epics_async(
+        self, epics: Iterable[str], concurrency: int = 1
+    ) -> AsyncIterator[Market]:
+        """
+        Asynchronous iterator over the snapshots of the markets, fetching up to
+        concurrency batches of them at once. The markets the broker can't find
+        are skipped
+        """
+        epics_iter = iter(epics)
+        while True:
+            batches = []
+            for _ in range(concurrency):
+                batch = list(itertools.islice(epics_iter, MARKETS_BATCH_SIZE))
+                if not batch:
+                    break
+                batches.append(batch)
+            if not batches:
+                return
+            results = await asyncio.gather(
+                *(self.broker.get_market_infos_async(batch) for batch in batches)
+            )
+            for markets in results:
+                for market in markets:
+                    yield market
+
+    def get_markets_from_epics(self, epics: Iterable[str]) -> List[Market]:
+        """
+        Return the snapshots of the markets, fetching them in batches.
+        The markets the broker can't find are skipped
+        """
+        markets: List[Market] = []
+        epics_iter = iter(epics)
+        while True:
+            batch = list(itertools.islice(epics_iter, MARKETS_BATCH_SIZE))
+            if not batch:
+                return markets
+            markets += self.broker.get_market_infos(batch)
+
     def reset(self) -> None:
         """
         Reset internal market pointer to the beginning
@@ -95,8 +170,6 @@ class MarketProvider:
         self.epic_list = []
         self.epic_list_iter = iter([])
         self.market_list_iter = iter([])
-        # Initialise API members
-        self.node_stack = deque()
         source = self.config.get_active_market_source()
         if source == MarketSource.LIST.value:
             self.epic_list = self._load_epic_ids_from_local_file(
@@ -108,7 +181,7 @@ class MarketProvider:
             )
             self.market_list_iter = iter(market_list)
         elif source == MarketSource.API.value:
-            self.epic_list = self._load_epic_ids_from_api_node("180500")
+            self.epic_list = self.market_tree.get_epics(self.config.get_api_node())
         else:
             raise RuntimeError("ERROR: invalid market_source configuration")
         self.epic_list_iter = iter(self.epic_list)
@@ -137,11 +210,23 @@ class MarketProvider:
         return epic_ids
 
     def _next_from_epic_list(self) -> Market:
+        # Fetch the snapshots of the next batch of epics when the previous
+        # ones are over
+        try:
+            return next(self.market_list_iter)
+        except StopIteration:
+            pass
         try:
-            epic = next(self.epic_list_iter)
-            return self._create_market(epic)
+            # Skip the batches whose markets are all missing
+            while batch := list(
+                itertools.islice(self.epic_list_iter, MARKETS_BATCH_SIZE)
+            ):
+                self.market_list_iter = iter(self.get_markets_from_epics(batch))
+                for market in self.market_list_iter:
+                    return market
         except Exception as e:
             raise StopIteration from e
+        raise StopIteration
 
     def _next_from_market_list(self) -> Market:
         try:
@@ -159,36 +244,6 @@ class MarketProvider:
             raise RuntimeError(message)
         return markets
 
-    def _load_epic_ids_from_api_node(self, node_id: str) -> List[str]:
-        node = self.broker.navigate_market_node(node_id)
-        if "nodes" in node and isinstance(node["nodes"], list):
-            for child_node in node["nodes"]:
-                self.node_stack.append(child_node["id"])
-            return self._load_epic_ids_from_api_node(self.node_stack.pop())
-        if "markets" in node and isinstance(node["markets"], list):
-            return [
-                market["epic"]
-                for market in node["markets"]
-                if any(
-                    [
-                        "DFB" in str(market["epic"]),
-                        "TODAY" in str(market["epic"]),
-                        "DAILY" in str(market["epic"]),
-                    ]
-                )
-            ]
-        return []
-
-    def _next_from_api(self) -> Market:
-        # Return the next item in the epic_list, but if the list is finished
-        # navigate the next node in the stack and return a new list
-        try:
-            return self._next_from_epic_list()
-        except Exception:
-            self.epic_list = self._load_epic_ids_from_api_node(self.node_stack.pop())
-            self.epic_list_iter = iter(self.epic_list)
-            return self._next_from_epic_list()
-
     def _create_market(self, epic_id: str) -> Market:
         market = self.broker.get_market_info(epic_id)
         if market is None:
@@ -0,0 +1,299 @@
+import copy
+import logging
+import threading
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+import pandas
+
+from ..interfaces import Market, MarketHistory
+from . import Interval, Utils
+from .broker import StreamingInterface
+
+# Streamed candles used to build the bars of each interval, the longest ones
+# whose duration divides the interval
+STREAM_SCALES = {
+    Interval.MINUTE_1: "1MINUTE",
+    Interval.MINUTE_2: "1MINUTE",
+    Interval.MINUTE_3: "1MINUTE",
+    Interval.MINUTE_5: "5MINUTE",
+    Interval.MINUTE_10: "5MINUTE",
+    Interval.MINUTE_15: "5MINUTE",
+    Interval.MINUTE_30: "5MINUTE",
+    Interval.HOUR: "HOUR",
+    Interval.HOUR_2: "HOUR",
+    Interval.HOUR_3: "HOUR",
+    Interval.HOUR_4: "HOUR",
+    Interval.DAY: "HOUR",
+    Interval.WEEK: "HOUR",
+    Interval.MONTH: "HOUR",
+}
+SCALE_INTERVALS = {
+    "1MINUTE": Interval.MINUTE_1,
+    "5MINUTE": Interval.MINUTE_5,
+    "HOUR": Interval.HOUR,
+}
+SCALE_DURATIONS = {
+    "1MINUTE": timedelta(minutes=1),
+    "5MINUTE": timedelta(minutes=5),
+    "HOUR": timedelta(hours=1),
+}
+# Start time, open, high, low, close and volume of a closed bar
+Bar = Tuple[datetime, float, float, float, float, float]
+
+
+class MarketState:
+    """
+    Latest streamed prices of a market, the bar being built from its streamed
+    candles and the last max_bars closed bars. Times are naive UTC
+    """
+
+    market: Market
+    update_time: Optional[str]
+    bar_start: Optional[datetime]
+    open: Optional[float]
+    high: Optional[float]
+    low: Optional[float]
+    close: Optional[float]
+    closed: bool
+    bars: Deque[Bar]
+    seeded: bool
+
+    def __init__(self, market: Market, max_bars: int = 0) -> None:
+        self.market = market
+        self.update_time = None
+        self.bars = deque(maxlen=max_bars)
+        self.seeded = False
+        self.start_bar(None)
+
+    @property
+    def volume(self) -> float:
+        """Volume of the complete candles of the bar and of the current one"""
+        return self._volume + self._candle_volume
+
+    def start_bar(self, bar_start: Optional[datetime]) -> None:
+        self.bar_start = bar_start
+        self.open = self.high = self.low = self.close = None
+        self.closed = False
+        self._volume = 0.0
+        self._candle_volume = 0.0
+
+    def update_bar(self, values: Dict[str, float], complete: bool) -> None:
+        if self.open is None:
+            self.open = values.get("BID_OPEN")
+        if "BID_HIGH" in values:
+            high = values["BID_HIGH"]
+            self.high = high if self.high is None else max(self.high, high)
+        if "BID_LOW" in values:
+            low = values["BID_LOW"]
+            self.low = low if self.low is None else min(self.low, low)
+        self.close = values.get("BID_CLOSE", self.close)
+        self._candle_volume = values.get("LTV", self._candle_volume)
+        if complete:
+            self._volume += self._candle_volume
+            self._candle_volume = 0.0
+
+    def close_bar(self) -> bool:
+        """Close the bar and keep it, return False if already closed"""
+        if self.closed:
+            return False
+        self.closed = True
+        bar = (self.bar_start, self.open, self.high, self.low, self.close)
+        if None not in bar:
+            self.bars.append((*bar, self.volume))  # type: ignore[arg-type]
+        return True
+
+
+class MarketStream:
+    """
+    State of the markets fed by a StreamingInterface. The bars of the interval
+    are built from the streamed candles of its STREAM_SCALES, and a bar is
+    closed when its last candle is complete or, for the markets not trading at
+    the end of the bar, when the first candle of the next bar arrives. The
+    epics of the markets whose bar closed are returned by wait_for_bar_closes()
+    and the last max_bars closed bars of a market by get_history(), once
+    seeded with the bars before the streamed ones
+    """
+
+    stream: StreamingInterface
+    interval: Interval
+    scale: str
+    max_bars: int
+    _states: Dict[str, MarketState]
+    _closed: Dict[str, None]
+
+    def __init__(
+        self, stream: StreamingInterface, interval: Interval, max_bars: int = 0
+    ) -> None:
+        """
+        - **stream**: the streaming feed, already connected
+        - **interval**: interval of the bars
+        - **max_bars**: number of closed bars kept for each market
+        """
+        self.stream = stream
+        self.interval = interval
+        self.scale = STREAM_SCALES[interval]
+        self.max_bars = max_bars
+        self._states = {}
+        self._closed = {}
+        self._condition = threading.Condition()
+
+    def subscribe(self, markets: Iterable[Market]) -> None:
+        """Subscribe the prices and candles of the markets"""
+        items = []
+        with self._condition:
+            if not self._states:
+                self.stream.add_listener(self._on_update)
+            for market in markets:
+                if market.epic not in self._states:
+                    state = MarketState(copy.copy(market), self.max_bars)
+                    self._states[market.epic] = state
+                    items += self._get_items(market.epic)
+        if items:
+            self.stream.subscribe(items)
+        logging.info(f"Streaming {len(self._states)} markets")
+
+    def close(self) -> None:
+        """Unsubscribe all the markets"""
+        with self._condition:
+            items = [item for epic in self._states for item in self._get_items(epic)]
+            self._states = {}
+            self._closed = {}
+        self.stream.remove_listener(self._on_update)
+        if items:
+            self.stream.unsubscribe(items)
+
+    def get_epics(self) -> List[str]:
+        """Return the epics of the subscribed markets"""
+        with self._condition:
+            return list(self._states)
+
+    def get_state(self, epic: str) -> MarketState:
+        """Return the state of the market. Raise KeyError if not subscribed"""
+        with self._condition:
+            return copy.copy(self._states[epic])
+
+    def get_market(self, epic: str) -> Market:
+        """Return the market with the latest streamed prices"""
+        with self._condition:
+            return copy.copy(self._states[epic].market)
+
+    def is_seeded(self, epic: str) -> bool:
+        """Return True if the bars of the market have been seeded"""
+        with self._condition:
+            return self._states[epic].seeded
+
+    def seed(self, epic: str, history: MarketHistory) -> None:
+        """
+        Add the bars of the history before the streamed ones, e.g. fetched from
+        the broker at the first bar close, ignoring the incomplete bars
+        """
+        df = history.dataframe
+        starts = pandas.to_datetime(df[MarketHistory.DATE_COLUMN], utc=True)
+        columns = [
+            MarketHistory.OPEN_COLUMN,
+            MarketHistory.HIGH_COLUMN,
+            MarketHistory.LOW_COLUMN,
+            MarketHistory.CLOSE_COLUMN,
+            MarketHistory.VOLUME_COLUMN,
+        ]
+        rows = zip(starts.dt.tz_convert(None), *(df[c].astype(float) for c in columns))
+        with self._condition:
+            state = self._states[epic]
+            streamed = list(state.bars)
+            end = streamed[0][0] if streamed else state.bar_start
+            bars = [
+                (start.to_pydatetime(), *values)
+                for start, *values in rows
+                if end is None or start < end
+            ]
+            state.bars.clear()
+            state.bars.extend(bars + streamed)
+            state.seeded = True
+
+    def get_history(self, epic: str) -> MarketHistory:
+        """Return the closed bars of the market, from the oldest"""
+        with self._condition:
+            state = self._states[epic]
+            market, bars = copy.copy(state.market), list(state.bars)
+        columns = [list(values) for values in zip(*bars)] if bars else [[]] * 6
+        starts, opens, highs, lows, closes, volumes = columns
+        dates = [start.strftime("%Y-%m-%dT%H:%M:%S") for start in starts]
+        return MarketHistory(market, dates, highs, lows, closes, volumes, opens)
+
+    def wait_for_bar_closes(self, timeout: Optional[float] = None) -> List[str]:
+        """
+        Wait up to timeout seconds, forever if None, for bars to close and
+        return the epics of their markets, empty if no bar closed
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._closed, timeout)
+            epics, self._closed = list(self._closed), {}
+        return epics
+
+    def _get_items(self, epic: str) -> List[str]:
+        return [f"MARKET:{epic}", f"CHART:{epic}:{self.scale}"]
+
+    def _on_update(self, item: str, values: Dict[str, Optional[str]]) -> None:
+        parts = item.split(":")
+        fields = self._to_numbers(values)
+        with self._condition:
+            state = self._states.get(parts[1]) if len(parts) > 1 else None
+            if state is None:
+                return
+            if parts[0] == "MARKET":
+                self._update_prices(state, fields, values.get("UPDATE_TIME"))
+            elif parts[0] == "CHART" and parts[2:] == [self.scale]:
+                if self._update_bar(state, fields) and parts[1] not in self._closed:
+                    logging.debug(f"Bar of {parts[1]} closed")
+                    self._closed[parts[1]] = None
+                    self._condition.notify_all()
+
+    def _to_numbers(self, values: Dict[str, Optional[str]]) -> Dict[str, float]:
+        """Return the numeric values of the fields"""
+        numbers = {}
+        for field, value in values.items():
+            try:
+                numbers[field] = float(value or "")
+            except ValueError:
+                continue
+        return numbers
+
+    def _update_prices(
+        self,
+        state: MarketState,
+        fields: Dict[str, float],
+        update_time: Optional[str],
+    ) -> None:
+        market = state.market
+        market.bid = fields.get("BID", market.bid)
+        market.offer = fields.get("OFFER", market.offer)
+        market.high = fields.get("HIGH", market.high)
+        market.low = fields.get("LOW", market.low)
+        state.update_time = update_time or state.update_time
+
+    def _update_bar(self, state: MarketState, fields: Dict[str, float]) -> bool:
+        """Update the bar with the candle, return True if a bar closed"""
+        if "UTM" not in fields:
+            return False
+        time = datetime.fromtimestamp(fields["UTM"] / 1000, timezone.utc)
+        candle_start = Utils.get_bar_start(
+            time.replace(tzinfo=None), SCALE_INTERVALS[self.scale]
+        )
+        bar_start = Utils.get_bar_start(candle_start, self.interval)
+        closed = False
+        if state.bar_start is not None:
+            if bar_start < state.bar_start:
+                return False
+            if bar_start > state.bar_start:
+                # The previous bar is over even if its last candle never came
+                closed = state.close_bar()
+                state.start_bar(bar_start)
+        state.bar_start = bar_start
+        complete = fields.get("CONS_END") == 1
+        state.update_bar(fields, complete)
+        candle_end = candle_start + SCALE_DURATIONS[self.scale]
+        if complete and Utils.get_bar_start(candle_end, self.interval) == candle_end:
+            closed = state.close_bar() or closed
+        return closed
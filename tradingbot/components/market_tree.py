@@ -0,0 +1,176 @@
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .broker import Broker
+
+# Node of the IG market navigation tree explored by the api market source
+ROOT_NODE = "180500"
+# Markets of the tree processed, whose epic contains any of these
+EPIC_FILTERS = ["DFB", "TODAY", "DAILY"]
+
+# Ids of the children nodes and epics of the markets of a node
+TreeNode = Dict[str, List[str]]
+
+
+class MarketTree:
+    """
+    Market navigation tree of the broker below a root node. The nodes of each
+    level of the tree are fetched concurrently by up to workers threads, still
+    paced by the rate limits of the broker interface, and the tree is saved to
+    a JSON file reused for ttl seconds, also across the restarts of the bot.
+    The filtered epic list is built once per tree
+    """
+
+    broker: Broker
+    filepath: Optional[Path]
+    ttl: float
+    workers: int
+    _root: Optional[str]
+    _time: float
+    _nodes: Dict[str, TreeNode]
+    _epics: List[str]
+
+    def __init__(
+        self,
+        broker: Broker,
+        filepath: Optional[Path] = None,
+        ttl: float = 86400.0,
+        workers: int = 4,
+    ) -> None:
+        """
+        - **broker**: the broker navigating the market nodes
+        - **filepath**: JSON file of the tree, None to keep it in memory only
+        - **ttl**: seconds the tree is reused for
+        - **workers**: number of nodes fetched at once
+        """
+        if workers < 1:
+            raise ValueError("Invalid number of market tree workers")
+        self.broker = broker
+        self.filepath = Path(filepath) if filepath else None
+        self.ttl = ttl
+        self.workers = workers
+        self._root = None
+        self._time = 0.0
+        self._nodes = {}
+        self._epics = []
+
+    def get_epics(self, root: str = ROOT_NODE) -> List[str]:
+        """
+        Return the epics of the markets below the root node matching the
+        EPIC_FILTERS, in depth first order, loading the tree if older than ttl
+        """
+        if not self._is_fresh(root, self._root, self._time):
+            self.load(root)
+        return list(self._epics)
+
+    def get_nodes(self) -> Dict[str, TreeNode]:
+        """Return the nodes of the loaded tree by node id"""
+        return dict(self._nodes)
+
+    def load(self, root: str = ROOT_NODE) -> None:
+        """
+        Load the tree from the file if it's not older than ttl, from the broker
+        otherwise. Only complete trees are saved
+        """
+        loaded = self._read(root)
+        if loaded is None:
+            start = time.monotonic()
+            nodes, complete = self.fetch(root)
+            logging.info(
+                f"Fetched {len(nodes)} market nodes in "
+                f"{time.monotonic() - start:.1f} seconds"
+            )
+            if complete:
+                loaded = (time.time(), nodes)
+                self._write(root, *loaded)
+            else:
+                # Used once, fetched again at the next load
+                loaded = (0.0, nodes)
+        self._root = root
+        self._time, self._nodes = loaded
+        self._epics = self._filter_epics(root)
+        logging.info(f"Loaded {len(self._epics)} markets from node {root}")
+
+    def fetch(self, root: str) -> Tuple[Dict[str, TreeNode], bool]:
+        """
+        Fetch the nodes below the root node, one level at a time. Return the
+        nodes by id and False if some of them couldn't be fetched
+        """
+        nodes: Dict[str, TreeNode] = {}
+        complete = True
+        level = [root]
+        seen = {root}
+        with ThreadPoolExecutor(self.workers, thread_name_prefix="market_tree") as pool:
+            while level:
+                next_level = []
+                for node_id, node in zip(level, pool.map(self._fetch_node, level)):
+                    if node is None:
+                        complete = False
+                        continue
+                    nodes[node_id] = node
+                    for child in node["nodes"]:
+                        if child not in seen:
+                            seen.add(child)
+                            next_level.append(child)
+                level = next_level
+        return nodes, complete
+
+    def _fetch_node(self, node_id: str) -> Optional[TreeNode]:
+        try:
+            node = self.broker.navigate_market_node(node_id)
+        except Exception as e:
+            logging.error(f"Unable to navigate market node {node_id}: {e}")
+            return None
+        return {
+            "nodes": [str(child["id"]) for child in node.get("nodes") or []],
+            "markets": [str(market["epic"]) for market in node.get("markets") or []],
+        }
+
+    def _filter_epics(self, root: str) -> List[str]:
+        epics: Dict[str, None] = {}
+        stack = [root]
+        seen = set()
+        while stack:
+            node_id = stack.pop()
+            if node_id in seen or node_id not in self._nodes:
+                continue
+            seen.add(node_id)
+            node = self._nodes[node_id]
+            for epic in node["markets"]:
+                if any(f in epic for f in EPIC_FILTERS):
+                    epics[epic] = None
+            stack.extend(reversed(node["nodes"]))
+        return list(epics)
+
+    def _is_fresh(self, root: str, tree_root: Optional[str], tree_time: float) -> bool:
+        return tree_root == root and time.time() - tree_time < self.ttl
+
+    def _read(self, root: str) -> Optional[Tuple[float, Dict[str, TreeNode]]]:
+        if self.filepath is None or not self.filepath.exists():
+            return None
+        try:
+            with self.filepath.open(mode="r") as f:
+                data = json.load(f)
+            if not self._is_fresh(root, data["root"], data["time"]):
+                return None
+            return float(data["time"]), data["nodes"]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logging.warning(f"Unable to read the market tree {self.filepath}: {e}")
+            return None
+
+    def _write(self, root: str, tree_time: float, nodes: Dict[str, TreeNode]) -> None:
+        if self.filepath is None:
+            return
+        try:
+            self.filepath.parent.mkdir(parents=True, exist_ok=True)
+            # Replaced at once, so that a partial file is never read
+            tmp_path = self.filepath.with_suffix(".tmp")
+            with tmp_path.open(mode="w") as f:
+                json.dump({"root": root, "time": tree_time, "nodes": nodes}, f)
+            tmp_path.replace(self.filepath)
+        except OSError as e:
+            logging.warning(f"Unable to save the market tree {self.filepath}: {e}")
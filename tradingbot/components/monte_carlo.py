@@ -0,0 +1,114 @@
+import logging
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Ways of generating the simulated sequences of trades: drawing the trades with
+# replacement or reordering them
+METHODS = ["bootstrap", "shuffle"]
+
+DEFAULT_PERCENTILES = [5, 25, 50, 75, 95]
+
+# Maximum number of simulated trades held in memory at once
+_BATCH_ELEMENTS = 1 << 22
+
+
+class MonteCarlo:
+    """
+    Monte Carlo robustness analysis of a backtest: the trades are resampled or
+    reshuffled to simulate many alternative equity paths, giving the
+    distribution of the return and max drawdown the strategy could have had.
+    Each trade is replayed as its return on the equity at the time it was
+    opened, so the position sizing relative to the equity is preserved
+    """
+
+    trade_returns: np.ndarray
+    returns: Optional[np.ndarray]
+    max_drawdowns: Optional[np.ndarray]
+
+    def __init__(self, result: pd.Series) -> None:
+        """
+        - **result**: backtest result returned by Backtester.start() or run()
+        """
+        trades = result["_trades"]
+        equity = result["_equity_curve"]["Equity"].to_numpy()
+        if trades.empty:
+            raise ValueError("The backtest has no closed trades")
+        # Equity before each trade, at the bar before the one it was opened
+        before = equity[np.maximum(trades["EntryBar"].to_numpy() - 1, 0)]
+        self.trade_returns = trades["PnL"].to_numpy() / before
+        self.returns = None
+        self.max_drawdowns = None
+
+    def run(
+        self,
+        simulations: int = 1000,
+        method: str = "bootstrap",
+        seed: Optional[int] = None,
+    ) -> None:
+        """
+        Simulate the equity paths, storing the return and max drawdown of each
+        of them in returns and max_drawdowns, in percentage
+
+        Args:
+            simulations: Number of simulated equity paths (default: 1000)
+            method: "bootstrap" draws each path's trades with replacement,
+                "shuffle" reorders the trades, which only changes the drawdowns
+            seed: Seed of the random generator, for reproducible results
+        """
+        if method not in METHODS:
+            raise ValueError(f"Invalid method {method}, expected one of {METHODS}")
+        if simulations < 1:
+            raise ValueError("simulations must be positive")
+        logging.info(f"Running {simulations} Monte Carlo simulations ({method})")
+        rng = np.random.default_rng(seed)
+        trades = len(self.trade_returns)
+        growth = 1 + self.trade_returns
+        self.returns = np.empty(simulations)
+        self.max_drawdowns = np.empty(simulations)
+        # Simulations are processed in batches to bound memory usage
+        batch = max(1, _BATCH_ELEMENTS // trades)
+        for start in range(0, simulations, batch):
+            stop = min(start + batch, simulations)
+            if method == "bootstrap":
+                paths = growth[rng.integers(0, trades, (stop - start, trades))]
+            else:
+                paths = rng.permuted(np.tile(growth, (stop - start, 1)), axis=1)
+            # Equity relative to the initial cash after each trade
+            np.cumprod(paths, axis=1, out=paths)
+            peaks = np.maximum.accumulate(np.maximum(paths, 1), axis=1)
+            self.returns[start:stop] = (paths[:, -1] - 1) * 100
+            self.max_drawdowns[start:stop] = ((paths / peaks).min(axis=1) - 1) * 100
+
+    def get_confidence_bands(
+        self, percentiles: Sequence[float] = DEFAULT_PERCENTILES
+    ) -> pd.DataFrame:
+        """
+        Return the percentiles of the simulated return and max drawdown, one
+        row per percentile. The lowest percentiles are the worst outcomes
+        """
+        if self.returns is None or self.max_drawdowns is None:
+            raise RuntimeError("No simulations available. Run run() first.")
+        return pd.DataFrame(
+            {
+                "Return [%]": np.percentile(self.returns, percentiles),
+                "Max. Drawdown [%]": np.percentile(self.max_drawdowns, percentiles),
+            },
+            index=pd.Index([f"{p}%" for p in percentiles], name="Percentile"),
+        )
+
+    def print_results(self) -> None:
+        """Print the confidence bands and probability of a loss"""
+        if self.returns is None:
+            logging.warning("No simulations available. Run run() first.")
+            return
+
+        logging.info("=" * 60)
+        logging.info(f"MONTE CARLO RESULTS ({len(self.returns)} simulations)")
+        logging.info("=" * 60)
+        for line in self.get_confidence_bands().to_string().splitlines():
+            logging.info(line)
+        loss = (self.returns < 0).mean() * 100
+        logging.info(f"{'Probability of loss [%]':30s}: {loss}")
+        logging.info("=" * 60)
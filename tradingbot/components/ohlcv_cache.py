@@ -0,0 +1,123 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CACHE_PATH = Path.home() / ".TradingBot" / "cache" / "ohlcv"
+
+
+class OHLCVCache:
+    """
+    Cache of the OHLCV dataframes loaded from CSV files, stored in a binary
+    columnar format that is memory mapped when loaded. Entries are keyed by
+    the path, modification time and size of the CSV file, so a modified file
+    is parsed again
+    """
+
+    VERSION = 1
+    INDEX_FILE = "index.npy"
+    VALUES_FILE = "values.npy"
+    META_FILE = "meta.json"
+
+    cache_dir: Path
+
+    def __init__(self, cache_dir: Optional[Path] = None) -> None:
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_PATH
+
+    def load(self, csv_path: str, variant: str = "") -> Optional[pd.DataFrame]:
+        """
+        Return the cached dataframe of the CSV file or None if not in cache.
+        The returned dataframe is read only and backed by the cache files.
+        The variant identifies different data loaded from the same file, e.g.
+        resampled to different timeframes
+        """
+        entry = self._entry_path(csv_path, variant)
+        if entry is None or not entry.is_dir():
+            return None
+        try:
+            meta = json.loads((entry / self.META_FILE).read_text())
+            index = np.load(entry / self.INDEX_FILE, mmap_mode="r")
+            values = np.load(entry / self.VALUES_FILE, mmap_mode="r")
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring corrupted cache entry {entry}: {e}")
+            return None
+        date_index = pd.DatetimeIndex(
+            index.view(f"datetime64[{meta['unit']}]"), name="Date"
+        )
+        if meta["tz"] is not None:
+            date_index = date_index.tz_localize("UTC").tz_convert(meta["tz"])
+        logging.info(f"Loaded {len(date_index)} rows of {csv_path} from cache")
+        # The values are stored column by column so each column is contiguous
+        return pd.DataFrame(
+            values, index=date_index, columns=meta["columns"], copy=False
+        )
+
+    def store(self, csv_path: str, data: pd.DataFrame, variant: str = "") -> None:
+        """
+        Store the numeric columns of the dataframe loaded from the CSV file,
+        replacing the entries of previous versions of the file. The dataframe
+        must have a DatetimeIndex
+        """
+        entry = self._entry_path(csv_path, variant)
+        if entry is None:
+            return
+        data = data.select_dtypes("number")
+        index = pd.DatetimeIndex(data.index)
+        tz = str(index.tz) if index.tz is not None else None
+        if tz is not None:
+            index = index.tz_convert("UTC").tz_localize(None)
+        # Timestamps are stored as integers in the unit of the index
+        unit, _ = np.datetime_data(index.dtype)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # Write in a temporary folder and rename it, so that concurrent readers
+        # never see a partially written entry
+        tmp = self.cache_dir / f"{entry.name}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir()
+        try:
+            np.save(
+                tmp / self.INDEX_FILE,
+                index.to_numpy().view(np.int64),
+            )
+            np.save(
+                tmp / self.VALUES_FILE,
+                np.asfortranarray(data.to_numpy(dtype=np.float64)),
+            )
+            (tmp / self.META_FILE).write_text(
+                json.dumps({"columns": list(data.columns), "tz": tz, "unit": unit})
+            )
+            self._remove_entries(entry.name.split("-")[0])
+            tmp.rename(entry)
+        except OSError as e:
+            # Another process might have stored the same entry first
+            logging.warning(f"Unable to store {csv_path} in cache: {e}")
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def clear(self) -> None:
+        """Remove all the cache entries"""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def _entry_path(self, csv_path: str, variant: str) -> Optional[Path]:
+        path = Path(csv_path).resolve()
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        path_key = hashlib.sha1(f"{path}|{variant}".encode()).hexdigest()[:16]
+        state_key = hashlib.sha1(
+            f"{stat.st_mtime_ns}:{stat.st_size}:{self.VERSION}".encode()
+        ).hexdigest()[:16]
+        return self.cache_dir / f"{path_key}-{state_key}"
+
+    def _remove_entries(self, path_key: str) -> None:
+        """Remove the entries of every version of a file"""
+        for entry in self.cache_dir.glob(f"{path_key}-*"):
+            if entry.suffix != ".tmp":
+                shutil.rmtree(entry, ignore_errors=True)
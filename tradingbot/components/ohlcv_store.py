@@ -0,0 +1,130 @@
+import logging
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_STORE_PATH = Path.home() / ".TradingBot" / "data" / "ohlcv.db"
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+class OHLCVStore:
+    """
+    SQLite store of the OHLCV bars of the markets, one series per market epic
+    and interval, shared by the live bot and the backtests. The bars are
+    indexed by series and time, so reading a time range of a series does not
+    scan the other bars. Times are stored as UTC nanoseconds
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS bars (
+            epic TEXT NOT NULL,
+            interval TEXT NOT NULL,
+            time INTEGER NOT NULL,
+            open REAL,
+            high REAL,
+            low REAL,
+            close REAL,
+            volume REAL,
+            PRIMARY KEY (epic, interval, time)
+        ) WITHOUT ROWID
+    """
+
+    db_path: Path
+
+    def __init__(self, db_path: Optional[Path] = None) -> None:
+        """
+        - **db_path**: path of the SQLite database, created if it doesn't exist
+        """
+        self.db_path = Path(db_path) if db_path else DEFAULT_STORE_PATH
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as connection:
+            # Readers of other processes, e.g. backtests, don't block the bot
+            connection.execute("PRAGMA journal_mode=WAL")
+            with connection:
+                connection.execute(self.SCHEMA)
+
+    def write(self, epic: str, interval: str, data: pd.DataFrame) -> None:
+        """
+        Store the bars of the dataframe, replacing the stored bars with the same
+        time. The dataframe must have a DatetimeIndex, naive times are UTC, and
+        the Open, High, Low, Close and Volume columns, missing values are NULL
+        """
+        if data.empty:
+            return
+        index = pd.DatetimeIndex(data.index)
+        if index.tz is None:
+            index = index.tz_localize("UTC")
+        times = index.tz_convert("UTC").tz_localize(None).to_numpy("datetime64[ns]")
+        values = data.reindex(columns=COLUMNS).astype(float)
+        # NaN are stored as NULL
+        rows = values.astype(object).where(values.notna(), None).to_numpy()
+        with closing(self._connect()) as connection, connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (epic, interval, int(t), *row)
+                    for t, row in zip(times.view(np.int64), rows.tolist())
+                ),
+            )
+        logging.debug(f"Stored {len(data)} bars of {epic} {interval}")
+
+    def read(
+        self,
+        epic: str,
+        interval: str,
+        start: Optional[pd.Timestamp] = None,
+        end: Optional[pd.Timestamp] = None,
+        limit: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        Return the bars of the series between start and end included, only the
+        last limit ones if given, with a UTC DatetimeIndex named Date and the
+        Open, High, Low, Close and Volume columns
+        """
+        query = "SELECT time, open, high, low, close, volume FROM bars"
+        query += " WHERE epic = ? AND interval = ? AND time >= ? AND time <= ?"
+        query += " ORDER BY time DESC"
+        params: List = [
+            epic,
+            interval,
+            self._to_time(start) if start is not None else -(2**63),
+            self._to_time(end) if end is not None else 2**63 - 1,
+        ]
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        with closing(self._connect()) as connection:
+            rows = connection.execute(query, params).fetchall()
+        rows.reverse()
+        times = np.array([r[0] for r in rows], dtype=np.int64)
+        values = np.array([r[1:] for r in rows], dtype=float).reshape(-1, len(COLUMNS))
+        index = pd.DatetimeIndex(times.view("datetime64[ns]"), name="Date")
+        return pd.DataFrame(values, index=index.tz_localize("UTC"), columns=COLUMNS)
+
+    def get_series(self) -> List[Tuple[str, str, int]]:
+        """Return the epic, interval and number of bars of the stored series"""
+        with closing(self._connect()) as connection:
+            return connection.execute(
+                "SELECT epic, interval, COUNT(*) FROM bars GROUP BY epic, interval"
+            ).fetchall()
+
+    def delete(self, epic: str, interval: str) -> None:
+        """Remove the bars of the series"""
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "DELETE FROM bars WHERE epic = ? AND interval = ?", (epic, interval)
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # A connection per call, so that the store can be used by any thread
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _to_time(self, timestamp: pd.Timestamp) -> int:
+        timestamp = pd.Timestamp(timestamp)
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.tz_localize("UTC")
+        return int(timestamp.value)
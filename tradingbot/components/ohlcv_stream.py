@@ -0,0 +1,228 @@
+import logging
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from ..components import Interval
+
+DEFAULT_CHUNKSIZE = 1_000_000
+
+# Pandas frequency of each Interval usable as resampling timeframe
+INTERVAL_FREQUENCIES = {
+    Interval.MINUTE_1: "1min",
+    Interval.MINUTE_2: "2min",
+    Interval.MINUTE_3: "3min",
+    Interval.MINUTE_5: "5min",
+    Interval.MINUTE_10: "10min",
+    Interval.MINUTE_15: "15min",
+    Interval.MINUTE_30: "30min",
+    Interval.HOUR: "1h",
+    Interval.HOUR_2: "2h",
+    Interval.HOUR_3: "3h",
+    Interval.HOUR_4: "4h",
+    Interval.DAY: "1D",
+    Interval.WEEK: "1W",
+    Interval.MONTH: "1MS",
+}
+
+OHLCV_AGGREGATIONS = {
+    "Open": "first",
+    "High": "max",
+    "Low": "min",
+    "Close": "last",
+    "Volume": "sum",
+}
+
+DATE_FORMAT = "%d.%m.%Y %H:%M:%S.%f"
+DATE_COLUMNS = ["Gmt time", "Date"]
+TICK_VOLUME_COLUMNS = ["AskVolume", "BidVolume", "Volume"]
+
+
+class OHLCVStream:
+    """
+    Read a CSV file of OHLCV bars or Bid/Ask ticks in chunks of bounded size,
+    cleaning each chunk as load_data_from_csv() does and optionally resampling
+    the data to a larger timeframe while it is read. The file must be sorted
+    by date
+    """
+
+    csv_path: str
+    timeframe: Optional[str]
+    chunksize: int
+
+    def __init__(
+        self,
+        csv_path: str,
+        timeframe: Optional[str] = None,
+        chunksize: int = DEFAULT_CHUNKSIZE,
+    ) -> None:
+        """
+        - **csv_path**: path of the CSV file with a "Gmt time" or "Date" column
+          and either the Open, High, Low, Close, Volume columns or the Bid and
+          optionally Ask, AskVolume, BidVolume columns of tick data
+        - **timeframe**: Interval name (e.g. MINUTE_5, HOUR, DAY) or pandas
+          frequency (e.g. 5min, 1h, 1D) of the bars to produce. Required for
+          tick data
+        - **chunksize**: number of rows read from the file at a time
+        """
+        if chunksize < 1:
+            raise ValueError("chunksize must be positive")
+        self.csv_path = csv_path
+        self.timeframe = self.parse_timeframe(timeframe) if timeframe else None
+        self.chunksize = chunksize
+
+    @staticmethod
+    def parse_timeframe(timeframe: str) -> str:
+        """Return the pandas frequency of an Interval name or pandas frequency"""
+        if timeframe in Interval.__members__:
+            return INTERVAL_FREQUENCIES[Interval[timeframe]]
+        try:
+            pd.tseries.frequencies.to_offset(timeframe)
+        except ValueError as e:
+            raise ValueError(f"Invalid timeframe {timeframe}") from e
+        return timeframe
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        """Yield the clean, and resampled if required, chunks of the file"""
+        chunks = self._read_chunks()
+        if self.timeframe is None:
+            yield from chunks
+            return
+        # The last bar of a chunk might continue in the next chunk, so it is
+        # held back and merged with the first bar of the next chunk if needed
+        pending: Optional[pd.DataFrame] = None
+        for chunk in chunks:
+            bars = self._resample(chunk, self.timeframe)
+            if bars.empty:
+                continue
+            if pending is not None:
+                if bars.index[0] == pending.index[0]:
+                    bars = pd.concat(
+                        [self._merge_bars(pending, bars.iloc[:1]), bars.iloc[1:]]
+                    )
+                else:
+                    bars = pd.concat([pending, bars])
+            pending = bars.iloc[-1:]
+            if len(bars) > 1:
+                yield bars.iloc[:-1]
+        if pending is not None:
+            yield pending
+
+    def load(self) -> pd.DataFrame:
+        """Return the whole data of the file, read chunk by chunk"""
+        logging.info(f"Streaming data from {self.csv_path}")
+        chunks = list(self)
+        if not chunks:
+            raise ValueError(f"No valid data found in {self.csv_path}")
+        data = pd.concat(chunks)
+        logging.info(
+            f"Loaded {len(data)} rows of data from {data.index[0]} to {data.index[-1]}"
+        )
+        return data
+
+    def _read_chunks(self) -> Iterator[pd.DataFrame]:
+        header = pd.read_csv(self.csv_path, nrows=0).columns
+        names: Dict[str, str] = {c: c.strip() for c in header}
+        columns = list(names.values())
+        date_column = next((c for c in DATE_COLUMNS if c in columns), None)
+        if date_column is None:
+            raise ValueError(f"No date column {DATE_COLUMNS} in {self.csv_path}")
+        if all(c in columns for c in OHLCV_AGGREGATIONS):
+            values = list(OHLCV_AGGREGATIONS)
+            ticks = False
+        elif "Bid" in columns:
+            if self.timeframe is None:
+                raise ValueError("A timeframe is required to load tick data")
+            values = [c for c in ["Bid", "Ask"] + TICK_VOLUME_COLUMNS if c in columns]
+            ticks = True
+        else:
+            raise ValueError(f"No OHLCV or Bid/Ask columns in {self.csv_path}")
+
+        reader = pd.read_csv(
+            self.csv_path,
+            usecols=[
+                raw for raw, name in names.items() if name in values + [date_column]
+            ],
+            dtype={raw: str for raw, name in names.items() if name == date_column},
+            chunksize=self.chunksize,
+        )
+        date_format: Optional[str] = DATE_FORMAT
+        last: Optional[pd.Timestamp] = None
+        for chunk in reader:
+            chunk.rename(columns=names, inplace=True)
+            dates, date_format = self._parse_dates(chunk[date_column], date_format)
+            chunk = chunk.drop(columns=date_column).apply(
+                pd.to_numeric, errors="coerce"
+            )
+            chunk.index = pd.DatetimeIndex(dates, name="Date")
+            chunk = chunk[chunk.index.notna()].dropna().sort_index()
+            if chunk.empty:
+                continue
+            if last is not None and chunk.index[0] < last:
+                raise ValueError(f"Data of {self.csv_path} is not sorted by date")
+            last = chunk.index[-1]
+            yield self._ticks_to_bars(chunk) if ticks else chunk[values]
+
+    @staticmethod
+    def _parse_dates(
+        dates: pd.Series, date_format: Optional[str]
+    ) -> Tuple[pd.Series, Optional[str]]:
+        """
+        Parse the dates with the expected format and fall back to automatic
+        format detection, which is then used for the following chunks
+        """
+        if date_format is not None:
+            try:
+                return pd.to_datetime(dates, format=date_format), date_format
+            except (ValueError, TypeError):
+                logging.info("Parsing dates using automatic format detection")
+        try:
+            return pd.to_datetime(dates), None
+        except (ValueError, TypeError) as e:
+            raise ValueError(
+                f"Unable to parse date column. Expected format: {DATE_FORMAT} "
+                "or any standard datetime format"
+            ) from e
+
+    @staticmethod
+    def _ticks_to_bars(ticks: pd.DataFrame) -> pd.DataFrame:
+        """Convert ticks to single price bars using the mid price if available"""
+        price = (ticks["Bid"] + ticks["Ask"]) / 2 if "Ask" in ticks else ticks["Bid"]
+        volumes: List[str] = [c for c in TICK_VOLUME_COLUMNS if c in ticks]
+        volume = ticks[volumes].sum(axis=1) if volumes else 0.0
+        return pd.DataFrame(
+            {
+                "Open": price,
+                "High": price,
+                "Low": price,
+                "Close": price,
+                "Volume": volume,
+            },
+            index=ticks.index,
+        )
+
+    @staticmethod
+    def _resample(data: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+        # A fixed origin gives the same buckets whatever the first row of the
+        # chunk. Other frequencies, e.g. months, are always calendar aligned
+        if isinstance(pd.tseries.frequencies.to_offset(timeframe), pd.offsets.Tick):
+            resampler = data.resample(timeframe, origin="epoch")
+        else:
+            resampler = data.resample(timeframe)
+        bars = resampler.agg(OHLCV_AGGREGATIONS)
+        # Periods without data, e.g. week ends, have no bar
+        return bars.dropna(subset=["Open"])
+
+    @staticmethod
+    def _merge_bars(first: pd.DataFrame, second: pd.DataFrame) -> pd.DataFrame:
+        """Merge two parts of the same bar"""
+        return pd.DataFrame(
+            {
+                "Open": first["Open"].iloc[0],
+                "High": max(first["High"].iloc[0], second["High"].iloc[0]),
+                "Low": min(first["Low"].iloc[0], second["Low"].iloc[0]),
+                "Close": second["Close"].iloc[0],
+                "Volume": first["Volume"].iloc[0] + second["Volume"].iloc[0],
+            },
+            index=first.index,
+        )
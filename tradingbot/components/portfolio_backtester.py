@@ -0,0 +1,264 @@
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, cast
+
+import pandas as pd
+
+from ..components import ConfigDict, Configuration
+from ..components.backtest_result_cache import BacktestResultCache
+from ..components.backtester import ENGINES, RESULT_METRICS, Backtester
+from ..components.broker import Broker
+from ..components.ohlcv_cache import OHLCVCache
+from ..strategies import StrategyFactory, StrategyImpl
+
+PORTFOLIO_METRICS = [
+    "Start",
+    "End",
+    "Duration",
+    "# Markets",
+    "# Failed Markets",
+    "Equity Final [$]",
+    "Equity Peak [$]",
+    "Return [%]",
+    "Max. Drawdown [%]",
+    "# Trades",
+    "Win Rate [%]",
+    "Best Market",
+    "Worst Market",
+]
+
+
+def _run_market(
+    raw_config: ConfigDict,
+    strategy_name: str,
+    csv_path: str,
+    cash: float,
+    commission: float,
+    cache_dir: Optional[Path],
+    timeframe: Optional[str],
+    chunksize: Optional[int],
+    engine: str,
+    result_cache: Optional[BacktestResultCache],
+) -> Tuple[Dict[str, Any], pd.Series]:
+    """Backtest the strategy on a single market returning metrics and equity"""
+    # Strategies do not use the broker when backtesting
+    factory = StrategyFactory(Configuration(raw_config), cast(Broker, None))
+    cache = OHLCVCache(cache_dir) if cache_dir else None
+    backtester = Backtester(
+        factory.make_strategy(strategy_name),
+        cache,
+        timeframe,
+        chunksize,
+        engine,
+        result_cache,
+    )
+    result = backtester.run(
+        backtester.load_data_from_csv(csv_path), cash=cash, commission=commission
+    )
+    # Only send back what is needed to build the portfolio result
+    return backtester.get_metrics(), result["_equity_curve"]["Equity"]
+
+
+class PortfolioBacktester:
+    """
+    Backtest a strategy on many markets in parallel worker processes, one CSV
+    file per market, and combine the results in a single portfolio with the
+    initial cash split equally across the markets
+    """
+
+    strategy: StrategyImpl
+    result: Optional[pd.Series]
+    equity_curve: Optional[pd.Series]
+    markets: Optional[pd.DataFrame]
+    cache: Optional[OHLCVCache]
+    timeframe: Optional[str]
+    chunksize: Optional[int]
+    engine: str
+    result_cache: Optional[BacktestResultCache]
+
+    def __init__(
+        self,
+        strategy: StrategyImpl,
+        cache: Optional[OHLCVCache] = None,
+        timeframe: Optional[str] = None,
+        chunksize: Optional[int] = None,
+        engine: str = "backtesting",
+        result_cache: Optional[BacktestResultCache] = None,
+    ) -> None:
+        """See Backtester for the description of the arguments"""
+        if engine not in ENGINES:
+            raise ValueError(f"Invalid engine {engine}, expected one of {ENGINES}")
+        logging.info("PortfolioBacktester created")
+        self.strategy = strategy
+        self.cache = cache
+        self.timeframe = timeframe
+        self.chunksize = chunksize
+        self.engine = engine
+        self.result_cache = result_cache
+        self.result = None
+        self.equity_curve = None
+        self.markets = None
+
+    @staticmethod
+    def load_markets(path: str) -> Dict[str, str]:
+        """
+        Return the CSV file path of each market, using the file name as market
+        name. The path is either a directory of CSV files or a manifest file
+        listing one CSV path per line, relative to the manifest location.
+        Empty lines and lines starting with # are ignored
+        """
+        source = Path(path)
+        if source.is_dir():
+            files = sorted(source.glob("*.csv"))
+        elif source.is_file():
+            files = []
+            for line in source.read_text().splitlines():
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    files.append(source.parent / line)
+        else:
+            raise ValueError(f"Portfolio source {path} does not exist")
+        markets: Dict[str, str] = {}
+        for f in files:
+            if f.stem in markets:
+                raise ValueError(f"Duplicated market {f.stem} in {path}")
+            markets[f.stem] = str(f)
+        if not markets:
+            raise ValueError(f"No market CSV files found in {path}")
+        return markets
+
+    def start(
+        self,
+        path: str,
+        cash: float = 10000,
+        commission: float = 0.002,
+        max_workers: Optional[int] = None,
+    ) -> pd.Series:
+        """
+        Run the portfolio backtest
+
+        Args:
+            path: Directory or manifest of per-market CSV files (see load_markets)
+            cash: Initial cash of the whole portfolio (default: 10000)
+            commission: Commission percentage per trade (default: 0.002 = 0.2%)
+            max_workers: Number of worker processes (default: number of CPUs)
+        """
+        markets = self.load_markets(path)
+        strategy_name = StrategyFactory.get_strategy_name(self.strategy)
+        raw_config = self.strategy.config.get_raw_config()
+        allocation = cash / len(markets)
+        max_workers = min(max_workers or os.cpu_count() or 1, len(markets))
+        logging.info(
+            f"Starting portfolio backtest of {strategy_name} on {len(markets)} "
+            f"markets with {max_workers} workers and {allocation} cash per market"
+        )
+        metrics: Dict[str, Dict[str, Any]] = {}
+        curves: Dict[str, pd.Series] = {}
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = {
+                pool.submit(
+                    _run_market,
+                    raw_config,
+                    strategy_name,
+                    csv_path,
+                    allocation,
+                    commission,
+                    self.cache.cache_dir if self.cache else None,
+                    self.timeframe,
+                    self.chunksize,
+                    self.engine,
+                    self.result_cache,
+                ): name
+                for name, csv_path in markets.items()
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                name = futures[future]
+                try:
+                    metrics[name], curves[name] = future.result()
+                except Exception as e:
+                    # A single bad file should not invalidate the whole portfolio
+                    logging.error(f"Backtest of market {name} failed: {e}")
+                logging.info(f"Completed {done}/{len(markets)} markets")
+
+        if not curves:
+            raise RuntimeError("Backtest failed on every market")
+        names = [n for n in markets if n in curves]
+        self.markets = pd.DataFrame(
+            [metrics[n] for n in names],
+            index=pd.Index(names, name="Market"),
+            columns=RESULT_METRICS,
+        )
+        self.equity_curve = self._combine_equity_curves(
+            [curves[n] for n in names], allocation
+        )
+        # Allocation of the failed markets is kept as cash
+        self.equity_curve += allocation * (len(markets) - len(names))
+        self.result = self._compute_metrics(
+            self.equity_curve, self.markets, cash, len(markets)
+        )
+        logging.info("Portfolio backtest completed")
+        return self.result
+
+    @staticmethod
+    def _combine_equity_curves(curves: List[pd.Series], allocation: float) -> pd.Series:
+        """
+        Sum the equity curves of the markets over the union of their timestamps.
+        A market contributes its allocation before its first bar and its last
+        equity value after its last bar
+        """
+        equity = pd.concat(curves, axis=1, ignore_index=True).sort_index()
+        equity = equity.ffill().fillna(allocation).sum(axis=1)
+        equity.name = "Equity"
+        return equity
+
+    @staticmethod
+    def _compute_metrics(
+        equity: pd.Series, markets: pd.DataFrame, cash: float, total_markets: int
+    ) -> pd.Series:
+        """Compute the portfolio metrics from the combined equity curve"""
+        trades = markets["# Trades"].fillna(0)
+        wins = (markets["Win Rate [%]"].fillna(0) * trades / 100).sum()
+        drawdown = equity / equity.cummax() - 1
+        returns = markets["Return [%]"]
+        return pd.Series(
+            {
+                "Start": equity.index[0],
+                "End": equity.index[-1],
+                "Duration": equity.index[-1] - equity.index[0],
+                "# Markets": total_markets,
+                "# Failed Markets": total_markets - len(markets),
+                "Equity Final [$]": equity.iloc[-1],
+                "Equity Peak [$]": equity.max(),
+                "Return [%]": (equity.iloc[-1] - cash) / cash * 100,
+                "Max. Drawdown [%]": drawdown.min() * 100,
+                "# Trades": int(trades.sum()),
+                "Win Rate [%]": wins / trades.sum() * 100 if trades.sum() else None,
+                "Best Market": returns.idxmax(),
+                "Worst Market": returns.idxmin(),
+            },
+            index=PORTFOLIO_METRICS,
+        )
+
+    def print_results(self, top: int = 10) -> None:
+        """Print the portfolio metrics and the markets ranked by return"""
+        if self.result is None or self.markets is None:
+            logging.warning("No backtest results available. Run start() first.")
+            return
+
+        logging.info("=" * 60)
+        logging.info("PORTFOLIO BACKTEST RESULTS")
+        logging.info("=" * 60)
+        for key, value in self.result.items():
+            if value is not None:
+                logging.info(f"{key:30s}: {value}")
+        logging.info("=" * 60)
+        logging.info(f"MARKETS BY RETURN (top {min(top, len(self.markets))})")
+        logging.info("=" * 60)
+        table = self.markets[
+            ["Return [%]", "Max. Drawdown [%]", "Win Rate [%]", "# Trades", "SQN"]
+        ].sort_values("Return [%]", ascending=False, na_position="last")
+        for line in table.head(top).to_string().splitlines():
+            logging.info(line)
+        logging.info("=" * 60)
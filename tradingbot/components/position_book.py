@@ -0,0 +1,146 @@
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+from ..interfaces import Position
+from . import TradeDirection
+from .broker import Broker
+
+# Positions of a market in one direction
+PositionKey = Tuple[str, TradeDirection]
+
+
+class PositionBook:
+    """
+    Open positions of the account, fetched from the broker once per spin and
+    indexed by market epic and direction. The book is updated locally when the
+    broker confirms a trade and reconciled with the broker at the end of the
+    spin. It can be read by concurrent threads
+    """
+
+    broker: Broker
+    _positions: Dict[PositionKey, List[Position]]
+
+    def __init__(self, broker: Broker) -> None:
+        self.broker = broker
+        self._positions = {}
+        self._lock = threading.RLock()
+
+    def refresh(self) -> None:
+        """
+        Replace the book with the open positions of the broker.
+        Raise RuntimeError if they can't be fetched
+        """
+        self._set_positions(self.broker.get_open_positions())
+
+    async def refresh_async(self) -> None:
+        """Asynchronous refresh()"""
+        self._set_positions(await self.broker.get_open_positions_async())
+
+    def _set_positions(self, positions: Optional[List[Position]]) -> None:
+        if positions is None:
+            logging.warning("Unable to fetch open positions! Will try again...")
+            raise RuntimeError("Unable to fetch open positions")
+        book: Dict[PositionKey, List[Position]] = {}
+        for position in positions:
+            book.setdefault((position.epic, position.direction), []).append(position)
+        with self._lock:
+            self._positions = book
+
+    def reconcile(self) -> None:
+        """
+        Refresh the book, logging the markets whose positions changed outside
+        of the local updates, e.g. closed by their stop. Errors are logged and
+        the book is kept as it is
+        """
+        local = self._get_keys()
+        try:
+            self.refresh()
+        except Exception as e:
+            logging.warning(f"Unable to reconcile the open positions: {e}")
+            return
+        self._log_changes(local)
+
+    async def reconcile_async(self) -> None:
+        """Asynchronous reconcile()"""
+        local = self._get_keys()
+        try:
+            await self.refresh_async()
+        except Exception as e:
+            logging.warning(f"Unable to reconcile the open positions: {e}")
+            return
+        self._log_changes(local)
+
+    def _log_changes(self, local: Set[PositionKey]) -> None:
+        remote = self._get_keys()
+        for epic, direction in sorted(local ^ remote, key=str):
+            state = "opened" if (epic, direction) in remote else "closed"
+            logging.info(f"Position {direction.value} of {epic} {state} by the broker")
+
+    def get_positions(self) -> List[Position]:
+        """Return all the open positions"""
+        with self._lock:
+            return [p for positions in self._positions.values() for p in positions]
+
+    def get_epics(self) -> List[str]:
+        """Return the epics of the markets with open positions"""
+        with self._lock:
+            return list(dict.fromkeys(epic for epic, _ in self._positions))
+
+    def get(
+        self, epic: str, direction: Optional[TradeDirection] = None
+    ) -> List[Position]:
+        """
+        Return the open positions of the market, only those in the given
+        direction if any
+        """
+        with self._lock:
+            if direction is not None:
+                return list(self._positions.get((epic, direction), []))
+            return [
+                p
+                for (e, _), positions in self._positions.items()
+                if e == epic
+                for p in positions
+            ]
+
+    def add_trade(
+        self,
+        epic: str,
+        direction: TradeDirection,
+        limit: Optional[float],
+        stop: Optional[float],
+    ) -> None:
+        """
+        Record a trade confirmed by the broker. The deal details not known
+        until the next refresh are None
+        """
+        position = Position(
+            deal_id=None,
+            size=None,
+            create_date=datetime.now(timezone.utc).isoformat(),
+            direction=direction,
+            level=None,
+            limit=limit,
+            stop=stop,
+            currency=None,
+            epic=epic,
+            market_id=None,
+        )
+        with self._lock:
+            self._positions.setdefault((epic, direction), []).append(position)
+
+    def remove(self, position: Position) -> None:
+        """Remove a position closed by the broker"""
+        key = (position.epic, position.direction)
+        with self._lock:
+            positions = [p for p in self._positions.get(key, []) if p is not position]
+            if positions:
+                self._positions[key] = positions
+            else:
+                self._positions.pop(key, None)
+
+    def _get_keys(self) -> Set[PositionKey]:
+        with self._lock:
+            return set(self._positions)
@@ -0,0 +1,202 @@
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+from ..interfaces import Market, MarketHistory
+from . import Interval
+from .ohlcv_store import COLUMNS, OHLCVStore
+
+# Shortest duration of the bars of each interval, so that the number of bars
+# elapsed since the last cached one is never underestimated
+INTERVAL_DURATIONS = {
+    Interval.MINUTE_1: timedelta(minutes=1),
+    Interval.MINUTE_2: timedelta(minutes=2),
+    Interval.MINUTE_3: timedelta(minutes=3),
+    Interval.MINUTE_5: timedelta(minutes=5),
+    Interval.MINUTE_10: timedelta(minutes=10),
+    Interval.MINUTE_15: timedelta(minutes=15),
+    Interval.MINUTE_30: timedelta(minutes=30),
+    Interval.HOUR: timedelta(hours=1),
+    Interval.HOUR_2: timedelta(hours=2),
+    Interval.HOUR_3: timedelta(hours=3),
+    Interval.HOUR_4: timedelta(hours=4),
+    Interval.DAY: timedelta(days=1),
+    Interval.WEEK: timedelta(weeks=1),
+    Interval.MONTH: timedelta(days=28),
+}
+
+# Price history of a market with a given interval
+PriceKey = Tuple[str, Interval]
+# Bars indexed by their UTC time in ascending order, and whether the broker
+# returns them in descending order
+CachedHistory = Tuple[pd.DataFrame, bool]
+# Columns of the MarketHistory prices, in the order of the OHLCVStore ones
+PRICE_COLUMNS = [
+    MarketHistory.OPEN_COLUMN,
+    MarketHistory.HIGH_COLUMN,
+    MarketHistory.LOW_COLUMN,
+    MarketHistory.CLOSE_COLUMN,
+    MarketHistory.VOLUME_COLUMN,
+]
+
+
+class PriceHistoryCache:
+    """
+    Cache of the price histories of the markets, one per market epic and
+    interval, kept in memory and optionally persisted in an OHLCVStore, so they
+    survive the restarts and can be backtested. Once a history is cached only
+    the bars since its last one are requested to the broker and merged with
+    the cached ones. The last cached bar is always requested again, as it may
+    have been incomplete, and it is used to verify that there is no gap between
+    the cached and the new bars. The dates of the returned histories are UTC
+    timestamps
+    """
+
+    store: Optional[OHLCVStore]
+    _histories: Dict[PriceKey, CachedHistory]
+
+    def __init__(self, store: Optional[OHLCVStore] = None) -> None:
+        """
+        - **store**: store of the bars, None to keep them in memory only
+        """
+        self.store = store
+        self._histories = {}
+        self._lock = threading.Lock()
+
+    def get_prices(
+        self,
+        market: Market,
+        interval: Interval,
+        data_range: int,
+        fetch: Callable[[int], MarketHistory],
+    ) -> MarketHistory:
+        """
+        Return the last data_range bars of the market
+
+            - **fetch**: function requesting the given number of most recent
+              bars of the market to the broker
+        """
+        key = (market.epic, interval)
+        cached, bars = self._get_request(key, interval, data_range)
+        fetched = self._to_bars(fetch(bars))
+        if cached is not None and not self._overlaps(key, cached, fetched):
+            cached, fetched = None, self._to_bars(fetch(data_range))
+        return self._update(key, market, data_range, cached, fetched)
+
+    async def get_prices_async(
+        self,
+        market: Market,
+        interval: Interval,
+        data_range: int,
+        fetch: Callable[[int], Awaitable[MarketHistory]],
+    ) -> MarketHistory:
+        """
+        Asynchronous get_prices(), with a coroutine function as fetch
+        """
+        key = (market.epic, interval)
+        cached, bars = self._get_request(key, interval, data_range)
+        fetched = self._to_bars(await fetch(bars))
+        if cached is not None and not self._overlaps(key, cached, fetched):
+            cached, fetched = None, self._to_bars(await fetch(data_range))
+        return self._update(key, market, data_range, cached, fetched)
+
+    def clear(self) -> None:
+        """Forget the histories kept in memory, the store is not modified"""
+        with self._lock:
+            self._histories = {}
+
+    def _get_request(
+        self, key: PriceKey, interval: Interval, data_range: int
+    ) -> Tuple[Optional[CachedHistory], int]:
+        """
+        Return the cached history to update and the number of bars to request,
+        or None and data_range if the whole history must be requested
+        """
+        cached = self._load(key, data_range)
+        if cached is None or len(cached[0]) < data_range:
+            return None, data_range
+        elapsed = datetime.now(timezone.utc) - cached[0].index[-1]
+        # At least two bars, to know the order of the broker
+        bars = max(int(elapsed / INTERVAL_DURATIONS[interval]) + 1, 2)
+        if bars >= data_range:
+            return None, data_range
+        logging.debug(f"Requesting {bars} new bars of {key[0]}")
+        return cached, bars
+
+    def _to_bars(self, history: MarketHistory) -> CachedHistory:
+        """Return the bars of the history indexed by their UTC time"""
+        frame = history.dataframe
+        times = pd.DatetimeIndex(
+            pd.to_datetime(frame[MarketHistory.DATE_COLUMN], utc=True)
+        )
+        descending = len(times) > 1 and times[0] > times[-1]
+        bars = frame[PRICE_COLUMNS].astype(float).set_axis(times, axis=0)
+        return bars.sort_index(), descending
+
+    def _overlaps(
+        self, key: PriceKey, cached: CachedHistory, fetched: CachedHistory
+    ) -> bool:
+        """Return True if there is no gap between the cached and fetched bars"""
+        bars, history = fetched[0], cached[0]
+        if bars.empty or bars.index[0] > history.index[-1]:
+            logging.debug(f"Price history of {key[0]} has a gap, fetching it all")
+            return False
+        return True
+
+    def _update(
+        self,
+        key: PriceKey,
+        market: Market,
+        data_range: int,
+        cached: Optional[CachedHistory],
+        fetched: CachedHistory,
+    ) -> MarketHistory:
+        """
+        Merge the fetched bars with the cached ones, keeping as many bars as
+        the longest history requested, and return the last data_range bars
+        """
+        new_bars, descending = fetched
+        new_bars = new_bars[~new_bars.index.duplicated(keep="last")]
+        bars, size = new_bars, data_range
+        if cached is not None:
+            history = cached[0]
+            bars = pd.concat([history[history.index < bars.index[0]], bars])
+            size = max(data_range, len(history))
+        bars = bars.iloc[-size:]
+        with self._lock:
+            self._histories[key] = (bars, descending)
+        if self.store is not None:
+            self.store.write(key[0], key[1].value, new_bars.set_axis(COLUMNS, axis=1))
+        rows = bars.iloc[-data_range:]
+        if descending:
+            rows = rows.iloc[::-1]
+        return MarketHistory(
+            market,
+            rows.index,
+            rows[MarketHistory.HIGH_COLUMN].to_numpy(),
+            rows[MarketHistory.LOW_COLUMN].to_numpy(),
+            rows[MarketHistory.CLOSE_COLUMN].to_numpy(),
+            rows[MarketHistory.VOLUME_COLUMN].to_numpy(),
+            rows[MarketHistory.OPEN_COLUMN].to_numpy(),
+        )
+
+    def _load(self, key: PriceKey, data_range: int) -> Optional[CachedHistory]:
+        """
+        Return the history kept in memory, loading the last data_range bars from
+        the store the first time. The order of the broker is not stored, so it is
+        assumed ascending until the next request
+        """
+        with self._lock:
+            if key in self._histories:
+                return self._histories[key]
+        if self.store is None:
+            return None
+        bars = self.store.read(key[0], key[1].value, limit=data_range)
+        if bars.empty:
+            return None
+        cached = (bars.set_axis(PRICE_COLUMNS, axis=1), False)
+        with self._lock:
+            return self._histories.setdefault(key, cached)
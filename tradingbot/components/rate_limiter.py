@@ -0,0 +1,105 @@
+import asyncio
+import threading
+import time
+from typing import Dict, List, Mapping, Optional
+
+from . import Configuration
+
+
+class TokenBucket:
+    """
+    Token bucket allowing up to burst calls at once and then one call every
+    interval seconds. Each call takes a token, possibly before it is available,
+    and waits exactly until it is, so concurrent threads and asyncio tasks are
+    served in order of arrival
+    """
+
+    interval: float
+    burst: int
+
+    def __init__(self, interval: float, burst: int = 1) -> None:
+        """
+        - **interval**: seconds between two calls, 0 for no limit
+        - **burst**: number of calls allowed at once after a pause
+        """
+        if interval < 0:
+            raise ValueError("interval must not be negative")
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+        self.interval = interval
+        self.burst = burst
+        self._tokens = float(burst)
+        self._timestamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token, returning the seconds to wait before it is available"""
+        if self.interval == 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            refill = (now - self._timestamp) / self.interval
+            self._tokens = min(float(self.burst), self._tokens + refill) - 1
+            self._timestamp = now
+            return max(0.0, -self._tokens * self.interval)
+
+
+class RateLimiter:
+    """
+    Rate limits of the calls to an API: every call waits for the bucket of the
+    whole interface, after the bucket of its endpoint when it has its own limit
+    """
+
+    interface_bucket: TokenBucket
+    endpoint_buckets: Dict[str, TokenBucket]
+
+    def __init__(
+        self,
+        interval: float = 0,
+        burst: int = 1,
+        endpoint_intervals: Optional[Mapping[str, float]] = None,
+    ) -> None:
+        """
+        - **interval**: seconds between two calls to the interface
+        - **burst**: number of calls allowed at once after a pause
+        - **endpoint_intervals**: seconds between two calls to an endpoint, for
+          the endpoints with a stricter limit than the interface
+        """
+        self.interface_bucket = TokenBucket(interval, burst)
+        self.endpoint_buckets = {
+            name: TokenBucket(seconds, burst)
+            for name, seconds in (endpoint_intervals or {}).items()
+        }
+
+    @staticmethod
+    def from_config(config: Configuration, interface: str) -> "RateLimiter":
+        """
+        Create the rate limiter of an interface from the api_timeout, api_burst
+        and api_endpoint_timeouts of its [stocks_interface.*] section
+        """
+        return RateLimiter(
+            config.get_api_timeout(interface),
+            config.get_api_burst(interface),
+            config.get_api_endpoint_timeouts(interface),
+        )
+
+    def wait(self, endpoint: Optional[str] = None) -> None:
+        """Block until a call to the endpoint is allowed"""
+        for bucket in self._get_buckets(endpoint):
+            delay = bucket.reserve()
+            if delay > 0:
+                time.sleep(delay)
+
+    async def wait_async(self, endpoint: Optional[str] = None) -> None:
+        """Wait without blocking the event loop until a call is allowed"""
+        for bucket in self._get_buckets(endpoint):
+            delay = bucket.reserve()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+    def _get_buckets(self, endpoint: Optional[str]) -> List[TokenBucket]:
+        # The interface bucket is reserved last, when the call is about to happen
+        buckets = [self.interface_bucket]
+        if endpoint in self.endpoint_buckets:
+            buckets.insert(0, self.endpoint_buckets[endpoint])
+        return buckets
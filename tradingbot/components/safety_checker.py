@@ -0,0 +1,85 @@
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from . import Configuration, MarketClosedException, NotSafeToTradeException
+from .broker import Broker
+from .time_provider import TimeProvider
+
+
+class SafetyChecker:
+    """
+    Check that it is safe to trade before processing a market. The percentage
+    of the account used and the market opening state are cached for the
+    configured time to live, as they rarely change between two markets, and
+    the cache is invalidated after every trade
+    """
+
+    config: Configuration
+    broker: Broker
+    time_provider: TimeProvider
+    ttl: float
+    _cache: Dict[str, Tuple[Any, datetime]]
+
+    def __init__(
+        self,
+        config: Configuration,
+        broker: Broker,
+        time_provider: TimeProvider,
+        ttl: Optional[float] = None,
+    ) -> None:
+        """
+        - **config**: configuration with the maximum account usable
+        - **broker**: broker providing the account used percentage
+        - **time_provider**: provider of the market opening state and of the
+          time the results are cached by
+        - **ttl**: seconds the results are cached for, by default the
+          safety_checks_ttl of the configuration. 0 disables the cache
+        """
+        self.config = config
+        self.broker = broker
+        self.time_provider = time_provider
+        self.ttl = config.get_safety_checks_ttl() if ttl is None else ttl
+        self._cache = {}
+
+    def check(self) -> None:
+        """
+        Raise NotSafeToTradeException if the account used percentage can't be
+        fetched or is above the maximum usable, and MarketClosedException if
+        the market is closed
+        """
+        percent_used = self._get("account_used_perc", self.broker.get_account_used_perc)
+        if percent_used is None:
+            logging.warning(
+                "Stop trading because can't fetch percentage of account used"
+            )
+            raise NotSafeToTradeException()
+        if percent_used >= self.config.get_max_account_usable():
+            logging.warning(
+                f"Stop trading because {str(percent_used)}% of account is used"
+            )
+            raise NotSafeToTradeException()
+        time_zone = self.config.get_time_zone()
+        if not self._get(
+            "market_open", lambda: self.time_provider.is_market_open(time_zone)
+        ):
+            raise MarketClosedException()
+
+    def invalidate(self) -> None:
+        """Forget the cached results, e.g. after a trade"""
+        self._cache.clear()
+
+    def _get(self, name: str, fetch: Callable[[], Any]) -> Any:
+        """
+        Return the cached value if younger than the time to live, otherwise
+        fetch it again. None values are not cached
+        """
+        now = self.time_provider.now()
+        if name in self._cache:
+            value, timestamp = self._cache[name]
+            if (now - timestamp).total_seconds() < self.ttl:
+                return value
+        value = fetch()
+        if value is not None:
+            self._cache[name] = (value, now)
+        return value
@@ -1,7 +1,8 @@
 import logging
 import time
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from enum import Enum
+from typing import Optional
 
 import pytz
 from govuk_bank_holidays.bank_holidays import BankHolidays
@@ -21,9 +22,17 @@ class TimeProvider:
     such as wait, sleep or compute date/time operations
     """
 
+    # UK bank holidays, downloaded at most once a day
+    _bank_holidays: Optional[BankHolidays] = None
+    _bank_holidays_date: Optional[date] = None
+
     def __init__(self) -> None:
         logging.debug("TimeProvider __init__")
 
+    def now(self) -> datetime:
+        """Return the current naive UTC time"""
+        return datetime.now(pytz.utc).replace(tzinfo=None)
+
     def is_market_open(self, timezone: str) -> bool:
         """
         Return True if the market is open, false otherwise
@@ -32,9 +41,9 @@ class TimeProvider:
         """
         tz = pytz.timezone(timezone)
         now_time = datetime.now(tz=tz).strftime("%H:%M")
-        return BankHolidays().is_work_day(datetime.now(tz=tz)) and Utils.is_between(
-            str(now_time), ("07:55", "16:35")
-        )
+        return self._get_bank_holidays().is_work_day(
+            datetime.now(tz=tz)
+        ) and Utils.is_between(str(now_time), ("07:55", "16:35"))
 
     def get_seconds_to_market_opening(self, from_time: datetime) -> float:
         """Return the amount of seconds from now to the next market opening,
@@ -49,11 +58,15 @@ class TimeProvider:
             microsecond=0,
         )
 
-        if from_time < today_opening and BankHolidays().is_work_day(from_time.date()):
+        if from_time < today_opening and self._get_bank_holidays().is_work_day(
+            from_time.date()
+        ):
             nextMarketOpening = today_opening
         else:
             # Get next working day
-            nextWorkDate = BankHolidays().get_next_work_day(date=from_time.date())
+            nextWorkDate = self._get_bank_holidays().get_next_work_day(
+                date=from_time.date()
+            )
             nextMarketOpening = datetime(
                 year=nextWorkDate.year,
                 month=nextWorkDate.month,
@@ -66,6 +79,18 @@ class TimeProvider:
         # Calculate the delta from from_time to the next market opening
         return (nextMarketOpening - from_time).total_seconds()
 
+    def get_next_market_opening(self) -> datetime:
+        """Return the naive UTC time of the next market opening"""
+        seconds = self.get_seconds_to_market_opening(datetime.now())
+        return self.now() + timedelta(seconds=seconds)
+
+    def _get_bank_holidays(self) -> BankHolidays:
+        today = date.today()
+        if self._bank_holidays is None or self._bank_holidays_date != today:
+            self._bank_holidays = BankHolidays()
+            self._bank_holidays_date = today
+        return self._bank_holidays
+
     def wait_for(self, time_amount_type: TimeAmount, amount: float = -1.0) -> None:
         """Wait for the specified amount of time.
         An TimeAmount type can be specified
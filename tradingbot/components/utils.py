@@ -1,5 +1,6 @@
 import functools
 import threading
+from datetime import datetime
 from enum import Enum
 from typing import Any, Dict, List, Tuple, Union
 
@@ -38,6 +39,25 @@ class Interval(Enum):
     MONTH = "MONTH"
 
 
+# pandas frequency of the bars of each interval, periods for the calendar ones
+BAR_FREQUENCIES = {
+    Interval.MINUTE_1: "1min",
+    Interval.MINUTE_2: "2min",
+    Interval.MINUTE_3: "3min",
+    Interval.MINUTE_5: "5min",
+    Interval.MINUTE_10: "10min",
+    Interval.MINUTE_15: "15min",
+    Interval.MINUTE_30: "30min",
+    Interval.HOUR: "1h",
+    Interval.HOUR_2: "2h",
+    Interval.HOUR_3: "3h",
+    Interval.HOUR_4: "4h",
+    Interval.DAY: "1D",
+    Interval.WEEK: "W",
+    Interval.MONTH: "M",
+}
+
+
 class MarketClosedException(Exception):
     """Error to notify that the market is currently closed"""
 
@@ -133,6 +153,31 @@ class Utils:
         hours, mins = divmod(mins, 60)
         return f"{int(hours):02d}:{int(mins):02d}:{int(secs):02d}"
 
+    @staticmethod
+    def get_bar_start(time: datetime, interval: Interval) -> datetime:
+        """
+        Return the start of the bar of the interval containing the naive UTC
+        time. Weeks start on Monday
+        """
+        timestamp = pandas.Timestamp(time)
+        frequency = BAR_FREQUENCIES[interval]
+        if interval in [Interval.WEEK, Interval.MONTH]:
+            return timestamp.to_period(frequency).start_time.to_pydatetime()
+        return timestamp.floor(frequency).to_pydatetime()
+
+    @staticmethod
+    def get_bar_end(time: datetime, interval: Interval) -> datetime:
+        """
+        Return the end of the bar of the interval containing the naive UTC time,
+        which is the start of the next bar
+        """
+        timestamp = pandas.Timestamp(time)
+        frequency = BAR_FREQUENCIES[interval]
+        if interval in [Interval.WEEK, Interval.MONTH]:
+            return (timestamp.to_period(frequency) + 1).start_time.to_pydatetime()
+        bar_start = timestamp.floor(frequency)
+        return (bar_start + pandas.Timedelta(frequency)).to_pydatetime()
+
     @staticmethod
     def macd_df_from_list(price_list: List[float]) -> pandas.DataFrame:
         """Return a MACD pandas dataframe with columns "MACD", "Signal" and "Hist"""
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 
 import pandas
 
@@ -7,6 +7,7 @@ from . import Market
 
 class MarketHistory:
     DATE_COLUMN: str = "date"
+    OPEN_COLUMN: str = "open"
     HIGH_COLUMN: str = "high"
     LOW_COLUMN: str = "low"
     CLOSE_COLUMN: str = "close"
@@ -23,6 +24,7 @@ class MarketHistory:
         low: List[float],
         close: List[float],
         volume: List[float],
+        open: Optional[List[float]] = None,
     ) -> None:
         self.market = market
         self.dataframe = pandas.DataFrame(
@@ -40,3 +42,5 @@ class MarketHistory:
         self.dataframe[self.LOW_COLUMN] = low
         self.dataframe[self.CLOSE_COLUMN] = close
         self.dataframe[self.VOLUME_COLUMN] = volume
+        # The open price is not provided by all the interfaces
+        self.dataframe[self.OPEN_COLUMN] = float("nan") if open is None else open
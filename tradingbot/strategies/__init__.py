@@ -3,6 +3,7 @@ from .base import (  # NOQA # isort:skip
     DataPoints,
     Strategy,
     TradeSignal,
+    TradeSignals,
 )
 from .simple_macd import SimpleMACD  # NOQA # isort:skip
 from .simple_bollinger_bands import SimpleBollingerBands  # NOQA # isort:skip
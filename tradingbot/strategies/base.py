@@ -1,15 +1,20 @@
+import asyncio
 import logging
 from abc import ABC, abstractmethod
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple, Union
 
-from ..components import Configuration, TradeDirection
+import numpy as np
+import pandas
+
+from ..components import Configuration, Interval, TradeDirection
 from ..components.broker import Broker
-from ..interfaces import Market, Position
+from ..interfaces import Market, MarketHistory, Position
 
 DataPoints = Any
 BacktestResult = Dict[str, Union[float, List[Tuple[str, TradeDirection, float]]]]
 TradeSignal = Tuple[TradeDirection, Optional[float], Optional[float]]
+TradeSignals = Tuple[np.ndarray, np.ndarray, np.ndarray]
 
 
 class Strategy(ABC):
@@ -18,10 +23,12 @@ class Strategy(ABC):
     """
 
     positions: Optional[List[Position]] = None
+    config: Configuration
     broker: Broker
 
     def __init__(self, config: Configuration, broker: Broker) -> None:
         self.positions = None
+        self.config = config
         self.broker = broker
         # Read configuration of derived Strategy
         self.read_configuration(config)
@@ -34,11 +41,52 @@ class Strategy(ABC):
         """
         self.positions = positions
 
+    @property
+    def required_lookback(self) -> Optional[int]:
+        """
+        Number of most recent bars required by find_trade_signal(), or None if
+        the strategy needs the whole available history. Only this number of
+        bars is fetched and, when backtesting, passed to the strategy
+        """
+        return None
+
+    @property
+    def interval(self) -> Interval:
+        """
+        Interval of the bars fetched by the strategy. When the markets are
+        streamed the strategy runs on a market when one of its bars closes
+        """
+        return Interval.DAY
+
     def run(self, market: Market) -> TradeSignal:
         """
         Run the strategy against the specified market
         """
-        datapoints = self.fetch_datapoints(market)
+        return self._run_on_datapoints(market, self.fetch_datapoints(market))
+
+    def run_on_history(self, market: Market, history: MarketHistory) -> TradeSignal:
+        """
+        Run the strategy on the given bars instead of fetching them, e.g. the
+        bars built from the streamed prices. Override it if the datapoints are
+        not the MarketHistory of the last required_lookback bars
+        """
+        return self._run_on_datapoints(market, history)
+
+    async def run_async(self, market: Market) -> TradeSignal:
+        """
+        Asynchronous run(), fetching the datapoints with fetch_datapoints_async()
+        """
+        datapoints = await self.fetch_datapoints_async(market)
+        return self._run_on_datapoints(market, datapoints)
+
+    async def fetch_datapoints_async(self, market: Market) -> DataPoints:
+        """
+        Asynchronous fetch_datapoints(). By default it runs fetch_datapoints()
+        in a worker thread, override it to use the asynchronous broker calls
+        """
+        return await asyncio.to_thread(self.fetch_datapoints, market)
+
+    def _run_on_datapoints(self, market: Market, datapoints: DataPoints) -> TradeSignal:
         logging.debug(f"Strategy datapoints: {datapoints}")
         if datapoints is None:
             logging.debug("Unable to fetch market datapoints")
@@ -65,6 +113,18 @@ class Strategy(ABC):
     def find_trade_signal(self, market: Market, datapoints: DataPoints) -> TradeSignal:
         pass
 
+    def find_trade_signals(self, history: pandas.DataFrame) -> Optional[TradeSignals]:
+        """
+        Optionally compute the trade signal of every bar of the history at once.
+
+            - **history**: dataframe with the MarketHistory columns, ordered from
+              the oldest to the most recent bar
+            - Returns a tuple of arrays (direction, limit, stop) with one item per
+              bar, where limit and stop are NaN when there is no signal, or None
+              if the strategy only supports find_trade_signal()
+        """
+        return None
+
     @abstractmethod
     def backtest(
         self, market: Market, start_date: datetime, end_date: datetime
@@ -1,5 +1,6 @@
+import copy
 from enum import Enum
-from typing import Union
+from typing import Any, Dict, Union
 
 from ..components import Configuration
 from ..components.broker import Broker
@@ -54,6 +55,43 @@ class StrategyFactory:
         else:
             raise ValueError(f"Strategy {strategy_name} does not exist")
 
+    def make_strategy_with_params(
+        self, strategy_name: str, params: Dict[str, Any]
+    ) -> StrategyImpl:
+        """
+        Create and return an instance of the Strategy class specified by
+        the strategy_name, overriding some of its configuration parameters
+
+            - **strategy_name**: name of the strategy as defined in the json
+              config file
+            - **params**: values of the parameters of the strategy section of the
+              configuration to override, e.g. {"price_bins": 20}
+            - Raise ValueError if a parameter is not part of the strategy section
+        """
+        raw = copy.deepcopy(dict(self.config.get_raw_config()))
+        raw.setdefault("strategies", {}).setdefault(strategy_name, {}).update(params)
+        config = Configuration(raw)
+        section = getattr(config.config.strategies, strategy_name, None)
+        for name in params:
+            if section is None or name not in type(section).model_fields:
+                raise ValueError(f"Strategy {strategy_name} has no parameter {name}")
+        return StrategyFactory(config, self.broker).make_strategy(strategy_name)
+
+    @staticmethod
+    def get_strategy_name(strategy: StrategyImpl) -> str:
+        """
+        Return the name of the given Strategy instance as defined in the config
+        file
+        """
+        if isinstance(strategy, SimpleMACD):
+            return StrategyNames.SIMPLE_MACD.value
+        elif isinstance(strategy, SimpleBollingerBands):
+            return StrategyNames.SIMPLE_BOLL_BANDS.value
+        elif isinstance(strategy, VolumeProfile):
+            return StrategyNames.VOLUME_PROFILE.value
+        else:
+            raise ValueError(f"Strategy {type(strategy).__name__} does not exist")
+
     def make_from_configuration(self) -> StrategyImpl:
         """
         Create and return an instance of the Strategy class as configured in the
@@ -2,12 +2,13 @@ import logging
 from datetime import datetime
 
 # import matplotlib.pyplot as plt
+import numpy as np
 import pandas
 
-from ..components import Configuration, Interval, TradeDirection, Utils
+from ..components import Configuration, TradeDirection, Utils
 from ..components.broker import Broker
 from ..interfaces import Market, MarketHistory
-from . import BacktestResult, Strategy, TradeSignal
+from . import BacktestResult, Strategy, TradeSignal, TradeSignals
 
 
 class SimpleBollingerBands(Strategy):
@@ -35,17 +36,26 @@ class SimpleBollingerBands(Strategy):
         """
         logging.info("Simple Bollinger Bands strategy initialised")
 
+    @property
+    def required_lookback(self) -> int:
+        return self.window * 2
+
     def fetch_datapoints(self, market: Market) -> MarketHistory:
         """
         Fetch historic prices
         """
-        return self.broker.get_prices(market, Interval.DAY, self.window * 2)
+        return self.broker.get_prices(market, self.interval, self.required_lookback)
+
+    async def fetch_datapoints_async(self, market: Market) -> MarketHistory:
+        return await self.broker.get_prices_async(
+            market, self.interval, self.required_lookback
+        )
 
     def find_trade_signal(
         self, market: Market, datapoints: MarketHistory
     ) -> TradeSignal:
         # Copy only the required amount of data
-        df = datapoints.dataframe[: self.window * 2].copy()
+        df = datapoints.dataframe[: self.required_lookback].copy()
         indexer = pandas.api.indexers.FixedForwardWindowIndexer(window_size=self.window)
         # Compute the price moving averate
         df["MA"] = df[MarketHistory.CLOSE_COLUMN].rolling(window=indexer).mean()
@@ -71,6 +81,34 @@ class SimpleBollingerBands(Strategy):
             return self._buy_signal(market)
         return TradeDirection.NONE, None, None
 
+    def find_trade_signals(self, history: pandas.DataFrame) -> TradeSignals:
+        """
+        Find the trade signal of every bar of the history at once. Each bar is
+        evaluated as find_trade_signal() evaluates the most recent prices, using
+        trailing rolling windows since the history starts from the oldest bar
+        """
+        close = history[MarketHistory.CLOSE_COLUMN]
+        ma = close.rolling(window=self.window).mean()
+        std = close.rolling(window=self.window).std()
+        lower_band = ma - (std * 2)
+
+        cross_lower_band_and_back = (close > lower_band) & (
+            close.shift() <= lower_band.shift()
+        )
+        # The last 5 closes, or as many as available, below their moving average
+        stable_below_ma = (close < ma).astype(float).rolling(
+            window=5, min_periods=1
+        ).min() == 1
+        buy = (cross_lower_band_and_back | stable_below_ma).to_numpy(copy=True)
+        buy[:1] = False
+
+        price = close.to_numpy()
+        direction = np.full(len(history), TradeDirection.NONE, dtype=object)
+        direction[buy] = TradeDirection.BUY
+        limit = np.where(buy, price + Utils.percentage_of(self.limit_p, price), np.nan)
+        stop = np.where(buy, price - Utils.percentage_of(self.stop_p, price), np.nan)
+        return direction, limit, stop
+
     def _buy_signal(self, market: Market) -> TradeSignal:
         direction = TradeDirection.BUY
         limit = market.offer + Utils.percentage_of(self.limit_p, market.offer)
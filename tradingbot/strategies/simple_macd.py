@@ -5,10 +5,10 @@ from typing import Tuple
 import numpy as np
 import pandas
 
-from ..components import Configuration, Interval, TradeDirection
+from ..components import Configuration, TradeDirection
 from ..components.broker import Broker
 from ..interfaces import Market, MarketHistory
-from . import BacktestResult, Strategy, TradeSignal
+from . import BacktestResult, Strategy, TradeSignal, TradeSignals
 
 
 class SimpleMACD(Strategy):
@@ -43,12 +43,21 @@ class SimpleMACD(Strategy):
         """
         pass
 
+    @property
+    def required_lookback(self) -> int:
+        """Enough data for EMA 200"""
+        return 300
+
     def fetch_datapoints(self, market: Market) -> MarketHistory:
         """
         Fetch historic data (prices) to calculate indicators.
-        We need enough data for EMA 200.
         """
-        return self.broker.get_prices(market, Interval.DAY, 300)
+        return self.broker.get_prices(market, self.interval, self.required_lookback)
+
+    async def fetch_datapoints_async(self, market: Market) -> MarketHistory:
+        return await self.broker.get_prices_async(
+            market, self.interval, self.required_lookback
+        )
 
     def find_trade_signal(
         self, market: Market, datapoints: MarketHistory
@@ -95,6 +104,86 @@ class SimpleMACD(Strategy):
 
         return TradeDirection.NONE, None, None
 
+    def find_trade_signals(self, history: pandas.DataFrame) -> TradeSignals:
+        """
+        Find the trade signal of every bar with the indicators computed over
+        its trailing required_lookback bars only, as find_trade_signal() does
+        on the fetched prices, using the close price as bid and offer.
+        """
+        df = self._calculate_indicators(history.copy())
+        close = df["close"].to_numpy()
+        atr = df["ATR"].to_numpy()
+        ema, hist, prev_hist = self._calculate_window_indicators(df)
+
+        # Same conditions as find_trade_signal() evaluated at every bar
+        enough_data = np.arange(len(df)) + 1 >= self.ema_period
+        buy = enough_data & (close > ema) & (prev_hist < 0) & (hist > 0)
+        sell = enough_data & (close < ema) & (prev_hist > 0) & (hist < 0)
+
+        direction = np.full(len(df), TradeDirection.NONE, dtype=object)
+        direction[buy] = TradeDirection.BUY
+        direction[sell] = TradeDirection.SELL
+
+        stop_loss_pips = atr * self.atr_multiplier
+        take_profit_pips = stop_loss_pips * self.risk_reward_ratio
+        limit = np.where(buy, close + take_profit_pips, np.nan)
+        limit = np.where(sell, close - take_profit_pips, limit)
+        stop = np.where(buy, close - stop_loss_pips, np.nan)
+        stop = np.where(sell, close + stop_loss_pips, stop)
+        return direction, limit, stop
+
+    def _calculate_window_indicators(
+        self, df: pandas.DataFrame
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Return the EMA 200, the MACD histogram and the previous histogram of
+        every bar, computed over the window of its last required_lookback bars.
+        The EMAs seeded at the start s of a window are derived from the EMAs of
+        the whole history: EMA_s(t) = EMA(t) - b^(t - s) * (EMA(s) - close(s)),
+        with b = 1 - alpha. The ATR doesn't depend on the window start
+        """
+        close = df["close"].to_numpy()
+        t = np.arange(len(df))
+        s = np.maximum(t - self.required_lookback + 1, 0)
+
+        def decay(span: int) -> float:
+            return 1 - 2 / (span + 1)
+
+        def seed_error(span: int) -> np.ndarray:
+            ema = df["close"].ewm(span=span, adjust=False).mean().to_numpy()
+            return (ema - close)[s]
+
+        ema = df["EMA200"].to_numpy() - decay(self.ema_period) ** (t - s) * seed_error(
+            self.ema_period
+        )
+        macd = df["MACD"].to_numpy()
+        signal = df["Signal"].to_numpy()
+        b9, b12, b26 = decay(9), decay(12), decay(26)
+        e12, e26 = seed_error(12), seed_error(26)
+        signal_error = (signal - macd)[s]
+
+        def window_hist(j: np.ndarray) -> np.ndarray:
+            m = j - s
+
+            # EMA 9 of the sequence r^m seeded at 1
+            def ema9_of_powers(r: float) -> np.ndarray:
+                return b9**m + (1 - b9) * r * (r**m - b9**m) / (r - b9)
+
+            window_macd = macd[j] - b12**m * e12 + b26**m * e26
+            window_signal = (
+                signal[j]
+                - b9**m * signal_error
+                - e12 * ema9_of_powers(b12)
+                + e26 * ema9_of_powers(b26)
+            )
+            return window_macd - window_signal
+
+        hist = window_hist(t)
+        prev_hist = np.full(len(df), np.nan)
+        has_prev = t > s
+        prev_hist[has_prev] = window_hist(np.maximum(t - 1, s))[has_prev]
+        return ema, hist, prev_hist
+
     def _calculate_indicators(self, df: pandas.DataFrame) -> pandas.DataFrame:
         # EMA 200
         df["EMA200"] = df["close"].ewm(span=self.ema_period, adjust=False).mean()
@@ -1,14 +1,14 @@
 import datetime
 import logging
-from typing import Dict, Tuple
+from typing import Any, Dict, Tuple
 
 import numpy as np
 import pandas
 
-from ..components import Configuration, Interval, TradeDirection
+from ..components import Configuration, TradeDirection
 from ..components.broker import Broker
 from ..interfaces import Market, MarketHistory
-from . import BacktestResult, Strategy, TradeSignal
+from . import BacktestResult, Strategy, TradeSignal, TradeSignals
 
 
 class VolumeProfile(Strategy):
@@ -60,12 +60,21 @@ class VolumeProfile(Strategy):
         """
         pass
 
+    @property
+    def required_lookback(self) -> int:
+        """Enough data for the volume profile and the ATR"""
+        return self.lookback_periods + 20
+
     def fetch_datapoints(self, market: Market) -> MarketHistory:
         """
         Fetch historic price and volume data
         """
-        # Fetch enough data for volume profile analysis
-        return self.broker.get_prices(market, Interval.DAY, self.lookback_periods + 20)
+        return self.broker.get_prices(market, self.interval, self.required_lookback)
+
+    async def fetch_datapoints_async(self, market: Market) -> MarketHistory:
+        return await self.broker.get_prices_async(
+            market, self.interval, self.required_lookback
+        )
 
     def find_trade_signal(
         self, market: Market, datapoints: MarketHistory
@@ -81,7 +90,8 @@ class VolumeProfile(Strategy):
         if market.bid - market.offer > self.max_spread_perc:
             return TradeDirection.NONE, None, None
 
-        df = datapoints.dataframe.copy()
+        # The analysis does not modify the data, so there is no need to copy it
+        df = datapoints.dataframe
 
         # Calculate ATR for risk management
         atr = self._calculate_atr(df)
@@ -141,6 +151,69 @@ class VolumeProfile(Strategy):
 
         return TradeDirection.NONE, None, None
 
+    def find_trade_signals(self, history: pandas.DataFrame) -> TradeSignals:
+        """
+        Find the trade signal of every bar of the history at once, using the
+        close price as bid and offer
+        """
+        close = history["close"].to_numpy(dtype=float)
+        high = history["high"].to_numpy(dtype=float)
+        low = history["low"].to_numpy(dtype=float)
+        volume = history["volume"].to_numpy(dtype=float)
+        bars = len(history)
+
+        direction = np.full(bars, TradeDirection.NONE, dtype=object)
+        limit = np.full(bars, np.nan)
+        stop = np.full(bars, np.nan)
+        if bars < self.lookback_periods:
+            return direction, limit, stop
+
+        # Only the bars with a full lookback window can produce a signal
+        ends = np.arange(self.lookback_periods - 1, bars)
+        profiles = self._build_volume_profiles(low, high, volume)
+        poc, vah, val = profiles["poc"], profiles["vah"], profiles["val"]
+        atr = self._calculate_atr(history, last_only=False)[ends]
+        imbalance = self._analyze_order_flows(close, high, low, volume)[ends]
+        price = close[ends]
+
+        near_support = self._is_near_level(price, val, atr) | self._is_near_level(
+            price, poc, atr
+        )
+        near_resistance = self._is_near_level(price, vah, atr)
+        buy = near_support & (imbalance > self.imbalance_threshold)
+        sell = ~near_support & near_resistance & (imbalance < -self.imbalance_threshold)
+
+        # Dynamic risk/reward based on distance to key levels
+        target_distance = np.where(buy, np.abs(vah - price), np.abs(price - val))
+        stop_distance = np.where(
+            buy, np.abs(price - val) + atr, np.abs(vah - price) + atr
+        )
+        with np.errstate(divide="ignore", invalid="ignore"):
+            risk_reward = np.where(
+                stop_distance > 0,
+                target_distance / stop_distance,
+                self.min_risk_reward,
+            )
+        risk_reward = np.maximum(
+            self.min_risk_reward, np.minimum(self.max_risk_reward, risk_reward)
+        )
+        stop_loss_distance = atr * self.base_atr_multiplier
+        take_profit_distance = stop_loss_distance * risk_reward
+
+        direction[ends[buy]] = TradeDirection.BUY
+        direction[ends[sell]] = TradeDirection.SELL
+        limit[ends] = np.where(
+            buy,
+            price + take_profit_distance,
+            np.where(sell, price - take_profit_distance, np.nan),
+        )
+        stop[ends] = np.where(
+            buy,
+            price - stop_loss_distance,
+            np.where(sell, price + stop_loss_distance, np.nan),
+        )
+        return direction, limit, stop
+
     def _build_volume_profile(self, df: pandas.DataFrame) -> Dict[str, float]:
         """
         Build volume profile and identify key levels
@@ -208,6 +281,121 @@ class VolumeProfile(Strategy):
             "price_levels": price_range,
         }
 
+    def _build_volume_profiles(
+        self, low: np.ndarray, high: np.ndarray, volume: np.ndarray
+    ) -> Dict[str, np.ndarray]:
+        """
+        Build the volume profile of every rolling window of lookback_periods bars
+        and return the key levels of each window, as _build_volume_profile()
+        """
+        windows = self.lookback_periods
+        bins = self.price_bins - 1
+        lows = np.lib.stride_tricks.sliding_window_view(low, windows)
+        highs = np.lib.stride_tricks.sliding_window_view(high, windows)
+        volumes = np.lib.stride_tricks.sliding_window_view(volume, windows)
+        count = len(lows)
+
+        poc = np.empty(count)
+        vah = np.empty(count)
+        val = np.empty(count)
+        # Process the windows in chunks to bound the memory used by the
+        # (windows x bars x bins) intermediate arrays
+        chunk_size = max(1, 2_000_000 // (windows * self.price_bins))
+        for start in range(0, count, chunk_size):
+            chunk = slice(start, min(start + chunk_size, count))
+            w_low, w_high, w_volume = lows[chunk], highs[chunk], volumes[chunk]
+            rows = np.arange(len(w_low))
+
+            price_range = np.linspace(
+                w_low.min(axis=1), w_high.max(axis=1), self.price_bins, axis=1
+            )
+            # Same as np.searchsorted() with side "right" and "left" respectively
+            low_idx = (price_range[:, None, :] <= w_low[:, :, None]).sum(axis=2) - 1
+            high_idx = (price_range[:, None, :] < w_high[:, :, None]).sum(axis=2)
+            volume_per_bin = w_volume / np.maximum(1, high_idx - low_idx)
+            bin_ids = np.arange(bins)
+            covered = (bin_ids >= low_idx[:, :, None]) & (
+                bin_ids < high_idx[:, :, None]
+            )
+            # Summing along the bars axis adds the candles in order
+            volume_at_price = np.where(covered, volume_per_bin[:, :, None], 0.0).sum(
+                axis=1
+            )
+
+            poc_idx = np.argmax(volume_at_price, axis=1)
+            target_volume = volume_at_price.sum(axis=1) * (
+                self.value_area_percentage / 100
+            )
+            val_idx = poc_idx.copy()
+            vah_idx = poc_idx.copy()
+            accumulated_volume = volume_at_price[rows, poc_idx]
+
+            # Expand all the value areas at once, one bin per iteration
+            expanding = accumulated_volume < target_volume
+            while expanding.any():
+                vol_below = np.where(
+                    val_idx > 0, volume_at_price[rows, np.maximum(val_idx - 1, 0)], 0
+                )
+                vol_above = np.where(
+                    vah_idx < bins - 1,
+                    volume_at_price[rows, np.minimum(vah_idx + 1, bins - 1)],
+                    0,
+                )
+                go_up = expanding & (vol_above > vol_below) & (vah_idx < bins - 1)
+                go_down = expanding & ~go_up & (val_idx > 0)
+                vah_idx = np.where(go_up, vah_idx + 1, vah_idx)
+                val_idx = np.where(go_down, val_idx - 1, val_idx)
+                accumulated_volume = np.where(
+                    go_up,
+                    accumulated_volume + volume_at_price[rows, vah_idx],
+                    np.where(
+                        go_down,
+                        accumulated_volume + volume_at_price[rows, val_idx],
+                        accumulated_volume,
+                    ),
+                )
+                expanding = (go_up | go_down) & (accumulated_volume < target_volume)
+
+            poc[chunk] = (
+                price_range[rows, poc_idx] + price_range[rows, poc_idx + 1]
+            ) / 2
+            val[chunk] = (
+                price_range[rows, val_idx] + price_range[rows, val_idx + 1]
+            ) / 2
+            vah[chunk] = (
+                price_range[rows, vah_idx] + price_range[rows, vah_idx + 1]
+            ) / 2
+
+        return {"poc": poc, "vah": vah, "val": val}
+
+    def _analyze_order_flows(
+        self, close: np.ndarray, high: np.ndarray, low: np.ndarray, volume: np.ndarray
+    ) -> np.ndarray:
+        """
+        Return the order flow imbalance of every bar, computed over the last 10
+        bars as _analyze_order_flow()
+        """
+        range_size = high - low
+        with np.errstate(divide="ignore", invalid="ignore"):
+            close_position = np.where(range_size > 0, (close - low) / range_size, 0.5)
+
+        buying_pressure = np.zeros(len(close))
+        selling_pressure = np.zeros(len(close))
+        # Accumulate from the oldest to the most recent bar of each window
+        for offset in range(9, -1, -1):
+            shifted = slice(0, len(close) - offset)
+            target = slice(offset, len(close))
+            buying_pressure[target] += close_position[shifted] * volume[shifted]
+            selling_pressure[target] += (1 - close_position[shifted]) * volume[shifted]
+
+        total_pressure = buying_pressure + selling_pressure
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(
+                total_pressure > 0,
+                (buying_pressure - selling_pressure) / total_pressure * 10,
+                0,
+            )
+
     def _analyze_order_flow(self, df: pandas.DataFrame) -> Dict[str, float]:
         """
         Analyze order flow to detect buying/selling pressure imbalance
@@ -246,9 +434,10 @@ class VolumeProfile(Strategy):
             "selling_pressure": selling_pressure,
         }
 
-    def _calculate_atr(self, df: pandas.DataFrame) -> float:
+    def _calculate_atr(self, df: pandas.DataFrame, last_only: bool = True) -> Any:
         """
-        Calculate Average True Range
+        Calculate Average True Range of the last bar, or of every bar if
+        last_only is False
         """
         high_low = df["high"] - df["low"]
         high_close = np.abs(df["high"] - df["close"].shift())
@@ -256,13 +445,13 @@ class VolumeProfile(Strategy):
 
         ranges = pandas.concat([high_low, high_close, low_close], axis=1)
         true_range = np.max(ranges, axis=1)
-        atr = true_range.rolling(self.atr_period).mean().iloc[-1]
+        atr = true_range.rolling(self.atr_period).mean()
 
-        return atr
+        return atr.iloc[-1] if last_only else atr.to_numpy()
 
     def _is_near_level(
-        self, price: float, level: float, atr: float, tolerance: float = 0.5
-    ) -> bool:
+        self, price: Any, level: Any, atr: Any, tolerance: float = 0.5
+    ) -> Any:
         """
         Check if price is near a key level (within tolerance * ATR)
         """
@@ -1,23 +1,34 @@
+import asyncio
 import logging
 import traceback
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Optional
+from typing import AsyncIterator, Iterable, List, Optional, Set, Tuple
 
 import pytz
 
 from .components import (
     Backtester,
+    BarScheduler,
     Configuration,
     MarketClosedException,
     MarketProvider,
+    MarketStream,
     NotSafeToTradeException,
+    PositionBook,
+    SafetyChecker,
     TimeAmount,
     TimeProvider,
     TradeDirection,
 )
-from .components.broker import Broker, BrokerFactory
-from .interfaces import Market, Position
-from .strategies import StrategyFactory, StrategyImpl
+from .components.broker import Broker, BrokerFactory, StreamingInterface
+from .interfaces import Market, MarketHistory
+from .strategies import StrategyFactory, StrategyImpl, TradeSignal
+
+# Market evaluated by a worker thread with the strategy signal, None if the
+# strategy failed
+MarketEvaluation = Tuple[Market, Optional[TradeSignal]]
 
 
 class TradingBot:
@@ -31,11 +42,15 @@ class TradingBot:
     broker: Broker
     strategy: StrategyImpl
     market_provider: MarketProvider
+    position_book: PositionBook
+    safety_checker: SafetyChecker
+    stream: Optional[StreamingInterface]
 
     def __init__(
         self,
         time_provider: Optional[TimeProvider] = None,
         config_filepath: Optional[Path] = None,
+        stream: Optional[StreamingInterface] = None,
     ) -> None:
         # Time manager
         self.time_provider = time_provider if time_provider else TimeProvider()
@@ -60,6 +75,17 @@ class TradingBot:
         # Create the market provider
         self.market_provider = MarketProvider(self.config, self.broker)
 
+        # Open positions of the account, fetched once per spin
+        self.position_book = PositionBook(self.broker)
+
+        # Safety checks performed before processing each market
+        self.safety_checker = SafetyChecker(
+            self.config, self.broker, self.time_provider
+        )
+
+        # Streaming feed of the prices, used if stream_on_bar_close is enabled
+        self.stream = stream
+
     def setup_logging(self) -> None:
         """
         Setup the global logging settings
@@ -92,7 +118,19 @@ class TradingBot:
         - process markets from market source
         - wait for configured wait time
         - start over
+
+        The markets are processed at the close of their bars instead if
+        stream_on_bar_close or schedule_on_bar_close are enabled, see
+        start_streaming() and start_scheduled()
         """
+        if self.config.is_stream_on_bar_close_enabled():
+            if self.stream is None:
+                raise RuntimeError("stream_on_bar_close needs a streaming interface")
+            self.start_streaming(self.stream, single_pass)
+            return
+        if self.config.is_schedule_on_bar_close_enabled():
+            self.start_scheduled(single_pass)
+            return
         if single_pass:
             logging.info("Performing a single iteration of the market source")
         while True:
@@ -130,41 +168,433 @@ class TradingBot:
                 if single_pass:
                     break
 
+    def start_scheduled(self, single_pass=False) -> None:
+        """
+        Main loop aligned to the bars of the strategy interval: the markets of
+        the open positions and of the market source are queued by the close
+        time of their next bar and the strategy runs on each market just after
+        its bar closes, instead of on all the markets every spin_interval. The
+        queue is filled at the start and synchronised with the market source
+        every spin_interval
+        """
+        if single_pass:
+            logging.info("Processing the first bar closes of the market source")
+        scheduler = self._create_scheduler()
+        sync_time = self.time_provider.now()
+        while True:
+            try:
+                if self.time_provider.now() >= sync_time:
+                    # Not retried before the next spin_interval on failure
+                    sync_time = self._get_spin_time()
+                    self.sync_markets(scheduler)
+                if single_pass:
+                    self.process_due_markets(scheduler)
+                    break
+                self.process_due_markets(scheduler, sync_time)
+            except MarketClosedException:
+                # The remaining markets are processed at the market opening
+                logging.warning("Market is closed: stop processing")
+                if single_pass:
+                    break
+            except NotSafeToTradeException:
+                # The remaining markets are processed after spin_interval
+                if single_pass:
+                    break
+            except Exception as e:
+                logging.error(f"Generic exception caught: {e}")
+                logging.error(traceback.format_exc())
+                if single_pass:
+                    break
+
+    def schedule_markets(self) -> BarScheduler:
+        """
+        Schedule the markets of the open positions and of the whole market
+        source at the close of their bars of the strategy interval
+        """
+        scheduler = self._create_scheduler()
+        epics = [market.epic for market in self.get_all_markets()]
+        scheduler.add_all(epics, self.strategy.interval)
+        logging.info(f"Scheduled {len(epics)} markets")
+        return scheduler
+
+    def sync_markets(self, scheduler: BarScheduler) -> None:
+        """
+        Reload the market source and schedule its new markets and those of the
+        new open positions, removing the markets no longer in either
+        """
+        self.market_provider.reset()
+        epics = [market.epic for market in self.get_all_markets()]
+        scheduler.add_all(epics, self.strategy.interval)
+        current = set(epics)
+        removed = [epic for epic in scheduler.get_epics() if epic not in current]
+        scheduler.remove_all(removed)
+        logging.info(f"Scheduled {len(epics)} markets, removed {len(removed)}")
+
+    def process_due_markets(
+        self, scheduler: BarScheduler, until: Optional[datetime] = None
+    ) -> int:
+        """
+        Wait for the next markets to be due, up to the until time if given, and
+        run the strategy on them. The markets of new open positions are
+        scheduled too. Return the number of markets processed
+        """
+        epics = scheduler.wait_for_due(until)
+        if not epics:
+            return 0
+        self.position_book.refresh()
+        scheduler.add_all(self.position_book.get_epics(), self.strategy.interval)
+        markets = self.market_provider.get_markets_from_epics(epics)
+        for i, market in enumerate(markets):
+            try:
+                self.process_market(market)
+            except MarketClosedException:
+                # Instead of waiting for the close of their next bar
+                scheduler.postpone(
+                    [m.epic for m in markets[i:]],
+                    self.time_provider.get_next_market_opening(),
+                )
+                raise
+            except NotSafeToTradeException:
+                # Retried after spin_interval, like the whole market source
+                scheduler.postpone([m.epic for m in markets[i:]], self._get_spin_time())
+                raise
+        return len(markets)
+
+    def _create_scheduler(self) -> BarScheduler:
+        return BarScheduler(
+            self.time_provider,
+            self.config.get_bar_close_delay(),
+            self.config.get_bar_close_spread(),
+        )
+
+    def _get_spin_time(self) -> datetime:
+        """Return the time spin_interval seconds from now"""
+        return self.time_provider.now() + timedelta(
+            seconds=self.config.get_spin_interval()
+        )
+
+    async def start_async(self, single_pass=False) -> None:
+        """
+        Asynchronous start(): the market snapshots and prices of up to
+        market_workers markets are fetched at once with the asynchronous broker
+        calls, sharing the rate limits of the broker interfaces
+        """
+        if single_pass:
+            logging.info("Performing a single iteration of the market source")
+        try:
+            while True:
+                try:
+                    await self.process_open_positions_async()
+                    await self.process_market_source_async()
+                    await self._wait_for_async(
+                        TimeAmount.SECONDS, self.config.get_spin_interval()
+                    )
+                    if single_pass:
+                        break
+                except MarketClosedException:
+                    logging.warning("Market is closed: stop processing")
+                    if single_pass:
+                        break
+                    await self._wait_for_async(TimeAmount.NEXT_MARKET_OPENING)
+                except NotSafeToTradeException:
+                    if single_pass:
+                        break
+                    await self._wait_for_async(
+                        TimeAmount.SECONDS, self.config.get_spin_interval()
+                    )
+                except Exception as e:
+                    logging.error(f"Generic exception caught: {e}")
+                    logging.error(traceback.format_exc())
+                    if single_pass:
+                        break
+        finally:
+            await self.broker.close_async()
+
+    def start_streaming(self, stream: StreamingInterface, single_pass=False) -> None:
+        """
+        Event driven main loop: the markets of the open positions and of the
+        market source are subscribed to the streaming feed and the strategy
+        runs on a market only when one of its bars closes, with the streamed
+        bars, instead of on all the markets every spin_interval
+        """
+        if single_pass:
+            logging.info("Processing the first bar closes of the market source")
+        stream.connect()
+        market_stream = self.subscribe_markets(stream)
+        try:
+            while True:
+                try:
+                    self.process_bar_closes(market_stream)
+                    if single_pass:
+                        break
+                except MarketClosedException:
+                    # The bars keep closing as long as the markets trade
+                    logging.warning("Market is closed: stop processing")
+                    if single_pass:
+                        break
+                except NotSafeToTradeException:
+                    if single_pass:
+                        break
+                except Exception as e:
+                    logging.error(f"Generic exception caught: {e}")
+                    logging.error(traceback.format_exc())
+                    if single_pass:
+                        break
+        finally:
+            market_stream.close()
+            stream.disconnect()
+
+    def subscribe_markets(self, stream: StreamingInterface) -> MarketStream:
+        """
+        Subscribe the markets of the open positions and of the whole market
+        source to the streaming feed, building bars of the strategy interval
+        and keeping the last required_lookback of them
+        """
+        market_stream = MarketStream(
+            stream, self.strategy.interval, self.strategy.required_lookback or 0
+        )
+        market_stream.subscribe(self.get_all_markets())
+        return market_stream
+
+    def get_all_markets(self) -> List[Market]:
+        """
+        Return the markets of the open positions and of the whole market source
+        """
+        self.position_book.refresh()
+        markets = self.market_provider.get_markets_from_epics(
+            self.position_book.get_epics()
+        )
+        try:
+            while True:
+                markets.append(self.market_provider.next())
+        except StopIteration:
+            pass
+        return markets
+
+    def process_bar_closes(
+        self, market_stream: MarketStream, timeout: Optional[float] = None
+    ) -> int:
+        """
+        Wait up to timeout seconds, forever if None, for bars to close and run
+        the strategy on their markets, with the streamed prices and bars.
+        Return the number of markets processed
+        """
+        epics = market_stream.wait_for_bar_closes(timeout)
+        if not epics:
+            return 0
+        self.position_book.refresh()
+        for epic in epics:
+            market = market_stream.get_market(epic)
+            try:
+                history = self._get_streamed_history(market_stream, market)
+            except Exception as e:
+                logging.error(f"Unable to fetch the prices of {epic}: {e}")
+                continue
+            self.process_market(market, history)
+        return len(epics)
+
+    def _get_streamed_history(
+        self, market_stream: MarketStream, market: Market
+    ) -> Optional[MarketHistory]:
+        """
+        Return the streamed bars of the market, seeded once with the prices
+        fetched from the broker, or None if the strategy needs the whole history
+        """
+        lookback = self.strategy.required_lookback
+        if lookback is None:
+            return None
+        if not market_stream.is_seeded(market.epic):
+            history = self.broker.get_prices(market, self.strategy.interval, lookback)
+            market_stream.seed(market.epic, history)
+        return market_stream.get_history(market.epic)
+
+    async def _wait_for_async(self, time_amount_type: TimeAmount, amount=-1) -> None:
+        await asyncio.to_thread(self.time_provider.wait_for, time_amount_type, amount)
+
     def process_open_positions(self) -> None:
         """
         Fetch open positions markets and run the strategy against them closing the
         trades if required
         """
-        positions = self.broker.get_open_positions()
         # Do not run until we know the current open positions
-        if positions is None:
-            logging.warning("Unable to fetch open positions! Will try again...")
-            raise RuntimeError("Unable to fetch open positions")
-        for epic in [item.epic for item in positions]:
-            market = self.market_provider.get_market_from_epic(epic)
-            self.process_market(market, positions)
+        self.position_book.refresh()
+        epics = self.position_book.get_epics()
+        for market in self.market_provider.get_markets_from_epics(epics):
+            self.process_market(market)
 
     def process_market_source(self) -> None:
         """
-        Process markets from the configured market source
+        Process markets from the configured market source with the open positions
+        fetched by process_open_positions(), then reconcile them with the broker
+        """
+        try:
+            workers = self.config.get_market_workers()
+            if workers > 1:
+                self._process_market_source_concurrently(workers)
+            else:
+                while True:
+                    self.process_market(self.market_provider.next())
+        finally:
+            self.position_book.reconcile()
+
+    def _process_market_source_concurrently(self, workers: int) -> None:
+        """
+        Process markets from the configured market source, fetching the data and
+        running the strategy on up to workers markets at a time. Safety checks
+        and trades are performed by this thread only, one market at a time
+        """
+        pending: Set[Future] = set()
+        with ThreadPoolExecutor(workers, thread_name_prefix="market") as pool:
+            try:
+                while True:
+                    market = self.market_provider.next()
+                    if not self.config.is_paper_trading_enabled():
+                        self.safety_checks()
+                    pending.add(pool.submit(self._evaluate_market, market))
+                    if len(pending) >= workers:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        self._execute_trades(done)
+            except (NotSafeToTradeException, MarketClosedException):
+                # Markets evaluated but not traded yet are dropped when it's
+                # not safe to trade anymore
+                for future in pending:
+                    future.cancel()
+                pending = set()
+                raise
+            finally:
+                # Markets already evaluated are traded also when the market
+                # source is over or the processing stops
+                done, _ = wait(pending)
+                self._execute_trades(done)
+
+    async def process_open_positions_async(self) -> None:
+        """
+        Asynchronous process_open_positions(), processing the markets
+        concurrently
+        """
+        await self.position_book.refresh_async()
+        workers = self.config.get_market_workers()
+        markets = self.market_provider.get_markets_from_epics_async(
+            self.position_book.get_epics(), workers
+        )
+        await self._process_markets_async(markets, workers)
+
+    async def process_market_source_async(self) -> None:
+        """
+        Asynchronous process_market_source(), returning when the market source
+        is over
+        """
+        try:
+            workers = self.config.get_market_workers()
+            markets = self.market_provider.markets_async(workers)
+            await self._process_markets_async(markets, workers)
+        finally:
+            await self.position_book.reconcile_async()
+
+    async def _process_markets_async(
+        self, markets: AsyncIterator[Market], workers: int
+    ) -> None:
+        """
+        Run the strategy on up to workers markets at a time in concurrent tasks.
+        Safety checks and trades are performed one market at a time
+        """
+        pending: Set[asyncio.Task] = set()
+        try:
+            async for market in markets:
+                if not self.config.is_paper_trading_enabled():
+                    await asyncio.to_thread(self.safety_checks)
+                pending.add(asyncio.create_task(self._evaluate_market_async(market)))
+                if len(pending) >= workers:
+                    done, pending = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    await self._execute_trades_async(done)
+        except (NotSafeToTradeException, MarketClosedException):
+            # Markets evaluated but not traded yet are dropped
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            pending = set()
+            raise
+        finally:
+            # Markets already evaluated are traded also when the processing stops
+            if pending:
+                done, _ = await asyncio.wait(pending)
+                await self._execute_trades_async(done)
+
+    async def _evaluate_market_async(self, market: Market) -> MarketEvaluation:
+        """Run the strategy against the market"""
+        logging.info(f"Processing {market.id}")
+        try:
+            self.strategy.set_open_positions(self.position_book.get_positions())
+            return market, await self.strategy.run_async(market)
+        except Exception as e:
+            logging.error(f"Strategy exception caught: {e}")
+            logging.debug(traceback.format_exc())
+            return market, None
+
+    async def _execute_trades_async(
+        self, evaluations: Iterable["asyncio.Task[MarketEvaluation]"]
+    ) -> None:
+        """Process the trades of the evaluated markets, checking before each one"""
+        for task in evaluations:
+            market, signal = task.result()
+            if signal is None or signal[0] is TradeDirection.NONE:
+                continue
+            # Each trade is checked, as the account changes after a trade
+            if not self.config.is_paper_trading_enabled():
+                await asyncio.to_thread(self.safety_checks)
+            try:
+                await self.process_trade_async(market, *signal)
+            except Exception as e:
+                logging.error(f"Trade exception caught: {e}")
+                logging.debug(traceback.format_exc())
+
+    def _evaluate_market(self, market: Market) -> MarketEvaluation:
+        """Run the strategy against the market"""
+        logging.info(f"Processing {market.id}")
+        try:
+            self.strategy.set_open_positions(self.position_book.get_positions())
+            return market, self.strategy.run(market)
+        except Exception as e:
+            logging.error(f"Strategy exception caught: {e}")
+            logging.debug(traceback.format_exc())
+            return market, None
+
+    def _execute_trades(
+        self, evaluations: Iterable["Future[MarketEvaluation]"]
+    ) -> None:
+        """Process the trades of the evaluated markets, checking before each one"""
+        for future in evaluations:
+            market, signal = future.result()
+            if signal is None or signal[0] is TradeDirection.NONE:
+                continue
+            # Each trade is checked, as the account changes after a trade
+            if not self.config.is_paper_trading_enabled():
+                self.safety_checks()
+            try:
+                self.process_trade(market, *signal)
+            except Exception as e:
+                logging.error(f"Trade exception caught: {e}")
+                logging.debug(traceback.format_exc())
+
+    def process_market(
+        self, market: Market, history: Optional[MarketHistory] = None
+    ) -> None:
+        """
+        Spin the strategy on the market, on the given bars if any instead of
+        the ones fetched by the strategy
         """
-        while True:
-            market = self.market_provider.next()
-            positions = self.broker.get_open_positions()
-            if positions is None:
-                logging.warning("Unable to fetch open positions! Will try again...")
-                raise RuntimeError("Unable to fetch open positions")
-            self.process_market(market, positions)
-
-    def process_market(self, market: Market, open_positions: List[Position]) -> None:
-        """Spin the strategy on all the markets"""
         if not self.config.is_paper_trading_enabled():
             self.safety_checks()
         logging.info(f"Processing {market.id}")
         try:
-            self.strategy.set_open_positions(open_positions)
-            trade, limit, stop = self.strategy.run(market)
-            self.process_trade(market, trade, limit, stop, open_positions)
+            self.strategy.set_open_positions(self.position_book.get_positions())
+            if history is None:
+                trade, limit, stop = self.strategy.run(market)
+            else:
+                trade, limit, stop = self.strategy.run_on_history(market, history)
+            self.process_trade(market, trade, limit, stop)
         except Exception as e:
             logging.error(f"Strategy exception caught: {e}")
             logging.debug(traceback.format_exc())
@@ -186,19 +616,7 @@ class TradingBot:
 
         Raise exceptions if not safe to trade
         """
-        percent_used = self.broker.get_account_used_perc()
-        if percent_used is None:
-            logging.warning(
-                "Stop trading because can't fetch percentage of account used"
-            )
-            raise NotSafeToTradeException()
-        if percent_used >= self.config.get_max_account_usable():
-            logging.warning(
-                f"Stop trading because {str(percent_used)}% of account is used"
-            )
-            raise NotSafeToTradeException()
-        if not self.time_provider.is_market_open(self.config.get_time_zone()):
-            raise MarketClosedException()
+        self.safety_checker.check()
 
     def process_trade(
         self,
@@ -206,27 +624,62 @@ class TradingBot:
         direction: TradeDirection,
         limit: Optional[float],
         stop: Optional[float],
-        open_positions: List[Position],
     ) -> None:
         """
-        Process a trade checking if it is a "close position" trade or a new trade
+        Process a trade checking if it is a "close position" trade or a new trade.
+        The position book is updated with the trades confirmed by the broker
         """
         # Perform trade only if required
         if direction is TradeDirection.NONE or limit is None or stop is None:
             return
 
-        for item in open_positions:
+        for item in self.position_book.get(market.epic):
             # If a same direction trade already exist, don't trade
-            if item.epic == market.epic and direction is item.direction:
+            if direction is item.direction:
                 logging.info(
                     "There is already an open position for this epic, skip trade"
                 )
                 return
             # If a trade in opposite direction exist, close the position
-            elif item.epic == market.epic and direction is not item.direction:
-                self.broker.close_position(item)
+            closed = self.broker.close_position(item)
+            self.safety_checker.invalidate()
+            if closed:
+                self.position_book.remove(item)
+            return
+        traded = self.broker.trade(market.epic, direction, limit, stop)
+        # The account usage changes after a trade
+        self.safety_checker.invalidate()
+        if traded:
+            self.position_book.add_trade(market.epic, direction, limit, stop)
+
+    async def process_trade_async(
+        self,
+        market: Market,
+        direction: TradeDirection,
+        limit: Optional[float],
+        stop: Optional[float],
+    ) -> None:
+        """
+        Asynchronous process_trade()
+        """
+        if direction is TradeDirection.NONE or limit is None or stop is None:
+            return
+
+        for item in self.position_book.get(market.epic):
+            if direction is item.direction:
+                logging.info(
+                    "There is already an open position for this epic, skip trade"
+                )
                 return
-        self.broker.trade(market.epic, direction, limit, stop)
+            closed = await asyncio.to_thread(self.broker.close_position, item)
+            self.safety_checker.invalidate()
+            if closed:
+                self.position_book.remove(item)
+            return
+        traded = await self.broker.trade_async(market.epic, direction, limit, stop)
+        self.safety_checker.invalidate()
+        if traded:
+            self.position_book.add_trade(market.epic, direction, limit, stop)
 
     def backtest(
         self,